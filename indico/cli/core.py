@@ -130,6 +130,26 @@ def cleanup(temp, cache, assets, verbose, dry_run, min_age):
     cleanup_cmd(temp, cache, assets, min_age=min_age, dry_run=dry_run, verbose=(verbose or dry_run))
 
 
+@cli.command(short_help='Show request performance statistics.')
+@click.option('--hours', type=click.IntRange(1), default=24, metavar='N',
+              help='Only include data from the last N hours (default: 24)')
+@click.option('--endpoint', '-e', metavar='NAME', help='Only include RHs whose name contains NAME')
+@click.option('--limit', '-n', type=click.IntRange(1), default=20, metavar='N',
+              help='Show the N endpoints with the highest total time (default: 20)')
+@click.option('--stacks', '-s', type=click.IntRange(0), default=0, metavar='N',
+              help='Show the N most frequent stacks of each endpoint')
+def profile(hours, endpoint, limit, stacks):
+    """Show request performance statistics.
+
+    This shows the latency and number of SQL queries of requests per RH
+    and the stacks sampled by the profiler, which needs to be enabled
+    using the `PROFILE_SAMPLE_RATE` or `PROFILE_SLOW_THRESHOLD` config
+    options.
+    """
+    from indico.web.profiler import profile_report_cmd
+    profile_report_cmd(hours, endpoint, limit, stacks)
+
+
 @cli.command(with_appcontext=False)
 @click.option('--host', '-h', default='127.0.0.1', metavar='HOST', help='The ip/host to bind to.')
 @click.option('--port', '-p', default=None, type=int, metavar='PORT', help='The port to bind to.')
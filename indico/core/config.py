@@ -53,6 +53,7 @@ DEFAULTS = {
     'CUSTOMIZATION_DIR': None,
     'CUSTOM_COUNTRIES': {},
     'DB_LOG': False,
+    'DB_REPEATED_QUERY_THRESHOLD': None,
     'DEBUG': False,
     'DEFAULT_LOCALE': 'en_GB',
     'DEFAULT_TIMEZONE': 'UTC',
@@ -60,6 +61,7 @@ DEFAULTS = {
     'ENABLE_ROOMBOOKING': False,
     'EXTERNAL_REGISTRATION_URL': None,
     'FLOWER_URL': None,
+    'GROUP_MEMBERSHIP_CACHE_TTL': 1800,
     'HELP_URL': 'https://learn.getindico.io',
     'IDENTITY_PROVIDERS': {},
     'LOCAL_IDENTITIES': True,
@@ -74,6 +76,8 @@ DEFAULTS = {
     'NO_REPLY_EMAIL': None,
     'PLUGINS': set(),
     'PROFILE': False,
+    'PROFILE_SAMPLE_RATE': 0,
+    'PROFILE_SLOW_THRESHOLD': None,
     'PROVIDER_MAP': {},
     'PUBLIC_SUPPORT_EMAIL': None,
     'REDIS_CACHE_URL': None,
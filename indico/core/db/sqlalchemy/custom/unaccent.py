@@ -53,7 +53,7 @@ def create_unaccent_function(conn):
     DDL(SQL_FUNCTION_UNACCENT).execute_if(callable_=_should_create_function).execute(conn)
 
 
-def define_unaccented_lowercase_index(column):
+def define_unaccented_lowercase_index(column, prefix=False):
     """Defines an index that uses the indico_unaccent function.
 
     Since this is usually used for searching, the column's value is
@@ -67,6 +67,10 @@ def define_unaccented_lowercase_index(column):
 
     :param column: The column the index should be created on, e.g.
                    ``User.first_name``
+    :param prefix: Whether to also create a btree index that is used
+                   for prefix searches (``LIKE 'something%'``).  Unlike
+                   the trgm index it is also efficient for prefixes
+                   shorter than three characters.
     """
     @listens_for(column.table, 'after_create')
     def _after_create(target, conn, **kw):
@@ -75,13 +79,37 @@ def define_unaccented_lowercase_index(column):
         index_kwargs = {'postgresql_using': 'gin',
                         'postgresql_ops': {col_func.key: 'gin_trgm_ops'}}
         Index(conv('ix_{}_{}_unaccent'.format(column.table.name, column.name)), col_func, **index_kwargs).create(conn)
+        if prefix:
+            Index(conv('ix_{}_{}_unaccent_prefix'.format(column.table.name, column.name)), col_func,
+                  postgresql_ops={col_func.key: 'text_pattern_ops'}).create(conn)
 
 
-def unaccent_match(column, value, exact):
-    from indico.core.db import db
+def _unaccent_lower(value):
+    return func.indico.indico_unaccent(func.lower(value))
+
+
+def unaccent_match(column, value, exact, prefix=False):
+    """Get a criterion matching a column against a search string.
+
+    :param column: The column to search in.
+    :param value: The string to search for.
+    :param exact: Whether only exact matches are allowed.
+    :param prefix: Whether the column only needs to start with the
+                   search string.  This is ignored for exact matches.
+    """
     value = to_unicode(value).replace('%', r'\%').replace('_', r'\_').lower()
     if not exact:
-        value = '%{}%'.format(value)
+        value = '{}%'.format(value) if prefix else '%{}%'.format(value)
     # we always use LIKE, even for an exact match. when using the pg_trgm indexes this is
     # actually faster than `=`
-    return db.func.indico.indico_unaccent(db.func.lower(column)).ilike(db.func.indico.indico_unaccent(value))
+    like = _unaccent_lower(column).like if prefix and not exact else _unaccent_lower(column).ilike
+    return like(func.indico.indico_unaccent(value))
+
+
+def unaccent_similarity(column, value):
+    """Get the trigram similarity between a column and a search string.
+
+    The result is a number between 0 (nothing in common) and 1 (equal),
+    which can be used to rank the results of a search.
+    """
+    return func.similarity(_unaccent_lower(column), _unaccent_lower(to_unicode(value)))
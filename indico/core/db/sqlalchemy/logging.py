@@ -19,16 +19,14 @@ from __future__ import absolute_import, unicode_literals
 import logging
 import pprint
 import time
-import traceback
 
-from flask import appcontext_tearing_down, current_app, g, has_request_context, request, request_tearing_down
+from flask import appcontext_tearing_down, g, has_request_context, request, request_tearing_down
 from sqlalchemy.engine import Engine
 from sqlalchemy.event import listens_for
 
 from indico.core.config import config
 from indico.core.db import db
-from indico.core.plugins import plugin_engine
-from indico.web.flask.stats import get_request_stats
+from indico.web.flask.stats import get_request_stats, get_sql_line
 
 
 def _prettify_sql(statement):
@@ -39,20 +37,6 @@ def _prettify_params(args):
     return '    ' + pprint.pformat(args).replace('\n', '\n    ')
 
 
-def _interesting_tb_item(item, paths):
-    return (item[0].endswith('.tpl.py') or any(item[0].startswith(p) for p in paths)) and 'sqlalchemy' not in item[0]
-
-
-def _get_sql_line():
-    paths = [current_app.root_path] + [p.root_path for p in plugin_engine.get_active_plugins().itervalues()]
-    stack = [item for item in reversed(traceback.extract_stack()) if _interesting_tb_item(item, paths)]
-    for i, item in enumerate(stack):
-        return {'file': item[0],
-                'line': item[1],
-                'function': item[2],
-                'items': stack[i:i+5]}
-
-
 def _fix_param(param):
     if hasattr(param, 'iteritems'):
         return {k: _fix_param(v) for k, v in param.iteritems()}
@@ -79,7 +63,7 @@ def apply_db_loggers(app, force=False):
                                                    'req_url': request.url if has_request_context() else None})
 
         context._query_start_time = time.time()
-        source_line = _get_sql_line()
+        source_line = get_sql_line()
         if source_line:
             log_msg = 'Start Query:\n    {0[file]}:{0[line]} {0[function]}\n\n{1}\n{2}'.format(
                 source_line,
@@ -108,7 +92,7 @@ def apply_db_loggers(app, force=False):
     @listens_for(Engine, 'after_cursor_execute')
     def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
         total = time.time() - context._query_start_time
-        source_line = _get_sql_line()
+        source_line = get_sql_line()
         source = source_line['items'] if source_line else None
         logger.debug('Query complete; total time: %s', total, extra={'sql_log_type': 'end',
                                                                      'req_path': (request.path
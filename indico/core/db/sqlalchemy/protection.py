@@ -32,7 +32,7 @@ from indico.util.caching import memoize_request
 from indico.util.i18n import _
 from indico.util.signals import values_from_signal
 from indico.util.struct.enum import RichIntEnum
-from indico.util.user import iter_acl
+from indico.util.user import iter_acl, user_in_acl
 from indico.web.util import jsonify_template
 
 
@@ -167,55 +167,98 @@ class ProtectionMixin(object):
         override = self._check_can_access_override(user, allow_admin=allow_admin)
         if override is not None:
             return override
+        rv = self._check_access_rules(_ProtectionRuleChecker(user, allow_admin=allow_admin))
+        override = self._check_can_access_override(user, allow_admin=allow_admin, authorized=rv)
+        return override if override is not None else rv
+
+    def _check_access_rules(self, checker):
+        """Check if a user can access the object, ignoring any overrides.
 
+        :param checker: The checker for the user and `allow_admin` flag,
+                        which is used to check ACLs and other objects.
+        """
+        user = checker.user
         # Usually admins can access everything, so no need for checks
-        if allow_admin and user and user.is_admin:
-            rv = True
+        if checker.allow_admin and user and user.is_admin:
+            return True
         # If there's a valid access key we can skip all other ACL checks
         elif self.allow_access_key and self.check_access_key():
-            rv = True
+            return True
         elif self.protection_mode == ProtectionMode.public:
             # if it's public we completely ignore the parent protection
             # this is quite ugly which is why it should only be allowed
             # in rare cases (e.g. events which might be in a protected
             # category but should be public nonetheless)
-            rv = True
+            return True
         elif self.protection_mode == ProtectionMode.protected:
             # if it's protected, we also ignore the parent protection
             # and only check our own ACL
-            if any(user in entry.principal for entry in iter_acl(self.acl_entries)):
-                rv = True
+            if checker.in_acl(self.acl_entries):
+                return True
             elif isinstance(self, ProtectionManagersMixin):
-                rv = self.can_manage(user, allow_admin=allow_admin)
+                return checker.can_manage(self)
             else:
-                rv = False
+                return False
         elif self.protection_mode == ProtectionMode.inheriting:
             # if it's inheriting, we only check the parent protection
             # unless `inheriting_have_acl` is set, in which case we
             # might not need to check the parents at all
-            if self.inheriting_have_acl and any(user in entry.principal for entry in iter_acl(self.acl_entries)):
-                rv = True
+            if self.inheriting_have_acl and checker.in_acl(self.acl_entries):
+                return True
+            # the parent can be either an object inheriting from this
+            # mixin or a legacy object with an AccessController
+            parent = self.protection_parent
+            if parent is None:
+                # This should be the case for the top-level object,
+                # i.e. the root category, which shouldn't allow
+                # ProtectionMode.inheriting as it makes no sense.
+                raise TypeError('protection_parent of {} is None'.format(self))
+            elif hasattr(parent, 'can_access'):
+                return checker.can_access(parent)
             else:
-                # the parent can be either an object inheriting from this
-                # mixin or a legacy object with an AccessController
-                parent = self.protection_parent
-                if parent is None:
-                    # This should be the case for the top-level object,
-                    # i.e. the root category, which shouldn't allow
-                    # ProtectionMode.inheriting as it makes no sense.
-                    raise TypeError('protection_parent of {} is None'.format(self))
-                elif hasattr(parent, 'can_access'):
-                    rv = parent.can_access(user, allow_admin=allow_admin)
-                else:
-                    raise TypeError('protection_parent of {} is of invalid type {} ({})'.format(self, type(parent),
-                                                                                                parent))
+                raise TypeError('protection_parent of {} is of invalid type {} ({})'.format(self, type(parent),
+                                                                                            parent))
         else:
             # should never happen, but since this is a sensitive area
             # we better fail loudly if we have garbage
             raise ValueError('Invalid protection mode: {}'.format(self.protection_mode))
 
-        override = self._check_can_access_override(user, allow_admin=allow_admin, authorized=rv)
-        return override if override is not None else rv
+    @classmethod
+    def filter_accessible(cls, objs, user, allow_admin=True):
+        """Get the objects the user can access.
+
+        This is equivalent to calling :meth:`can_access` on each of the
+        objects, but the data needed for the checks is loaded at once
+        using :meth:`preload_protection_data` and the results for shared
+        protection parents and principals are computed only once.
+
+        :param objs: The objects to check.
+        :param user: The :class:`.User` to check. May be None if the
+                     user is not logged in.
+        :param allow_admin: If admin users should always have access
+        :return: A list containing the accessible objects in their
+                 original order.
+        """
+        objs = list(objs)
+        # keep a reference to the preloaded objects so they are not
+        # garbage-collected from the identity map before we use them
+        _preloaded = cls.preload_protection_data(objs)
+        checker = ProtectionChecker(user, allow_admin=allow_admin)
+        return [obj for obj in objs if checker.can_access(obj)]
+
+    @classmethod
+    def preload_protection_data(cls, objs):
+        """Load the data needed to check access to many objects.
+
+        This is called by :meth:`filter_accessible` and should be
+        overridden to load e.g. the ACLs of the objects and their
+        protection parents using as few queries as possible.
+
+        :param objs: The objects which will be checked.
+        :return: Any objects which must be kept alive while the checks
+                 are performed.
+        """
+        return None
 
     def check_access_key(self, access_key=None):
         """Check whether an access key is valid for the object.
@@ -364,14 +407,25 @@ class ProtectionManagersMixin(ProtectionMixin):
             # we stay on the safe side and deny access
             return all(rv)
 
+        return self._check_manage_rules(_ProtectionRuleChecker(user, allow_admin=allow_admin), permission=permission,
+                                        check_parent=check_parent, explicit_permission=explicit_permission)
+
+    def _check_manage_rules(self, checker, permission=None, check_parent=True, explicit_permission=False):
+        """Check if a user can manage the object, ignoring any overrides.
+
+        :param checker: The checker for the user (which must not be
+                        ``None``) and `allow_admin` flag, which is used
+                        to check ACLs and other objects.
+
+        The other arguments are the same as in :meth:`can_manage`.
+        """
         # Usually admins can access everything, so no need for checks
-        if not explicit_permission and allow_admin and user.is_admin:
+        if not explicit_permission and checker.allow_admin and checker.user.is_admin:
             return True
 
-        if any(user in entry.principal
-               for entry in iter_acl(self.acl_entries)
-               if entry.has_management_permission(permission,
-                                                  explicit=(explicit_permission and permission is not None))):
+        explicit = explicit_permission and permission is not None
+        if checker.in_acl(entry for entry in self.acl_entries
+                          if entry.has_management_permission(permission, explicit=explicit)):
             return True
 
         if not check_parent or explicit_permission:
@@ -385,7 +439,7 @@ class ProtectionManagersMixin(ProtectionMixin):
             # i.e. the root category
             return False
         elif hasattr(parent, 'can_manage'):
-            return parent.can_manage(user, allow_admin=allow_admin)
+            return checker.can_manage(parent)
         else:
             raise TypeError('protection_parent of {} is of invalid type {} ({})'.format(self, type(parent), parent))
 
@@ -495,6 +549,95 @@ def _get_acl_data(obj, principal):
     return principal_class, entry
 
 
+class _ProtectionRuleChecker(object):
+    """Check ACLs and other objects while evaluating protection rules.
+
+    This is used by the regular access checks of a single object.  It
+    does not cache anything itself, but the checks of other objects
+    (e.g. protection parents) are memoized for the current request.
+    """
+
+    def __init__(self, user, allow_admin=True):
+        self.user = user
+        self.allow_admin = allow_admin
+
+    def can_access(self, obj):
+        return obj.can_access(self.user, allow_admin=self.allow_admin)
+
+    def can_manage(self, obj):
+        return obj.can_manage(self.user, allow_admin=self.allow_admin)
+
+    def in_acl(self, acl_entries):
+        return user_in_acl(self.user, acl_entries)
+
+
+class ProtectionChecker(_ProtectionRuleChecker):
+    """Check access to many protected objects for a single user.
+
+    The rules of :meth:`ProtectionMixin.can_access` and
+    :meth:`ProtectionManagersMixin.can_manage` are evaluated using this
+    checker, which caches the results per object and per principal
+    while it is alive, so protection parents (e.g. categories) and
+    groups shared by many of the checked objects are only evaluated
+    once.
+
+    If signal handlers may override the access checks for a type of
+    object, the regular (uncached) methods are used for it.
+    """
+
+    def __init__(self, user, allow_admin=True):
+        super(ProtectionChecker, self).__init__(user, allow_admin=allow_admin)
+        self._access_cache = {}
+        self._manage_cache = {}
+        self._principal_cache = {}
+
+    def can_access(self, obj):
+        try:
+            return self._access_cache[obj]
+        except KeyError:
+            rv = self._access_cache[obj] = self._check_access(obj)
+            return rv
+
+    def can_manage(self, obj):
+        try:
+            return self._manage_cache[obj]
+        except KeyError:
+            rv = self._manage_cache[obj] = self._check_manage(obj)
+            return rv
+
+    def _check_access(self, obj):
+        if not isinstance(obj, ProtectionMixin) or signals.acl.can_access.has_receivers_for(type(obj)):
+            return super(ProtectionChecker, self).can_access(obj)
+        return obj._check_access_rules(self)
+
+    def _check_manage(self, obj):
+        if self.user is None:
+            return False
+        elif not isinstance(obj, ProtectionManagersMixin) or signals.acl.can_manage.has_receivers_for(type(obj)):
+            return super(ProtectionChecker, self).can_manage(obj)
+        return obj._check_manage_rules(self)
+
+    def in_acl(self, acl_entries):
+        from indico.modules.groups.core import get_group_memberships
+        multipass_groups = []
+        for entry in iter_acl(acl_entries):
+            principal = entry.principal
+            if principal.principal_type == PrincipalType.multipass_group and principal not in self._principal_cache:
+                multipass_groups.append(principal)
+            elif self._contains(principal):
+                return True
+        # groups not checked yet are checked at once, and only if needed
+        self._principal_cache.update(get_group_memberships(self.user, multipass_groups))
+        return any(self._principal_cache[group] for group in multipass_groups)
+
+    def _contains(self, principal):
+        try:
+            return self._principal_cache[principal]
+        except KeyError:
+            rv = self._principal_cache[principal] = self.user in principal
+            return rv
+
+
 def _resolve_principal(principal):
     """Helper function to convert an email principal to a user if possible
 
@@ -19,6 +19,7 @@ from __future__ import absolute_import, unicode_literals
 import cPickle
 import os
 import tempfile
+import time
 from datetime import date
 
 import click
@@ -38,6 +39,8 @@ from indico.util.string import truncate
 logger = Logger.get('emails')
 MAX_TRIES = 10
 DELAYS = [30, 60, 120, 300, 600, 1800, 3600, 3600, 7200]
+#: The maximum number of emails sent using the same SMTP connection
+BATCH_SIZE = 100
 
 
 @celery.task(name='send_email', bind=True, max_retries=None)
@@ -73,6 +76,91 @@ def send_email_task(task, email, log_entry=None):
             db.session.commit()
 
 
+@celery.task(name='send_emails')
+def send_emails_task(emails):
+    """Send multiple emails using a single SMTP connection.
+
+    Emails which could not be sent are retried separately using
+    :func:`send_email_task`.
+
+    :param emails: A list of ``(email, log_entry_id)`` tuples; log
+                   entries are passed by id since only objects passed
+                   directly as task arguments are handled by celery.
+    """
+    from indico.modules.events.logs import EventLogEntry
+    log_entry_ids = {log_entry_id for _, log_entry_id in emails if log_entry_id is not None}
+    log_entries = ({e.id: e for e in EventLogEntry.query.filter(EventLogEntry.id.in_(log_entry_ids))}
+                   if log_entry_ids else {})
+    failed = do_send_emails([(email, log_entries.get(log_entry_id)) for email, log_entry_id in emails])
+    # commit the log entry state changes
+    db.session.commit()
+    delay = DELAYS[0] if not config.DEBUG else 1
+    for email, log_entry, exc in failed:
+        logger.warning('Could not send email "%s" (attempt 1/%d); retry in %ds [%s]',
+                       truncate(email['subject'], 100), MAX_TRIES, delay, exc)
+        send_email_task.apply_async((email, log_entry), countdown=delay, retries=1)
+
+
+def _make_message(email, connection):
+    msg = EmailMessage(subject=email['subject'], body=email['body'], from_email=email['from'],
+                       to=email['to'], cc=email['cc'], bcc=email['bcc'], reply_to=email['reply_to'],
+                       attachments=email['attachments'], connection=connection)
+    if not msg.to:
+        msg.extra_headers['To'] = 'Undisclosed-recipients:;'
+    if email['html']:
+        msg.content_subtype = 'html'
+    return msg
+
+
+def _close_connection(conn):
+    try:
+        conn.close()
+    except Exception:
+        # we do not care if the connection was already broken
+        pass
+
+
+def do_send_emails(emails):
+    """Send multiple emails using a single SMTP connection.
+
+    Unlike :func:`do_send_email`, this function does not fail when
+    an email cannot be sent; such emails are returned instead so the
+    caller can decide whether to retry sending them.
+
+    :param emails: A list of ``(email, log_entry)`` tuples; see
+                   :func:`do_send_email` for details.
+    :return: A list of ``(email, log_entry, exception)`` tuples for
+             the emails which could not be sent.
+    """
+    failed = []
+    start = time.time()
+    conn = EmailBackend(timeout=config.SMTP_TIMEOUT)
+    for i, (email, log_entry) in enumerate(emails):
+        try:
+            conn.open()
+        except Exception as exc:
+            # no point in trying to send the other emails if we cannot
+            # even connect to the mail server
+            failed += [(email, log_entry, exc) for email, log_entry in emails[i:]]
+            break
+        try:
+            _make_message(email, conn).send()
+        except Exception as exc:
+            failed.append((email, log_entry, exc))
+            # the connection may be in an unusable state now
+            _close_connection(conn)
+            continue
+        logger.info('Sent email "%s"', truncate(email['subject'], 100))
+        if log_entry:
+            update_email_log_state(log_entry)
+    _close_connection(conn)
+    duration = time.time() - start
+    sent = len(emails) - len(failed)
+    logger.info('Sent %d/%d emails in %.2fs (%.1f emails/s)', sent, len(emails), duration,
+                (sent / duration) if duration else 0)
+    return failed
+
+
 def do_send_email(email, log_entry=None, _from_task=False):
     """Send an email.
 
@@ -91,14 +179,7 @@ def do_send_email(email, log_entry=None, _from_task=False):
                        the celery task responsible for sending emails.
     """
     with EmailBackend(timeout=config.SMTP_TIMEOUT) as conn:
-        msg = EmailMessage(subject=email['subject'], body=email['body'], from_email=email['from'],
-                           to=email['to'], cc=email['cc'], bcc=email['bcc'], reply_to=email['reply_to'],
-                           attachments=email['attachments'], connection=conn)
-        if not msg.to:
-            msg.extra_headers['To'] = 'Undisclosed-recipients:;'
-        if email['html']:
-            msg.content_subtype = 'html'
-        msg.send()
+        _make_message(email, conn).send()
     if not _from_task:
         logger.info('Sent email "%s"', truncate(email['subject'], 100))
     if log_entry:
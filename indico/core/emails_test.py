@@ -0,0 +1,61 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+from smtplib import SMTPRecipientsRefused
+
+import pytest
+
+from indico.core import emails as emails_module
+from indico.core.emails import do_send_emails
+
+
+def _make_email(subject):
+    return {'subject': subject}
+
+
+@pytest.fixture
+def backend(mocker):
+    mocker.patch.object(emails_module, 'config')
+    mocker.patch.object(emails_module, 'update_email_log_state')
+    return mocker.patch.object(emails_module, 'EmailBackend')
+
+
+def test_do_send_emails(mocker, backend):
+    def _send(email, conn):
+        msg = mocker.Mock()
+        if email['subject'] == 'fail':
+            msg.send.side_effect = SMTPRecipientsRefused({})
+        return msg
+
+    mocker.patch.object(emails_module, '_make_message', side_effect=_send)
+    emails = [(_make_email('a'), 'log-a'), (_make_email('fail'), 'log-fail'), (_make_email('b'), None)]
+    failed = do_send_emails(emails)
+    assert [(email['subject'], log_entry) for email, log_entry, exc in failed] == [('fail', 'log-fail')]
+    assert isinstance(failed[0][2], SMTPRecipientsRefused)
+    # all emails are sent using the same backend
+    assert backend.call_count == 1
+    emails_module.update_email_log_state.assert_called_once_with('log-a')
+
+
+def test_do_send_emails_no_connection(mocker, backend):
+    make_message = mocker.patch.object(emails_module, '_make_message')
+    backend.return_value.open.side_effect = IOError('connection refused')
+    emails = [(_make_email('a'), None), (_make_email('b'), None)]
+    failed = do_send_emails(emails)
+    assert [email['subject'] for email, log_entry, exc in failed] == ['a', 'b']
+    assert backend.return_value.open.call_count == 1
+    assert not make_message.called
+    assert not emails_module.update_email_log_state.called
@@ -27,6 +27,7 @@ from indico.core.config import config
 from indico.core.db import db
 from indico.core.logger import Logger
 from indico.util.string import to_unicode, truncate
+from indico.util.struct.iterables import grouper
 
 
 logger = Logger.get('emails')
@@ -60,14 +61,15 @@ def send_email(email, event=None, module=None, user=None):
     :param user: The user to show in the email log
     """
     from indico.core.emails import do_send_email, send_email_task
-    fn = send_email_task.delay if config.SMTP_USE_CELERY else do_send_email
     # we log the email immediately (as pending).  if we don't commit,
     # the log message will simply be thrown away later
     log_entry = _log_email(email, event, module, user)
     if 'email_queue' in g:
-        g.email_queue.append((fn, email, log_entry))
+        g.email_queue.append((email, log_entry))
+    elif config.SMTP_USE_CELERY:
+        send_email_task.delay(email, log_entry)
     else:
-        fn(email, log_entry)
+        do_send_email(email, log_entry)
 
 
 def _log_email(email, event, module, user):
@@ -103,31 +105,47 @@ def flush_email_queue():
     doing a commit/rollback of any other changes that might have
     been pending.
     """
-    from indico.core.emails import store_failed_email, update_email_log_state
+    from indico.core.emails import BATCH_SIZE, do_send_emails, send_emails_task
     queue = g.get('email_queue', [])
     if not queue:
         return
     logger.debug('Sending %d queued emails', len(queue))
-    for fn, email, log_entry in queue:
-        try:
-            fn(email, log_entry)
-        except Exception:
+    # queued emails are sent in batches so each batch can use a single
+    # SMTP connection instead of connecting once for every email
+    for batch in grouper(queue, BATCH_SIZE, skip_missing=True):
+        if not config.SMTP_USE_CELERY:
+            failed = do_send_emails(batch)
+        else:
+            try:
+                send_emails_task.delay([(email, log_entry.id if log_entry else None)
+                                        for email, log_entry in batch])
+            except Exception as exc:
+                failed = [(email, log_entry, exc) for email, log_entry in batch]
+            else:
+                failed = []
+        for email, log_entry, exc in failed:
             # Flushing the email queue happens after a commit.
             # If anything goes wrong here we keep going and just log
             # it to avoid losing (more) emails in case celery is not
             # used for email sending or there is a temporary issue
             # with celery.
-            if log_entry:
-                update_email_log_state(log_entry, failed=True)
-            path = store_failed_email(email, log_entry)
-            logger.exception('Flushing queued email "%s" failed; stored data in %s',
-                             truncate(email['subject'], 100), path)
+            _handle_failed_email(email, log_entry, exc)
+        if failed:
             # Wait for a short moment in case it's a very temporary issue
             time.sleep(0.25)
     del queue[:]
     db.session.commit()
 
 
+def _handle_failed_email(email, log_entry, exc):
+    from indico.core.emails import store_failed_email, update_email_log_state
+    if log_entry:
+        update_email_log_state(log_entry, failed=True)
+    path = store_failed_email(email, log_entry)
+    logger.error('Flushing queued email "%s" failed; stored data in %s [%s]',
+                 truncate(email['subject'], 100), path, exc)
+
+
 def make_email(to_list=None, cc_list=None, bcc_list=None, from_address=None, reply_address=None, attachments=None,
                subject=None, body=None, template=None, html=False):
     """Creates an email.
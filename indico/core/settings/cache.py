@@ -0,0 +1,149 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+"""Process-wide cache for settings.
+
+The settings of a scope (e.g. the global settings or the settings of a
+specific event) are loaded with a single query, but the request-level
+cache in :class:`.SettingsBase` only avoids running that query more than
+once per request, and outside a request context (e.g. in Celery tasks)
+there is no caching at all.  This module keeps the loaded settings in
+memory so they can be reused until they change.
+
+Each scope has a version in the shared cache.  After a transaction which
+changed settings of a scope has been committed, a new version is
+published so other processes know that their copy is outdated.  While a
+transaction has pending changes to a scope, its settings always come
+from the database.
+"""
+
+from __future__ import unicode_literals
+
+import threading
+from collections import OrderedDict, namedtuple
+from copy import deepcopy
+from datetime import timedelta
+from uuid import uuid4
+
+from flask import has_app_context
+from sqlalchemy.event import listens_for
+from sqlalchemy.orm import Session
+
+from indico.core.db import db
+from indico.legacy.common.cache import GenericCache
+from indico.util.date_time import now_utc
+
+
+_cache = GenericCache('settings')
+_lock = threading.Lock()
+_entries = OrderedDict()
+
+#: The maximum number of scopes kept in memory
+max_entries = 1000
+#: The time after which settings are reloaded even if no change has
+#: been announced, in case an update bypassed the settings models
+max_age = timedelta(hours=1)
+#: The time for which a version is kept in the shared cache
+version_ttl = timedelta(days=7)
+
+_CacheEntry = namedtuple('_CacheEntry', ('version', 'loaded_dt', 'data'))
+
+
+def _get_scope(cls, kwargs):
+    return cls, frozenset(kwargs.viewitems())
+
+
+def _get_version_key(scope):
+    cls, kwargs = scope
+    return 'version:{}:{}'.format(cls.__table__.fullname,
+                                  ','.join('{}={}'.format(k, v) for k, v in sorted(kwargs)))
+
+
+def _is_cacheable(cls):
+    return cls.cache_across_requests and has_app_context()
+
+
+def get_cached_settings(cls, kwargs, loader):
+    """Get the settings of a scope, using the process-wide cache.
+
+    :param cls: The settings model.
+    :param kwargs: The columns identifying the scope, e.g. ``event_id``.
+    :param loader: A callable loading the settings of the scope from the
+                   database as a dict mapping module names to dicts of
+                   settings.
+    :return: A copy of the settings, so the caller may modify it.
+    """
+    if not _is_cacheable(cls):
+        return loader()
+    scope = _get_scope(cls, kwargs)
+    if scope in db.session.info.get('settings_changes', ()):
+        # the cached data does not contain the pending changes
+        return loader()
+    version_key = _get_version_key(scope)
+    # the version needs to be checked before loading the data, otherwise
+    # a change committed in between could go unnoticed
+    version = _cache.get(version_key)
+    entry = _entries.get(scope)
+    if (entry is not None and version is not None and entry.version == version and
+            now_utc() - entry.loaded_dt <= max_age):
+        return deepcopy(entry.data)
+    if version is None:
+        # nobody announced a version yet (or the cache has been cleared),
+        # so we cannot know if our copy is up to date
+        version = unicode(uuid4())
+        _cache.set(version_key, version, version_ttl)
+    data = loader()
+    with _lock:
+        _entries.pop(scope, None)
+        _entries[scope] = _CacheEntry(version, now_utc(), deepcopy(data))
+        while len(_entries) > max_entries:
+            _entries.popitem(last=False)
+    return data
+
+
+def invalidate_cached_settings(cls, kwargs):
+    """Notify the cache about changed settings.
+
+    The settings of the scope are loaded from the database until the
+    current transaction ends.  Once it has been committed, other
+    processes are notified about the change.
+
+    :param cls: The settings model.
+    :param kwargs: The columns identifying the scope, e.g. ``event_id``.
+    """
+    if not _is_cacheable(cls):
+        return
+    db.session.info.setdefault('settings_changes', set()).add(_get_scope(cls, kwargs))
+
+
+@listens_for(Session, 'after_commit')
+def _publish_settings_changes(session):
+    if session.transaction.nested:
+        return
+    scopes = session.info.pop('settings_changes', None)
+    if not scopes:
+        return
+    with _lock:
+        for scope in scopes:
+            _entries.pop(scope, None)
+    _cache.set_multi({_get_version_key(scope): unicode(uuid4()) for scope in scopes}, version_ttl)
+
+
+@listens_for(Session, 'after_soft_rollback')
+def _discard_settings_changes(session, previous_transaction):
+    if previous_transaction.parent is None:
+        # the cached data is still valid since nothing has been committed
+        session.info.pop('settings_changes', None)
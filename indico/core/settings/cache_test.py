@@ -0,0 +1,122 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+from collections import OrderedDict
+
+import pytest
+
+from indico.core.settings import SettingsProxy
+from indico.core.settings import cache as cache_module
+from indico.core.settings.cache import get_cached_settings, invalidate_cached_settings
+
+
+class _DictCache(dict):
+    def set(self, key, value, time=0):
+        self[key] = value
+
+    def set_multi(self, mapping, time=0):
+        self.update(mapping)
+
+
+class _DummySettings(object):
+    __table__ = type(b'Table', (object,), {'fullname': 'events.settings'})
+    cache_across_requests = True
+
+
+@pytest.fixture
+def shared_cache(mocker, monkeypatch):
+    cache = _DictCache()
+    monkeypatch.setattr(cache_module, '_cache', cache)
+    monkeypatch.setattr(cache_module, '_entries', OrderedDict())
+    monkeypatch.setattr(cache_module, 'db', mocker.MagicMock())
+    cache_module.db.session.info = {}
+    cache_module.db.session.transaction.nested = False
+    return cache
+
+
+@pytest.fixture
+def loader(mocker):
+    return mocker.Mock(side_effect=lambda: {'foo': {'bar': [1, 2]}})
+
+
+def test_cached(shared_cache, loader):
+    data = get_cached_settings(_DummySettings, {'event_id': 1}, loader)
+    data['foo']['bar'].append(3)
+    assert get_cached_settings(_DummySettings, {'event_id': 1}, loader) == {'foo': {'bar': [1, 2]}}
+    assert loader.call_count == 1
+    assert shared_cache.keys() == ['version:events.settings:event_id=1']
+    # other scopes are cached separately
+    get_cached_settings(_DummySettings, {'event_id': 2}, loader)
+    assert loader.call_count == 2
+
+
+def test_version_changed(shared_cache, loader):
+    get_cached_settings(_DummySettings, {'event_id': 1}, loader)
+    shared_cache['version:events.settings:event_id=1'] = 'changed'
+    get_cached_settings(_DummySettings, {'event_id': 1}, loader)
+    get_cached_settings(_DummySettings, {'event_id': 1}, loader)
+    assert loader.call_count == 2
+    # the version disappeared from the shared cache
+    shared_cache.clear()
+    get_cached_settings(_DummySettings, {'event_id': 1}, loader)
+    assert loader.call_count == 3
+
+
+def test_invalidate(shared_cache, loader):
+    session = cache_module.db.session
+    get_cached_settings(_DummySettings, {'event_id': 1}, loader)
+    version = shared_cache['version:events.settings:event_id=1']
+    invalidate_cached_settings(_DummySettings, {'event_id': 1})
+    # pending changes are never cached
+    get_cached_settings(_DummySettings, {'event_id': 1}, loader)
+    get_cached_settings(_DummySettings, {'event_id': 1}, loader)
+    assert loader.call_count == 3
+    cache_module._publish_settings_changes(session)
+    assert not session.info
+    assert shared_cache['version:events.settings:event_id=1'] != version
+    get_cached_settings(_DummySettings, {'event_id': 1}, loader)
+    get_cached_settings(_DummySettings, {'event_id': 1}, loader)
+    assert loader.call_count == 4
+
+
+def test_invalidate_rollback(mocker, shared_cache, loader):
+    session = cache_module.db.session
+    transaction = mocker.Mock()
+    transaction.parent = None
+    get_cached_settings(_DummySettings, {'event_id': 1}, loader)
+    version = shared_cache['version:events.settings:event_id=1']
+    invalidate_cached_settings(_DummySettings, {'event_id': 1})
+    cache_module._discard_settings_changes(session, transaction)
+    assert shared_cache['version:events.settings:event_id=1'] == version
+    get_cached_settings(_DummySettings, {'event_id': 1}, loader)
+    assert loader.call_count == 1
+
+
+def test_settings_proxy(db, count_queries):
+    proxy = SettingsProxy('test', {'hello': 'world'})
+    proxy.set('hello', 'foo')
+    # pending changes are always loaded from the database
+    with count_queries() as cnt:
+        assert proxy.get('hello') == 'foo'
+        assert proxy.get('hello') == 'foo'
+    assert cnt() == 2
+    cache_module._publish_settings_changes(db.session)
+    with count_queries() as cnt:
+        assert proxy.get('hello') == 'foo'
+        assert proxy.get('hello') == 'foo'
+    assert cnt() == 1
+    proxy.set('hello', 'bar')
+    assert proxy.get('hello') == 'bar'
@@ -17,6 +17,7 @@
 from __future__ import unicode_literals
 
 from collections import defaultdict
+from functools import partial
 from enum import Enum
 
 from flask import g, has_request_context
@@ -24,6 +25,7 @@ from sqlalchemy.dialects.postgresql import JSON
 
 from indico.core.db import db
 from indico.core.db.sqlalchemy.principals import PrincipalMixin, PrincipalType
+from indico.core.settings.cache import get_cached_settings, invalidate_cached_settings
 from indico.util.decorators import strict_classproperty
 
 
@@ -36,6 +38,10 @@ def _coerce_value(value):
 class SettingsBase(object):
     """Base class for any kind of setting tables"""
 
+    #: Whether the settings may be kept in the process-wide cache.  This
+    #: should be disabled for scopes with many instances such as users.
+    cache_across_requests = True
+
     id = db.Column(
         db.Integer,
         primary_key=True
@@ -63,18 +69,18 @@ class SettingsBase(object):
             return
         cls.find(cls.name.in_(names), cls.module == module, **kwargs).delete(synchronize_session='fetch')
         db.session.flush()
-        cls._clear_cache()
+        cls._clear_cache(kwargs)
 
     @classmethod
     def delete_all(cls, module, **kwargs):
         cls.find(module=module, **kwargs).delete()
         db.session.flush()
-        cls._clear_cache()
+        cls._clear_cache(kwargs)
 
     @classmethod
     def _get_cache(cls, kwargs):
         if not has_request_context():
-            # disable the cache by always returning an empty one
+            # only the process-wide cache is available
             return defaultdict(dict), False
         key = (cls, frozenset(kwargs.viewitems()))
         try:
@@ -88,10 +94,11 @@ class SettingsBase(object):
             # no cache for this settings class / kwargs
             return g.global_settings_cache.setdefault(key, defaultdict(dict)), False
 
-    @staticmethod
-    def _clear_cache():
+    @classmethod
+    def _clear_cache(cls, kwargs):
         if has_request_context():
             g.pop('global_settings_cache', None)
+        invalidate_cached_settings(cls, kwargs)
 
 
 class JSONSettingsBase(SettingsBase):
@@ -118,10 +125,16 @@ class JSONSettingsBase(SettingsBase):
         if hit:
             return cache[module]
         else:
-            for s in cls.find(**kwargs):
-                cache[s.module][s.name] = s.value
+            cache.update(get_cached_settings(cls, kwargs, partial(cls._load_all, kwargs)))
             return cache[module]
 
+    @classmethod
+    def _load_all(cls, kwargs):
+        rv = defaultdict(dict)
+        for s in cls.find(**kwargs):
+            rv[s.module][s.name] = s.value
+        return rv
+
     @classmethod
     def get(cls, module, name, default=None, **kwargs):
         setting = cls.get_setting(module, name, **kwargs)
@@ -137,7 +150,7 @@ class JSONSettingsBase(SettingsBase):
             db.session.add(setting)
         setting.value = _coerce_value(value)
         db.session.flush()
-        cls._clear_cache()
+        cls._clear_cache(kwargs)
 
     @classmethod
     def set_multi(cls, module, items, **kwargs):
@@ -148,7 +161,7 @@ class JSONSettingsBase(SettingsBase):
         for name in items.viewkeys() & existing.viewkeys():
             existing[name].value = _coerce_value(items[name])
         db.session.flush()
-        cls._clear_cache()
+        cls._clear_cache(kwargs)
 
 
 class PrincipalSettingsBase(PrincipalMixin, SettingsBase):
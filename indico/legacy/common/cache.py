@@ -17,12 +17,15 @@
 import cPickle as pickle
 import datetime
 import hashlib
+import math
 import os
+import random
+import threading
 import time
+from collections import Counter, OrderedDict, defaultdict
 from itertools import izip
 
 import redis
-from flask import g
 
 from indico.core.config import config
 from indico.core.logger import Logger
@@ -45,6 +48,38 @@ class _NoneValue(object):
         return None if isinstance(value, cls) else value
 
 
+class _ComputedValue(object):
+    """A value stored by :meth:`GenericCache.get_or_compute`.
+
+    Besides the value it contains the time it took to compute it and
+    when it expires, which is needed to refresh it early.
+    """
+
+    def __init__(self, value, duration, expiry):
+        self.value = value
+        self.duration = duration
+        self.expiry = expiry
+
+    @classmethod
+    def compute(cls, func, ttl):
+        start = time.time()
+        value = func()
+        end = time.time()
+        return cls(value, end - start, (end + ttl) if ttl else None)
+
+    def needs_refresh(self, beta=1):
+        """Check whether the value should be recomputed.
+
+        The earlier the value expires and the longer it took to compute,
+        the more likely it is to be refreshed before it expires.  This
+        makes it very unlikely that many processes need to compute the
+        value at the same time after it expired.
+        """
+        if self.expiry is None:
+            return False
+        return time.time() - self.duration * beta * math.log(random.random() or 1e-10) >= self.expiry
+
+
 class CacheClient(object):
     """This is an abstract class. A cache client provide a simple API to get/set/delete cache entries.
 
@@ -54,6 +89,9 @@ class CacheClient(object):
     - delete(self, key)
 
     The unit for the ttl arguments is a second.
+
+    Backends which can atomically increment counters also implement
+    ``incr(self, key, delta)``.
     """
     def set_multi(self, mapping, ttl=0):
         for key, val in mapping.iteritems():
@@ -80,6 +118,9 @@ class CacheClient(object):
     def delete(self, key):
         raise NotImplementedError
 
+    def incr(self, key, delta=1):
+        return None
+
 
 class NullCacheClient(CacheClient):
     """Does nothing"""
@@ -114,10 +155,15 @@ class RedisCacheClient(CacheClient):
 
     def set_multi(self, mapping, ttl=0):
         try:
-            self._client.mset(dict((k, pickle.dumps(v)) for k, v in mapping.iteritems()))
+            # a transaction so all values are set in a single round trip
+            # and there is no moment where they exist without a ttl
+            pipe = self._client.pipeline()
             if ttl:
-                for key in mapping:
-                    self._client.expire(key, ttl)
+                for key, val in mapping.iteritems():
+                    pipe.setex(key, ttl, pickle.dumps(val))
+            else:
+                pipe.mset(dict((k, pickle.dumps(v)) for k, v in mapping.iteritems()))
+            pipe.execute()
         except redis.RedisError:
             Logger.get('cache.redis').exception('set_multi(%r, %r) failed', mapping, ttl)
 
@@ -155,6 +201,12 @@ class RedisCacheClient(CacheClient):
         except redis.RedisError:
             Logger.get('cache.redis').exception('delete(%r) failed', key)
 
+    def incr(self, key, delta=1):
+        try:
+            return self._client.incr(key, delta)
+        except redis.RedisError:
+            Logger.get('cache.redis').exception('incr(%r, %r) failed', key, delta)
+
 
 class FileCacheClient(CacheClient):
     """File-based cache with a memcached-like API.
@@ -229,6 +281,29 @@ class FileCacheClient(CacheClient):
             silentremove(path)
         return 1
 
+    def incr(self, key, delta=1):
+        try:
+            f = os.fdopen(os.open(self._getFilePath(key), os.O_RDWR | os.O_CREAT), 'r+b')
+            OSSpecific.lockFile(f, 'LOCK_EX')
+            try:
+                try:
+                    expiry, val = pickle.load(f)
+                except (EOFError, pickle.UnpicklingError):
+                    expiry = val = None
+                if not isinstance(val, (int, long)) or (expiry and time.time() > expiry):
+                    val = 0
+                val += delta
+                f.seek(0)
+                f.truncate()
+                pickle.dump((None, val), f)
+            finally:
+                OSSpecific.lockFile(f, 'LOCK_UN')
+                f.close()
+        except (IOError, OSError):
+            Logger.get('cache.files').exception('Error incrementing value in cache')
+            return None
+        return val
+
 
 class MemcachedCacheClient(CacheClient):
     """Memcached-based cache client"""
@@ -242,6 +317,15 @@ class MemcachedCacheClient(CacheClient):
         import memcache
         self._client = memcache.Client(servers)
 
+    def set_multi(self, mapping, ttl=0):
+        self._client.set_multi(mapping, self.convert_ttl(ttl))
+
+    def get_multi(self, keys):
+        return self._client.get_multi(keys)
+
+    def delete_multi(self, keys):
+        self._client.delete_multi(keys)
+
     def set(self, key, val, ttl=0):
         return self._client.set(key, val, self.convert_ttl(ttl))
 
@@ -251,15 +335,131 @@ class MemcachedCacheClient(CacheClient):
     def delete(self, key):
         return self._client.delete(key)
 
+    def incr(self, key, delta=1):
+        rv = self._client.incr(key, delta)
+        if rv is None:
+            # memcached only increments existing values
+            self._client.add(key, 0)
+            rv = self._client.incr(key, delta)
+        return rv
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+_stats = defaultdict(Counter)
+
+
+def _create_cache_client(backend):
+    if backend == 'memcached':
+        return MemcachedCacheClient(config.MEMCACHED_SERVERS)
+    elif backend == 'redis':
+        return RedisCacheClient(config.REDIS_CACHE_URL)
+    elif backend == 'files':
+        return FileCacheClient(config.CACHE_DIR)
+    else:
+        return NullCacheClient()
+
+
+def get_cache_client():
+    """Get the cache client for the configured backend.
+
+    The client is shared by all threads of the process, so e.g. all
+    Redis connections come from the same connection pool.
+    """
+    backend = config.CACHE_BACKEND
+    key = (backend, tuple(config.MEMCACHED_SERVERS), config.REDIS_CACHE_URL, config.CACHE_DIR)
+    try:
+        return _clients[key]
+    except KeyError:
+        pass
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = _create_cache_client(backend)
+        return client
+
+
+def get_cache_stats():
+    """Get the number of cache hits and misses in this process.
+
+    :return: A dict mapping cache namespaces to dicts containing the
+             number of ``hits``, the number of hits served by the
+             in-process cache (``local_hits``) and the number of
+             ``misses``.
+    """
+    return {namespace: {'hits': stats['hits'], 'local_hits': stats['local_hits'], 'misses': stats['misses']}
+            for namespace, stats in _stats.items()}
+
+
+class LocalCache(object):
+    """A bounded in-process cache with expiring entries.
+
+    When the cache is full, the least recently used entry is removed.
+    The values are stored pickled so callers modifying a value they got
+    from the cache do not affect other threads.
+
+    :param max_size: The maximum number of entries.
+    :param ttl: The maximum number of seconds an entry is kept.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Get a value from the cache or ``None`` if it's not cached."""
+        with self._lock:
+            try:
+                expiry, data = self._data.pop(key)
+            except KeyError:
+                return None
+            if expiry < time.time():
+                return None
+            self._data[key] = expiry, data
+        return pickle.loads(data)
+
+    def set(self, key, val, ttl=0):
+        data = pickle.dumps(val, pickle.HIGHEST_PROTOCOL)
+        expiry = time.time() + (min(ttl, self.ttl) if ttl else self.ttl)
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = expiry, data
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
 
 class GenericCache(object):
     """A simple cache interface that supports various backends.
 
     The backends are accessed through the CacheClient interface.
+
+    Namespaces containing data which is read very often may enable an
+    in-process cache which is checked before the actual cache backend.
+    Since other processes cannot remove entries from it, it should only
+    be used for data where it is acceptable to get outdated values
+    until ``local_ttl`` expired.
+
+    :param namespace: The namespace of the cache keys.
+    :param local_ttl: The number of seconds a value is kept in the
+                      in-process cache; if not set, the in-process
+                      cache is not used.
+    :param local_max_size: The maximum number of entries kept in the
+                           in-process cache.
     """
-    def __init__(self, namespace):
+    def __init__(self, namespace, local_ttl=None, local_max_size=1000):
         self._client = None
         self._namespace = namespace
+        self._local_cache = LocalCache(local_max_size, local_ttl) if local_ttl else None
 
     def __repr__(self):
         return 'GenericCache(%r)' % self._namespace
@@ -269,27 +469,20 @@ class GenericCache(object):
 
         This method must be called before accessing ``self._client``.
         """
-        # Maybe we already have a client in this instance
-        if self._client is not None:
-            return
-        # If not, we might have one from another instance
-        self._client = g.get('generic_cache_client', None)
-
-        if self._client is not None:
-            return
-
-        # If not, create a new one
-        backend = config.CACHE_BACKEND
-        if backend == 'memcached':
-            self._client = MemcachedCacheClient(config.MEMCACHED_SERVERS)
-        elif backend == 'redis':
-            self._client = RedisCacheClient(config.REDIS_CACHE_URL)
-        elif backend == 'files':
-            self._client = FileCacheClient(config.CACHE_DIR)
-        else:
-            self._client = NullCacheClient()
+        self._client = get_cache_client()
+
+    @property
+    def _local(self):
+        # nothing is cached locally if there is no real cache backend
+        if self._local_cache is None or isinstance(self._client, NullCacheClient):
+            return None
+        return self._local_cache
 
-        g.generic_cache_client = self._client
+    def _count(self, hits=0, local_hits=0, misses=0):
+        stats = _stats[self._namespace]
+        stats['hits'] += hits
+        stats['local_hits'] += local_hits
+        stats['misses'] += misses
 
     def _hashKey(self, key):
         if hasattr(self._client, 'hash_key'):
@@ -319,17 +512,32 @@ class GenericCache(object):
         self._connect()
         time = self._processTime(time)
         Logger.get('cache.generic').debug('SET %s %r (%d)', self._namespace, key, time)
-        self._client.set(self._makeKey(key), _NoneValue.replace(val), time)
+        real_key = self._makeKey(key)
+        val = _NoneValue.replace(val)
+        self._client.set(real_key, val, time)
+        if self._local:
+            self._local.set(real_key, val, time)
 
     def set_multi(self, mapping, time=0):
         self._connect()
         time = self._processTime(time)
         mapping = dict(((self._makeKey(key), _NoneValue.replace(val)) for key, val in mapping.iteritems()))
         self._client.set_multi(mapping, time)
+        if self._local:
+            for real_key, val in mapping.iteritems():
+                self._local.set(real_key, val, time)
 
     def get(self, key, default=None):
         self._connect()
-        res = self._client.get(self._makeKey(key))
+        real_key = self._makeKey(key)
+        res = self._local.get(real_key) if self._local else None
+        if res is not None:
+            self._count(hits=1, local_hits=1)
+        else:
+            res = self._client.get(real_key)
+            if res is not None and self._local:
+                self._local.set(real_key, res)
+            self._count(hits=int(res is not None), misses=int(res is None))
         Logger.get('cache.generic').debug('GET %s %r (%s)', self._namespace, key, 'HIT' if res is not None else 'MISS')
         if res is None:
             return default
@@ -338,7 +546,19 @@ class GenericCache(object):
     def get_multi(self, keys, default=None, asdict=True):
         self._connect()
         real_keys = map(self._makeKey, keys)
-        data = self._client.get_multi(real_keys)
+        data = {}
+        if self._local:
+            data = {rk: self._local.get(rk) for rk in real_keys}
+            data = {rk: val for rk, val in data.iteritems() if val is not None}
+        local_hits = len(data)
+        missing = [rk for rk in real_keys if rk not in data]
+        if missing:
+            fetched = {rk: val for rk, val in (self._client.get_multi(missing) or {}).iteritems() if val is not None}
+            if self._local:
+                for real_key, val in fetched.iteritems():
+                    self._local.set(real_key, val)
+            data.update(fetched)
+        self._count(hits=len(data), local_hits=local_hits, misses=len(real_keys) - len(data))
         # Add missing keys
         for real_key in real_keys:
             if real_key not in data:
@@ -350,12 +570,57 @@ class GenericCache(object):
         else:
             return list(sorted_data)
 
+    def get_or_compute(self, key, func, time=0, beta=1):
+        """Get a cached value or compute and cache it.
+
+        To avoid many processes computing the same value at once when
+        the cached value expires, it is refreshed early by one of them
+        with a probability that increases as the expiry time approaches
+        (see "Optimal Probabilistic Cache Stampede Prevention" by
+        Vattani et al.).  Values cached using this method should not be
+        retrieved using :meth:`get`.
+
+        :param key: the key of the cache entry
+        :param func: a callable returning the value to cache
+        :param time: number of seconds or a datetime.timedelta
+        :param beta: values greater than 1 favor earlier refreshes
+        """
+        entry = self.get(key)
+        if isinstance(entry, _ComputedValue) and not entry.needs_refresh(beta):
+            return entry.value
+        time = self._processTime(time)
+        entry = _ComputedValue.compute(func, time)
+        self.set(key, entry, time)
+        return entry.value
+
+    def incr(self, key, delta=1):
+        """Atomically increment a counter.
+
+        Counters which do not exist yet start at 0.  They are never
+        stored in the in-process cache and must only be accessed using
+        this method; use a `delta` of 0 to get the current value.
+
+        :param key: the key of the counter
+        :param delta: the value to add to the counter
+        :return: the new value of the counter, or ``None`` if the cache
+                 backend does not support counters
+        """
+        self._connect()
+        Logger.get('cache.generic').debug('INCR %s %r (%d)', self._namespace, key, delta)
+        return self._client.incr(self._makeKey(key), delta)
+
     def delete(self, key):
         self._connect()
         Logger.get('cache.generic').debug('DEL %s %r', self._namespace, key)
-        self._client.delete(self._makeKey(key))
+        real_key = self._makeKey(key)
+        self._client.delete(real_key)
+        if self._local:
+            self._local.delete(real_key)
 
     def delete_multi(self, keys):
         self._connect()
         keys = map(self._makeKey, keys)
         self._client.delete_multi(keys)
+        if self._local:
+            for key in keys:
+                self._local.delete(key)
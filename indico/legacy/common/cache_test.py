@@ -0,0 +1,158 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+
+import pytest
+
+from indico.legacy.common import cache as cache_module
+from indico.legacy.common.cache import (CacheClient, FileCacheClient, GenericCache, LocalCache, NullCacheClient,
+                                        get_cache_stats)
+
+
+class DictCacheClient(CacheClient):
+    def __init__(self):
+        self.data = {}
+        self.gets = 0
+
+    def set(self, key, val, ttl=0):
+        self.data[key] = val
+
+    def get(self, key):
+        self.gets += 1
+        return self.data.get(key)
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = DictCacheClient()
+    monkeypatch.setattr(cache_module, 'get_cache_client', lambda: client)
+    monkeypatch.setattr(cache_module, '_stats', cache_module.defaultdict(cache_module.Counter))
+    return client
+
+
+def test_local_cache_lru():
+    cache = LocalCache(2, 60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+
+def test_local_cache_expiry(monkeypatch):
+    monkeypatch.setattr(cache_module.time, 'time', lambda: 1000)
+    cache = LocalCache(10, 60)
+    cache.set('a', 1)
+    cache.set('b', 2, ttl=10)
+    monkeypatch.setattr(cache_module.time, 'time', lambda: 1030)
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    monkeypatch.setattr(cache_module.time, 'time', lambda: 1061)
+    assert cache.get('a') is None
+
+
+def test_local_cache_copies():
+    cache = LocalCache(10, 60)
+    value = {'a': 1}
+    cache.set('a', value)
+    value['b'] = 2
+    cache.get('a')['c'] = 3
+    assert cache.get('a') == {'a': 1}
+
+
+def test_generic_cache_local(client):
+    cache = GenericCache('test', local_ttl=60)
+    cache.set('a', 1)
+    cache.set('b', None)
+    assert cache.get('a') == 1
+    assert cache.get('b', 'default') is None
+    assert client.gets == 0
+    client.data.clear()
+    assert cache.get('a') == 1
+    cache.delete('a')
+    assert cache.get('a') is None
+    assert client.gets == 1
+    assert get_cache_stats()['test'] == {'hits': 3, 'local_hits': 3, 'misses': 1}
+
+
+def test_generic_cache_local_multi(client):
+    cache = GenericCache('test', local_ttl=60)
+    other = GenericCache('test')
+    other.set_multi({'a': 1, 'b': 2})
+    cache.set('c', 3)
+    assert cache.get_multi(['a', 'b', 'c', 'd']) == {'a': 1, 'b': 2, 'c': 3, 'd': None}
+    assert client.gets == 3
+    assert cache.get_multi(['a', 'b']) == {'a': 1, 'b': 2}
+    assert client.gets == 3
+    assert get_cache_stats()['test'] == {'hits': 5, 'local_hits': 3, 'misses': 1}
+
+
+def test_generic_cache_no_local(client):
+    cache = GenericCache('test')
+    cache.set('a', 1)
+    assert cache.get('a') == 1
+    assert cache.get('a') == 1
+    assert client.gets == 2
+
+
+def test_get_or_compute(monkeypatch, client):
+    cache = GenericCache('test')
+    calls = []
+
+    def _compute():
+        calls.append(1)
+        return len(calls)
+
+    monkeypatch.setattr(cache_module.time, 'time', lambda: 1000)
+    monkeypatch.setattr(cache_module.random, 'random', lambda: 0.5)
+    assert cache.get_or_compute('a', _compute, 100) == 1
+    assert cache.get_or_compute('a', _compute, 100) == 1
+    # the value was computed instantly so it is never refreshed early
+    monkeypatch.setattr(cache_module.time, 'time', lambda: 1099)
+    assert cache.get_or_compute('a', _compute, 100) == 1
+    assert len(calls) == 1
+
+
+def test_get_or_compute_early_refresh(monkeypatch, client):
+    cache = GenericCache('test')
+    cache.set('a', cache_module._ComputedValue('old', 10, 1100))
+    monkeypatch.setattr(cache_module.random, 'random', lambda: 0.5)
+    # 10 * -log(0.5) ~= 6.9 seconds before the expiry time
+    monkeypatch.setattr(cache_module.time, 'time', lambda: 1090)
+    assert cache.get_or_compute('a', lambda: 'new', 100) == 'old'
+    monkeypatch.setattr(cache_module.time, 'time', lambda: 1095)
+    assert cache.get_or_compute('a', lambda: 'new', 100) == 'new'
+    assert cache.get('a').expiry == 1195
+
+
+def test_file_cache_incr(tmpdir):
+    client = FileCacheClient(tmpdir.strpath)
+    assert client.incr('test.a', 0) == 0
+    assert client.incr('test.a') == 1
+    assert client.incr('test.a', 5) == 6
+    assert client.get('test.a') == 6
+    client.set('test.b', 'foo')
+    assert client.incr('test.b') == 1
+
+
+def test_generic_cache_incr_unsupported(monkeypatch):
+    monkeypatch.setattr(cache_module, 'get_cache_client', lambda: NullCacheClient())
+    assert GenericCache('test').incr('a') is None
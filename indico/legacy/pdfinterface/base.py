@@ -15,8 +15,10 @@
 # along with Indico; if not, see <http://www.gnu.org/licenses/>.
 
 import cgi
+import errno
 import math
 import os
+import shutil
 import subprocess
 import tempfile
 import xml.sax.saxutils as saxutils
@@ -44,6 +46,7 @@ from indico.legacy.common.utils import isStringHTML
 from indico.util import mdx_latex
 from indico.util.fs import chmod_umask
 from indico.util.i18n import _
+from indico.util.latex import get_latex_cache_key, latex_cache_lock
 from indico.util.string import render_markdown, sanitize_for_platypus, to_unicode
 
 
@@ -698,6 +701,10 @@ class LaTeXRuntimeException(Exception):
 class LatexRunner(object):
     """
     Handles the PDF generation from a chosen LaTeX template
+
+    Generated PDFs are cached based on the LaTeX source and the images
+    it includes, so requesting the same document again does not require
+    running LaTeX.
     """
 
     def __init__(self, has_toc=False):
@@ -727,6 +734,35 @@ class LatexRunner(object):
         template_dir = os.path.join(get_root_path('indico'), 'legacy/webinterface/tpls/latex')
         template = tpl_render(os.path.join(template_dir, template_name), kwargs)
 
+        cache_dir = os.path.join(config.CACHE_DIR, 'latex')
+        try:
+            os.mkdir(cache_dir)
+        except OSError as exc:
+            if exc.errno != errno.EEXIST:
+                raise
+        cache_key = get_latex_cache_key(template, self.has_toc)
+        cache_path = os.path.join(cache_dir, cache_key + '.pdf')
+
+        with latex_cache_lock(cache_key):
+            if os.path.exists(cache_path):
+                Logger.get('pdflatex').debug('Using cached PDF %s', cache_path)
+                # update file mtime so it's not deleted during cache cleanup
+                os.utime(cache_path, None)
+                # callers may move or delete the file they get, so they
+                # always get their own copy
+                fd, target_filename = tempfile.mkstemp(prefix='indico-texgen-', suffix='.pdf', dir=config.TEMP_DIR)
+                with os.fdopen(fd, 'wb') as target, open(cache_path, 'rb') as source:
+                    shutil.copyfileobj(source, target)
+                return target_filename
+
+            target_filename = self._compile(template_name, template)
+            tmp_cache_path = cache_path + '.tmp'
+            shutil.copyfile(target_filename, tmp_cache_path)
+            os.rename(tmp_cache_path, cache_path)
+
+        return target_filename
+
+    def _compile(self, template_name, template):
         self._dir = tempfile.mkdtemp(prefix="indico-texgen-", dir=config.TEMP_DIR)
         chmod_umask(self._dir, execute=True)
         source_filename = os.path.join(self._dir, template_name + '.tex')
@@ -39,6 +39,10 @@ class SearchBase(LoggedOnlyService):
 
 
 class SearchUsers(SearchBase):
+    #: The maximum number of users returned; the ones most similar to
+    #: the search criteria are returned first
+    limit = 100
+
     def _process_args(self):
         SearchBase._process_args(self)
         self._surName = self._params.get("surName", "")
@@ -46,6 +50,7 @@ class SearchUsers(SearchBase):
         self._organisation = self._params.get("organisation", "")
         self._email = sanitize_email(self._params.get("email", ""))
         self._exactMatch = self._params.get("exactMatch", False)
+        self._prefixMatch = self._params.get("prefixMatch", False)
         self._confId = self._params.get("conferenceId", None)
         self._event = Event.get(self._confId, is_deleted=False) if self._confId else None
 
@@ -57,13 +62,15 @@ class SearchUsers(SearchBase):
             'organisation': self._organisation,
             'email': self._email
         }
-        users = search_avatars(criteria, self._exactMatch, self._searchExt)
+        users = search_avatars(criteria, self._exactMatch, self._searchExt, prefix=self._prefixMatch,
+                               limit=self.limit)
         if self._event:
             fields = {EventPerson.first_name: self._name,
                       EventPerson.last_name: self._surName,
                       EventPerson.email: self._email,
                       EventPerson.affiliation: self._organisation}
-            criteria = [unaccent_match(col, val, exact=self._exactMatch) for col, val in fields.iteritems()]
+            criteria = [unaccent_match(col, val, exact=self._exactMatch, prefix=self._prefixMatch)
+                        for col, val in fields.iteritems()]
             event_persons = self._event.persons.filter(*criteria).all()
         fossilized_users = fossilize(sorted(users, key=lambda av: (av.getStraightFullName(), av.getEmail())))
         fossilized_event_persons = map(serialize_event_person, event_persons)
@@ -384,6 +384,7 @@ indicoRequest(
                 ${ '{0:.02f}'.format(kpi['occupancy'] * 100) }<small>%</small>
               </span>
               ${inlineContextHelp('Average room occupancy in last 30 days during working hours (8:30 - 12:30 and 13:30 - 17:30, Monday-Friday including holidays). Only active, publically reservable rooms are taken into account.' )}
+              <a href="${ url_for('rooms_admin.export_location_occupancy', location) }">${ _('Export daily occupancy (CSV)') }</a>
             </td>
           </tr>
           <tr><td>&nbsp;</td></tr>
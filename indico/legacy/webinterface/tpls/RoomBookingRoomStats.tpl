@@ -129,6 +129,10 @@
                         <label for="${ key }" class="i-button">${ text }</label>
                     % endfor
                 </div>
+                <div class="group">
+                    <a href="${ url_for('rooms.export_room_occupancy', room, period=period) }" class="i-button icon-file-excel"
+                       title="${ _('Export the daily occupancy as CSV') }"></a>
+                </div>
             </div>
         </div>
         <div class="i-box-content">
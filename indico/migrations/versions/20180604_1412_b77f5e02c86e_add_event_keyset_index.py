@@ -0,0 +1,23 @@
+"""Add index for keyset pagination of events
+
+Revision ID: b77f5e02c86e
+Revises: 813ea74ce8dc
+Create Date: 2018-06-04 14:12:31.482214
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b77f5e02c86e'
+down_revision = '813ea74ce8dc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_events_start_dt_id', 'events', ['start_dt', 'id'], schema='events')
+
+
+def downgrade():
+    op.drop_index('ix_events_start_dt_id', table_name='events', schema='events')
@@ -0,0 +1,25 @@
+"""Add GiST index for reservation occurrence time ranges
+
+Revision ID: e4a6d1c2f9b3
+Revises: b77f5e02c86e
+Create Date: 2018-06-11 10:30:14.204981
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a6d1c2f9b3'
+down_revision = 'b77f5e02c86e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_reservation_occurrences_time_range', 'reservation_occurrences',
+                    [sa.text('tsrange(start_dt, end_dt)')], schema='roombooking', postgresql_using='gist')
+
+
+def downgrade():
+    op.drop_index('ix_reservation_occurrences_time_range', table_name='reservation_occurrences', schema='roombooking')
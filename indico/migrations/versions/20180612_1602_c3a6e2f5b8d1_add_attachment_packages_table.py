@@ -0,0 +1,43 @@
+"""Add attachment packages table
+
+Revision ID: c3a6e2f5b8d1
+Revises: e4a6d1c2f9b3
+Create Date: 2018-06-12 16:02:41.729516
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+from indico.core.db.sqlalchemy import PyIntEnum, UTCDateTime
+from indico.modules.attachments.models.packages import AttachmentPackageState
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3a6e2f5b8d1'
+down_revision = 'e4a6d1c2f9b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('packages',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('event_id', sa.Integer(), nullable=False, index=True),
+                    sa.Column('key', sa.String(), nullable=False, index=True),
+                    sa.Column('file_ids', postgresql.ARRAY(sa.Integer()), nullable=False),
+                    sa.Column('state', PyIntEnum(AttachmentPackageState), nullable=False),
+                    sa.Column('requested_dt', UTCDateTime, nullable=False),
+                    sa.Column('filename', sa.String(), nullable=True),
+                    sa.Column('content_type', sa.String(), nullable=True),
+                    sa.Column('size', sa.BigInteger(), nullable=True),
+                    sa.Column('md5', sa.String(), nullable=True),
+                    sa.Column('storage_backend', sa.String(), nullable=True),
+                    sa.Column('storage_file_id', sa.String(), nullable=True),
+                    sa.ForeignKeyConstraint(['event_id'], ['events.events.id']),
+                    sa.PrimaryKeyConstraint('id'),
+                    schema='attachments')
+
+
+def downgrade():
+    op.drop_table('packages', schema='attachments')
@@ -0,0 +1,34 @@
+"""Add indexes for prefix searches of users
+
+Revision ID: d4b1e6c3a7f2
+Revises: c3a6e2f5b8d1
+Create Date: 2018-06-18 11:45:08.317514
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4b1e6c3a7f2'
+down_revision = 'c3a6e2f5b8d1'
+branch_labels = None
+depends_on = None
+
+
+columns = [('users', 'first_name'),
+           ('users', 'last_name'),
+           ('emails', 'email'),
+           ('affiliations', 'name')]
+
+
+def upgrade():
+    for table, column in columns:
+        op.execute('''
+            CREATE INDEX ix_{table}_{column}_unaccent_prefix ON users.{table}
+            USING btree (indico.indico_unaccent(lower({column})) text_pattern_ops);
+        '''.format(table=table, column=column))
+
+
+def downgrade():
+    for table, column in columns:
+        op.drop_index('ix_{}_{}_unaccent_prefix'.format(table, column), table_name=table, schema='users')
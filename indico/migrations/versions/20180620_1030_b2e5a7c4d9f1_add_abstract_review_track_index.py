@@ -0,0 +1,24 @@
+"""Add index for the track scores of abstracts
+
+Revision ID: b2e5a7c4d9f1
+Revises: d4b1e6c3a7f2
+Create Date: 2018-06-20 10:30:14.527309
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2e5a7c4d9f1'
+down_revision = 'd4b1e6c3a7f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(None, 'abstract_reviews', ['abstract_id', 'track_id'], schema='event_abstracts')
+
+
+def downgrade():
+    op.drop_index('ix_abstract_reviews_abstract_id_track_id', table_name='abstract_reviews',
+                  schema='event_abstracts')
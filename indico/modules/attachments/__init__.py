@@ -33,6 +33,11 @@ logger = Logger.get('attachments')
 connect_log_signals()
 
 
+@signals.import_tasks.connect
+def _import_tasks(sender, **kwargs):
+    import indico.modules.attachments.tasks
+
+
 @signals.users.merged.connect
 def _merge_users(target, source, **kwargs):
     from indico.modules.attachments.models.attachments import Attachment, AttachmentFile
@@ -21,7 +21,9 @@ import itertools
 from indico.modules.attachments.controllers.compat import (RHCompatAttachmentNew, compat_attachment, compat_folder,
                                                            compat_folder_old)
 from indico.modules.attachments.controllers.display.category import RHDownloadCategoryAttachment
-from indico.modules.attachments.controllers.display.event import (RHDownloadEventAttachment,
+from indico.modules.attachments.controllers.display.event import (RHAttachmentPackageDownload,
+                                                                  RHAttachmentPackageStatus,
+                                                                  RHDownloadEventAttachment,
                                                                   RHListEventAttachmentFolder,
                                                                   RHPackageEventAttachmentsDisplay)
 from indico.modules.attachments.controllers.management.category import (RHAddCategoryAttachmentFiles,
@@ -118,6 +120,10 @@ _bp.add_url_rule('/event/<confId>/attachments/package', 'package',
                  RHPackageEventAttachmentsDisplay, methods=('GET', 'POST'))
 _bp.add_url_rule('/event/<confId>/manage/attachments/package', 'package_management',
                  RHPackageEventAttachmentsManagement, methods=('GET', 'POST'))
+_bp.add_url_rule('/event/<confId>/attachments/package/<int:package_id>/', 'package_status',
+                 RHAttachmentPackageStatus)
+_bp.add_url_rule('/event/<confId>/attachments/package/<int:package_id>/download', 'package_download',
+                 RHAttachmentPackageDownload)
 
 
 # Legacy redirects for the old URLs
@@ -17,15 +17,19 @@
 from __future__ import unicode_literals
 
 from flask import redirect, request, session
-from werkzeug.exceptions import Forbidden
+from sqlalchemy.orm import joinedload
+from werkzeug.exceptions import Forbidden, NotFound
 
 from indico.modules.attachments.controllers.display.base import DownloadAttachmentMixin
 from indico.modules.attachments.controllers.event_package import AttachmentPackageMixin
 from indico.modules.attachments.controllers.util import SpecificFolderMixin
+from indico.modules.attachments.models.attachments import AttachmentFile
+from indico.modules.attachments.models.packages import AttachmentPackageState
 from indico.modules.attachments.views import (WPEventFolderDisplay, WPPackageEventAttachmentsDisplay,
                                               WPPackageEventAttachmentsDisplayConference)
 from indico.modules.events.controllers.base import RHDisplayEventBase, RHEventBase
 from indico.modules.events.models.events import EventType
+from indico.web.flask.util import send_file_ranges
 
 
 class RHDownloadEventAttachment(DownloadAttachmentMixin, RHEventBase):
@@ -58,3 +62,47 @@ class RHPackageEventAttachmentsDisplay(AttachmentPackageMixin, RHDisplayEventBas
             return WPPackageEventAttachmentsDisplayConference
         else:
             return WPPackageEventAttachmentsDisplay
+
+
+class RHAttachmentPackageBase(RHDisplayEventBase):
+    normalize_url_spec = {
+        'locators': {
+            lambda self: self.package
+        }
+    }
+
+    @property
+    def wp(self):
+        if self.event.type_ == EventType.conference:
+            return WPPackageEventAttachmentsDisplayConference
+        else:
+            return WPPackageEventAttachmentsDisplay
+
+    def _process_args(self):
+        RHDisplayEventBase._process_args(self)
+        self.package = self.event.attachment_packages.filter_by(id=request.view_args['package_id']).first_or_404()
+
+    def _check_access(self):
+        RHDisplayEventBase._check_access(self)
+        # packages with the same files are shared, so only users who
+        # can access all of them may access the package
+        files = (AttachmentFile.query
+                 .filter(AttachmentFile.id.in_(self.package.file_ids))
+                 .options(joinedload('attachment'))
+                 .all())
+        if not all(f.attachment.can_access(session.user) for f in files):
+            raise Forbidden
+
+
+class RHAttachmentPackageStatus(RHAttachmentPackageBase):
+    def _process(self):
+        return self.wp.render_template('package_status.html', self.event, package=self.package,
+                                       states=AttachmentPackageState)
+
+
+class RHAttachmentPackageDownload(RHAttachmentPackageBase):
+    def _process(self):
+        if self.package.state != AttachmentPackageState.success or self.package.is_expired:
+            raise NotFound
+        return send_file_ranges(self.package.filename, self.package.open(), self.package.content_type,
+                                self.package.size, etag=self.package.md5)
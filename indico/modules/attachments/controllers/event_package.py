@@ -20,7 +20,7 @@ import os
 from collections import OrderedDict
 from datetime import timedelta
 
-from flask import flash, session
+from flask import flash, redirect, session
 from markupsafe import escape
 from sqlalchemy import Date, cast
 
@@ -29,6 +29,8 @@ from indico.core.db.sqlalchemy.links import LinkType
 from indico.modules.attachments.forms import AttachmentPackageForm
 from indico.modules.attachments.models.attachments import Attachment, AttachmentFile, AttachmentType
 from indico.modules.attachments.models.folders import AttachmentFolder
+from indico.modules.attachments.models.packages import AttachmentPackage
+from indico.modules.attachments.tasks import build_attachment_package
 from indico.modules.events.contributions.models.contributions import Contribution
 from indico.modules.events.contributions.models.subcontributions import SubContribution
 from indico.modules.events.sessions.models.sessions import Session
@@ -37,6 +39,7 @@ from indico.util.date_time import format_date, format_time
 from indico.util.fs import secure_filename
 from indico.util.i18n import _
 from indico.util.string import natural_sort_key, to_unicode
+from indico.web.flask.util import url_for
 from indico.web.forms.base import FormDefaults
 
 
@@ -148,7 +151,7 @@ class AttachmentPackageGeneratorMixin(ZipGeneratorMixin):
         segments.extend(self._get_base_path(attachment))
         if not attachment.folder.is_default:
             segments.append(secure_filename(attachment.folder.title, unicode(attachment.folder.id)))
-        segments.append(attachment.file.filename)
+        segments.append(item.filename)
         path = os.path.join(*self._adjust_path_length(filter(None, segments)))
         while path in self.used_filenames:
             # prepend the id if there's a path collision
@@ -182,6 +185,26 @@ class AttachmentPackageGeneratorMixin(ZipGeneratorMixin):
         return reversed(paths)
 
 
+class AttachmentPackageGenerator(AttachmentPackageGeneratorMixin):
+    """Generate the files of a package outside a request handler."""
+
+    def __init__(self, event):
+        self.event = event
+
+    def _iter_items(self, files):
+        return iter(files)
+
+    def get_zip_files(self, files):
+        """Get the entries of a ZIP file containing attachment files.
+
+        :param files: The :class:`.AttachmentFile` objects to include.
+                      They are used as they are, even if a newer version
+                      of their attachment has been uploaded since.
+        :return: A list of entries suitable for :class:`.ZipFileReader`
+        """
+        return list(self._iter_zip_files(files))
+
+
 class AttachmentPackageMixin(AttachmentPackageGeneratorMixin):
     wp = None
     management = False
@@ -190,13 +213,26 @@ class AttachmentPackageMixin(AttachmentPackageGeneratorMixin):
         form = self._prepare_form()
         if form.validate_on_submit():
             attachments = self._filter_attachments(form.data)
-            if attachments:
+            if attachments and form.build_in_background.data:
+                return self._build_package_in_background(attachments)
+            elif attachments:
                 return self._generate_zip_file(attachments)
             else:
                 flash(_('There are no materials matching your criteria.'), 'warning')
 
         return self.wp.render_template('generate_package.html', self.event, form=form, management=self.management)
 
+    def _build_package_in_background(self, attachments):
+        files = [attachment.file for attachment in attachments]
+        key = AttachmentPackage.get_key(self.event, files)
+        package = AttachmentPackage.find_reusable(self.event, key)
+        if package is None:
+            package = AttachmentPackage(event=self.event, key=key, file_ids=[f.id for f in files])
+            db.session.add(package)
+            db.session.commit()
+            build_attachment_package.delay(package)
+        return redirect(url_for('attachments.package_status', package))
+
     def _prepare_form(self):
         form = AttachmentPackageForm(obj=FormDefaults(filter_type='all'))
         form.dates.choices = list(self._iter_event_days())
@@ -157,3 +157,7 @@ class AttachmentPackageForm(IndicoForm):
                                                                          DataRequired()],
                                               description=_('Include materials from sessions/contributions scheduled '
                                                             'on the selected dates'))
+    build_in_background = BooleanField(_('Prepare in background'), widget=SwitchWidget(),
+                                       description=_('Prepare the package on the server and download it once it is '
+                                                     'ready. Use this for big packages; interrupted downloads of '
+                                                     'such a package can be resumed.'))
@@ -0,0 +1,154 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import unicode_literals
+
+import posixpath
+from datetime import timedelta
+from hashlib import sha1
+
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from indico.core.config import config
+from indico.core.db import db
+from indico.core.db.sqlalchemy import PyIntEnum, UTCDateTime
+from indico.core.storage import StoredFileMixin
+from indico.util.date_time import now_utc
+from indico.util.i18n import _
+from indico.util.string import format_repr, return_ascii, strict_unicode
+from indico.util.struct.enum import RichIntEnum
+
+
+class AttachmentPackageState(RichIntEnum):
+    __titles__ = [_("Pending"), _("Running"), _("Success"), _("Failed"), _("Expired")]
+    pending = 0
+    running = 1
+    success = 2
+    failed = 3
+    expired = 4
+
+
+class AttachmentPackage(StoredFileMixin, db.Model):
+    """A material package built in the background."""
+
+    __tablename__ = 'packages'
+    __table_args__ = {'schema': 'attachments'}
+
+    # StoredFileMixin settings
+    add_file_date_column = False
+    file_required = False
+
+    #: The time after which a package is deleted
+    ttl = timedelta(days=1)
+    #: The time after which a package which is still pending or running
+    #: is considered failed, e.g. because the worker building it died
+    build_timeout = timedelta(hours=1)
+
+    #: Entry ID
+    id = db.Column(
+        db.Integer,
+        primary_key=True
+    )
+    #: ID of the event
+    event_id = db.Column(
+        db.Integer,
+        db.ForeignKey('events.events.id'),
+        index=True,
+        nullable=False
+    )
+    #: A hash identifying the files in the package, used to reuse
+    #: packages with the same content
+    key = db.Column(
+        db.String,
+        index=True,
+        nullable=False
+    )
+    #: The IDs of the attachment files in the package
+    file_ids = db.Column(
+        ARRAY(db.Integer),
+        nullable=False
+    )
+    #: The state of the package (a :class:`AttachmentPackageState` member)
+    state = db.Column(
+        PyIntEnum(AttachmentPackageState),
+        default=AttachmentPackageState.pending,
+        nullable=False
+    )
+    #: The date and time the package was requested
+    requested_dt = db.Column(
+        UTCDateTime,
+        default=now_utc,
+        nullable=False
+    )
+
+    #: The Event this package is associated with
+    event = db.relationship(
+        'Event',
+        lazy=True,
+        backref=db.backref(
+            'attachment_packages',
+            lazy='dynamic'
+        )
+    )
+
+    @staticmethod
+    def get_key(event, files):
+        """Get the key identifying a package with the given files."""
+        file_ids = ','.join(map(unicode, sorted(f.id for f in files)))
+        return sha1('{}:{}'.format(event.id, file_ids)).hexdigest().decode('ascii')
+
+    @classmethod
+    def find_reusable(cls, event, key):
+        """Find a package with the same files which is not expired.
+
+        Packages which are still being built are only reused until
+        they reach the build timeout.
+        """
+        now = now_utc()
+        building_states = {AttachmentPackageState.pending, AttachmentPackageState.running}
+        return (event.attachment_packages
+                .filter(cls.key == key,
+                        db.or_(db.and_(cls.state == AttachmentPackageState.success,
+                                       cls.requested_dt > now - cls.ttl),
+                               db.and_(cls.state.in_(building_states),
+                                       cls.requested_dt > now - cls.build_timeout)))
+                .order_by(cls.requested_dt.desc())
+                .first())
+
+    @property
+    def locator(self):
+        return {'confId': self.event_id, 'package_id': self.id}
+
+    @property
+    def is_expired(self):
+        return self.state == AttachmentPackageState.expired or self.requested_dt <= now_utc() - self.ttl
+
+    @property
+    def is_stalled(self):
+        """Whether the package has been building for too long."""
+        return (self.state in {AttachmentPackageState.pending, AttachmentPackageState.running} and
+                self.requested_dt <= now_utc() - self.build_timeout)
+
+    def _build_storage_path(self):
+        path_segments = ['event', strict_unicode(self.event.id), 'packages']
+        self.assign_id()
+        filename = '{}-{}'.format(self.id, self.filename)
+        path = posixpath.join(*(path_segments + [filename]))
+        return config.ATTACHMENT_STORAGE, path
+
+    @return_ascii
+    def __repr__(self):
+        return format_repr(self, 'id', 'event_id', 'state')
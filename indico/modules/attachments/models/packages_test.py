@@ -0,0 +1,56 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+
+from datetime import timedelta
+
+import pytest
+
+from indico.modules.attachments.models.packages import AttachmentPackage, AttachmentPackageState
+from indico.util.date_time import now_utc
+
+
+@pytest.mark.parametrize(('state', 'age', 'stalled'), (
+    (AttachmentPackageState.pending, timedelta(minutes=5), False),
+    (AttachmentPackageState.running, timedelta(minutes=5), False),
+    (AttachmentPackageState.pending, timedelta(hours=2), True),
+    (AttachmentPackageState.running, timedelta(hours=2), True),
+    (AttachmentPackageState.success, timedelta(hours=2), False),
+))
+def test_is_stalled(state, age, stalled):
+    package = AttachmentPackage(state=state, requested_dt=now_utc() - age)
+    assert package.is_stalled == stalled
+
+
+@pytest.mark.parametrize(('state', 'age', 'reusable'), (
+    (AttachmentPackageState.pending, timedelta(minutes=5), True),
+    (AttachmentPackageState.running, timedelta(minutes=5), True),
+    (AttachmentPackageState.success, timedelta(minutes=5), True),
+    (AttachmentPackageState.failed, timedelta(minutes=5), False),
+    (AttachmentPackageState.pending, timedelta(hours=2), False),
+    (AttachmentPackageState.running, timedelta(hours=2), False),
+    (AttachmentPackageState.success, timedelta(hours=2), True),
+    (AttachmentPackageState.success, timedelta(days=2), False),
+))
+def test_find_reusable(db, dummy_event, state, age, reusable):
+    package = AttachmentPackage(event=dummy_event, key='foo', file_ids=[1], state=state,
+                                requested_dt=now_utc() - age)
+    db.session.add(package)
+    db.session.flush()
+    assert AttachmentPackage.find_reusable(dummy_event, 'bar') is None
+    assert (AttachmentPackage.find_reusable(dummy_event, 'foo') == package) == reusable
@@ -0,0 +1,84 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import unicode_literals
+
+from celery.schedules import crontab
+
+from indico.core.celery import celery
+from indico.core.db import db
+from indico.core.storage import StorageReadOnlyError
+from indico.modules.attachments import logger
+from indico.modules.attachments.models.attachments import AttachmentFile
+from indico.modules.attachments.models.packages import AttachmentPackage, AttachmentPackageState
+from indico.util.date_time import now_utc
+from indico.util.zip import ZipFileReader
+
+
+@celery.task(request_context=True)
+def build_attachment_package(package):
+    from indico.modules.attachments.controllers.event_package import AttachmentPackageGenerator
+    package_id = package.id
+    package.state = AttachmentPackageState.running
+    db.session.commit()
+    try:
+        logger.info('Building attachment package: %s', package)
+        files = AttachmentFile.query.filter(AttachmentFile.id.in_(package.file_ids)).order_by(AttachmentFile.id).all()
+        zip_files = AttachmentPackageGenerator(package.event).get_zip_files(files)
+        package.content_type = 'application/zip'
+        package.filename = 'material-{}.zip'.format(package.event_id)
+        package.save(ZipFileReader(zip_files))
+        package.state = AttachmentPackageState.success
+        db.session.commit()
+        logger.info('Building attachment package successful: %s', package)
+    except Exception:
+        # the failed transaction cannot be used anymore, so we need a fresh
+        # copy of the package to mark it as failed
+        db.session.rollback()
+        package = AttachmentPackage.get(package_id)
+        logger.exception('Building attachment package failed: %s', package)
+        package.state = AttachmentPackageState.failed
+        db.session.commit()
+        raise
+
+
+@celery.periodic_task(name='attachment_packages_cleanup', run_every=crontab(minute='45', hour='*/2'))
+def attachment_packages_cleanup():
+    """Clean up expired and stalled attachment packages"""
+    now = now_utc()
+    building_states = {AttachmentPackageState.pending, AttachmentPackageState.running}
+    stalled_dt = now - AttachmentPackage.build_timeout
+    stalled_packages = AttachmentPackage.find_all(AttachmentPackage.state.in_(building_states),
+                                                  AttachmentPackage.requested_dt < stalled_dt)
+    for package in stalled_packages:
+        logger.warning('Attachment package %r has not been built in time', package)
+        package.state = AttachmentPackageState.failed
+    db.session.flush()
+    expired_packages = AttachmentPackage.find_all(AttachmentPackage.state != AttachmentPackageState.expired,
+                                                  AttachmentPackage.requested_dt < now - AttachmentPackage.ttl)
+    logger.info('Removing %d expired attachment packages', len(expired_packages))
+    try:
+        for package in expired_packages:
+            if package.storage_file_id is not None:
+                try:
+                    package.delete()
+                except StorageReadOnlyError:
+                    logger.debug('Could not delete attachment package %r (read-only storage)', package)
+                    continue
+            package.state = AttachmentPackageState.expired
+            logger.info('Removed attachment package %r', package)
+    finally:
+        db.session.commit()
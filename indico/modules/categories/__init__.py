@@ -48,6 +48,28 @@ def _merge_users(target, source, **kwargs):
     CategoryPrincipal.merge_users(target, source, 'category')
 
 
+@signals.category.created.connect
+@signals.category.updated.connect
+@signals.category.moved.connect
+@signals.category.deleted.connect
+def _category_changed(category, **kwargs):
+    from indico.modules.categories.tree import invalidate_category_tree
+    invalidate_category_tree(category_ids={category.id})
+
+
+@signals.event.created.connect
+@signals.event.deleted.connect
+def _event_created_deleted(event, **kwargs):
+    from indico.modules.categories.tree import invalidate_category_tree
+    invalidate_category_tree(event_category_ids={event.category_id})
+
+
+@signals.event.moved.connect
+def _event_moved(event, old_parent, **kwargs):
+    from indico.modules.categories.tree import invalidate_category_tree
+    invalidate_category_tree(event_category_ids={event.category_id, old_parent.id})
+
+
 @signals.menu.items.connect_via('category-management-sidemenu')
 def _sidemenu_items(sender, category, **kwargs):
     yield SideMenuItem('content', _('Content'), url_for('categories.manage_content', category),
@@ -16,6 +16,7 @@
 
 from __future__ import unicode_literals
 
+import hashlib
 from datetime import date, datetime, time, timedelta
 from functools import partial
 from io import BytesIO
@@ -36,8 +37,10 @@ from indico.core.db.sqlalchemy.colors import ColorTuple
 from indico.modules.categories.controllers.base import RHDisplayCategoryBase
 from indico.modules.categories.legacy import XMLCategorySerializer
 from indico.modules.categories.models.categories import Category
-from indico.modules.categories.serialize import (serialize_categories_ical, serialize_category, serialize_category_atom,
-                                                 serialize_category_chain)
+from indico.modules.categories.serialize import (get_categories_ical_events, get_ical_etag, serialize_category,
+                                                 serialize_category_atom, serialize_category_chain,
+                                                 serialize_ical_events)
+from indico.modules.categories.tree import get_category_tree
 from indico.modules.categories.util import get_category_stats, get_upcoming_events, serialize_event_for_json_ld
 from indico.modules.categories.views import WPCategory, WPCategoryStatistics
 from indico.modules.events.models.events import Event
@@ -52,7 +55,7 @@ from indico.util.fs import secure_filename
 from indico.util.i18n import _
 from indico.util.string import to_unicode
 from indico.web.flask.templating import get_template_module
-from indico.web.flask.util import send_file, url_for
+from indico.web.flask.util import ResponseUtil, send_file, url_for
 from indico.web.rh import RH
 from indico.web.util import jsonify_data
 
@@ -157,16 +160,11 @@ class RHCategoryInfo(RHDisplayCategoryBase):
         children_strategy = subqueryload('children')
         children_strategy.load_only('id', 'parent_id', 'title', 'protection_mode', 'event_creation_restricted')
         children_strategy.subqueryload('acl_entries')
-        children_strategy.undefer('deep_children_count')
-        children_strategy.undefer('deep_events_count')
         children_strategy.undefer('has_events')
         return (children_strategy,
                 load_only('id', 'parent_id', 'title', 'protection_mode'),
                 subqueryload('acl_entries'),
-                undefer('deep_children_count'),
-                undefer('deep_events_count'),
-                undefer('has_events'),
-                undefer('chain'))
+                undefer('has_events'))
 
     def _process(self):
         return jsonify_data(flash=False,
@@ -196,8 +194,7 @@ class RHCategorySearch(RH):
         q = request.args['q'].lower()
         query = (Category.query
                  .filter(Category.title_matches(q))
-                 .options(undefer('deep_children_count'), undefer('deep_events_count'), undefer('has_events'),
-                          joinedload('acl_entries')))
+                 .options(undefer('has_events'), joinedload('acl_entries')))
         if session.user:
             # Prefer favorite categories
             query = query.order_by(Category.favorite_of.any(favorite_category_table.c.user_id == session.user.id)
@@ -223,17 +220,14 @@ class RHSubcatInfo(RHDisplayCategoryBase):
     retrieve.
     """
 
-    @classproperty
-    @classmethod
-    def _category_query_options(cls):
-        children_strategy = joinedload('children')
-        children_strategy.load_only('id')
-        children_strategy.undefer('deep_events_count')
-        return children_strategy, load_only('id', 'parent_id', 'protection_mode')
+    _category_query_options = (joinedload('children').load_only('id'), load_only('id', 'parent_id', 'protection_mode'))
 
     def _process(self):
-        event_counts = {c.id: {'value': c.deep_events_count, 'pretty': format_number(c.deep_events_count)}
-                        for c in self.category.children}
+        tree = get_category_tree()
+        event_counts = {}
+        for category in self.category.children:
+            count = tree.get_deep_events_count(category.id)
+            event_counts[category.id] = {'value': count, 'pretty': format_number(count)}
         return jsonify_data(flash=False, event_counts=event_counts)
 
 
@@ -425,9 +419,16 @@ class RHShowPastEventsInCategory(RHShowEventsInCategoryBase):
 class RHExportCategoryICAL(RHDisplayCategoryBase):
     def _process(self):
         filename = '{}-category.ics'.format(secure_filename(self.category.title, str(self.category.id)))
-        buf = serialize_categories_ical([self.category.id], session.user,
-                                        Event.end_dt >= (now_utc() - timedelta(weeks=4)))
-        return send_file(filename, buf, 'text/calendar')
+        entries = get_categories_ical_events([self.category.id], session.user,
+                                             Event.end_dt >= (now_utc() - timedelta(weeks=4)))
+        response = ResponseUtil()
+        response.etag = get_ical_etag(entries)
+        response.weak_etag = True
+        if response.not_modified:
+            return response.make_not_modified()
+        rv = send_file(filename, serialize_ical_events(entries), 'text/calendar')
+        rv.set_etag(response.etag, weak=True)
+        return rv
 
 
 class RHExportCategoryAtom(RHDisplayCategoryBase):
@@ -437,7 +438,9 @@ class RHExportCategoryAtom(RHDisplayCategoryBase):
                                       url_for(request.endpoint, self.category, _external=True),
                                       session.user,
                                       Event.end_dt >= now_utc())
-        return send_file(filename, buf, 'application/atom+xml')
+        rv = send_file(filename, buf, 'application/atom+xml')
+        rv.set_etag(hashlib.md5(buf.getvalue()).hexdigest())
+        return rv.make_conditional(request)
 
 
 class RHXMLExportCategoryInfo(RH):
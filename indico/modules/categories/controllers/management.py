@@ -48,12 +48,7 @@ MAX_CATEGORY_LOGO_DIMENSIONS = (200, 200)
 
 
 class RHManageCategoryContent(RHManageCategoryBase):
-    @property
-    def _category_query_options(self):
-        children_strategy = joinedload('children')
-        children_strategy.undefer('deep_children_count')
-        children_strategy.undefer('deep_events_count')
-        return children_strategy,
+    _category_query_options = (joinedload('children'),)
 
     def _process(self):
         page = request.args.get('page', '1')
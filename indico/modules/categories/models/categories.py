@@ -22,7 +22,7 @@ from sqlalchemy.dialects.postgresql import ARRAY, JSON, array
 from sqlalchemy.event import listens_for
 from sqlalchemy.ext.declarative import declared_attr
 from sqlalchemy.ext.hybrid import hybrid_property
-from sqlalchemy.orm import column_property
+from sqlalchemy.orm import column_property, joinedload
 from sqlalchemy.sql import exists, func, literal, select
 
 from indico.core import signals
@@ -266,6 +266,8 @@ class Category(SearchableTitleMixin, DescriptionMixin, ProtectionManagersMixin,
 
     @property
     def is_empty(self):
+        # this guards the deletion of categories, so it must not rely
+        # on the (possibly outdated) category tree
         return not self.deep_children_count and not self.deep_events_count
 
     @property
@@ -396,6 +398,14 @@ class Category(SearchableTitleMixin, DescriptionMixin, ProtectionManagersMixin,
         cte_query = cte_query.union_all(parent_query)
         return Category.query.join(cte_query, Category.id == cte_query.c.id).order_by(cte_query.c.level.desc())
 
+    @classmethod
+    def preload_protection_data(cls, categories):
+        """Load the chains of the categories including their ACLs at once."""
+        category_ids = {c.id for c in categories if c.id is not None}
+        if not category_ids:
+            return []
+        return cls._get_chain_query(cls.id.in_(category_ids)).options(joinedload('acl_entries')).all()
+
     @property
     def chain_query(self):
         """Get a query object for the category chain.
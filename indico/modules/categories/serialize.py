@@ -16,6 +16,8 @@
 
 from __future__ import unicode_literals
 
+import hashlib
+from datetime import timedelta
 from io import BytesIO
 from itertools import ifilter
 
@@ -24,26 +26,85 @@ from flask import session
 from lxml import html
 from lxml.etree import ParserError
 from pyatom import AtomFeed
-from sqlalchemy.orm import joinedload, load_only, subqueryload, undefer
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import joinedload, load_only, subqueryload
+from sqlalchemy.sql import select
 from werkzeug.urls import url_parse
 
 from indico.core.config import config
-from indico.modules.categories import Category
+from indico.core.db import db
+from indico.legacy.common.cache import GenericCache
+from indico.modules.categories.tree import get_category_tree
 from indico.modules.events import Event
 from indico.util.date_time import now_utc
 
 
-def serialize_categories_ical(category_ids, user, event_filter=True, event_filter_fn=None, update_query=None):
-    """Export the events in a category to iCal
+_ical_cache = GenericCache('category-ical-events')
 
-    :param category_ids: Category IDs to export
-    :param user: The user who needs to be able to access the events
-    :param event_filter: A SQLalchemy criterion to restrict which
-                         events will be returned.  Usually something
-                         involving the start/end date of the event.
-    :param event_filter_fn: A callable that determines which events to include (after querying)
-    :param update_query: A callable that can update the query used to retrieve the events.
-                         Must return the updated query object.
+
+def _get_ical_data_hash():
+    """Get an SQL expression hashing the iCal data of an event.
+
+    This only covers the data which is not loaded anyway when exporting
+    events, i.e. the description and the speakers.
+    """
+    from indico.modules.events.models.persons import EventPerson, EventPersonLink
+    person_data = db.func.concat_ws('\x1f', EventPersonLink._first_name, EventPersonLink._last_name,
+                                    EventPersonLink._title, EventPersonLink._affiliation, EventPerson.first_name,
+                                    EventPerson.last_name, EventPerson._title, EventPerson.affiliation)
+    persons = (select([db.func.string_agg(person_data, aggregate_order_by('\x1e', EventPersonLink.id))])
+               .where((EventPersonLink.event_id == Event.id) & (EventPersonLink.person_id == EventPerson.id))
+               .correlate(Event)
+               .as_scalar())
+    return db.func.md5(db.func.concat(Event.description, '\x1e', persons))
+
+
+def _get_ical_cache_key(event, data_hash):
+    data = (data_hash, event.title, event.start_dt, event.end_dt, event.venue_name, event.room_name, config.BASE_URL)
+    return '{}:{}'.format(event.id, hashlib.sha1(repr(data)).hexdigest())
+
+
+def _serialize_event_ical(event):
+    """Serialize an event as a VEVENT component.
+
+    The DTSTAMP property is not included since it depends on the time
+    when the calendar is generated.
+    """
+    location = ('{} ({})'.format(event.room_name, event.venue_name)
+                if event.venue_name and event.room_name
+                else (event.venue_name or event.room_name))
+    cal_event = ical.Event()
+    cal_event.add('uid', u'indico-event-{}@{}'.format(event.id, url_parse(config.BASE_URL).host))
+    cal_event.add('dtstart', event.start_dt)
+    cal_event.add('dtend', event.end_dt)
+    cal_event.add('url', event.external_url)
+    cal_event.add('summary', event.title)
+    cal_event.add('location', location)
+    description = []
+    if event.person_links:
+        speakers = [u'{} ({})'.format(x.full_name, x.affiliation) if x.affiliation else x.full_name
+                    for x in event.person_links]
+        description.append(u'Speakers: {}'.format(u', '.join(speakers)))
+
+    if event.description:
+        desc_text = unicode(event.description) or u'<p/>'  # get rid of RichMarkup
+        try:
+            description.append(unicode(html.fromstring(desc_text).text_content()))
+        except ParserError:
+            # this happens e.g. if desc_text contains only a html comment
+            pass
+    description.append(event.external_url)
+    cal_event.add('description', u'\n'.join(description))
+    return cal_event.to_ical()
+
+
+def get_categories_ical_events(category_ids, user, event_filter=True, event_filter_fn=None, update_query=None):
+    """Get the events to include in an iCal export of categories.
+
+    The arguments are the same as for :func:`serialize_categories_ical`.
+
+    :return: A list of ``(key, event)`` tuples, where `key` identifies
+             the current iCal data of the event.
     """
     own_room_strategy = joinedload('own_room')
     own_room_strategy.load_only('building', 'floor', 'number', 'name')
@@ -53,61 +114,89 @@ def serialize_categories_ical(category_ids, user, event_filter=True, event_filte
              .filter(Event.category_chain_overlaps(category_ids),
                      ~Event.is_deleted,
                      event_filter)
-             .options(load_only('id', 'category_id', 'start_dt', 'end_dt', 'title', 'description', 'own_venue_name',
+             .options(load_only('id', 'category_id', 'start_dt', 'end_dt', 'title', 'own_venue_name',
                                 'own_room_name', 'protection_mode', 'access_key'),
                       subqueryload('acl_entries'),
-                      joinedload('person_links'),
                       own_room_strategy,
                       own_venue_strategy)
+             .add_columns(_get_ical_data_hash())
              .order_by(Event.start_dt))
     if update_query:
         query = update_query(query)
-    it = iter(query)
+    rows = query.all()
+    data_hashes = {event.id: data_hash for event, data_hash in rows}
+    it = (event for event, __ in rows)
     if event_filter_fn:
         it = ifilter(event_filter_fn, it)
-    events = list(it)
-    # make sure the parent categories are in sqlalchemy's identity cache.
-    # this avoids query spam from `protection_parent` lookups
-    _parent_categs = (Category._get_chain_query(Category.id.in_({e.category_id for e in events}))
-                      .options(load_only('id', 'parent_id', 'protection_mode'),
-                               joinedload('acl_entries'))
-                      .all())
+    return [(_get_ical_cache_key(event, data_hashes[event.id]), event)
+            for event in Event.filter_accessible(it, user)]
+
+
+def get_ical_etag(entries):
+    """Get an ETag for the iCal export of some events.
+
+    Since the DTSTAMP of the events changes with every export, the
+    ETag should be used as a weak one.
+
+    :param entries: A list returned by :func:`get_categories_ical_events`
+    """
+    return hashlib.sha1(b'\n'.join(key.encode('ascii') for key, __ in entries)).hexdigest()
+
+
+def serialize_ical_events(entries):
+    """Export events to iCal.
+
+    The VEVENT components of the events are cached, using a hash of
+    the exported data so changes to an event are picked up without
+    explicitly invalidating the cache.  Only events which are not in
+    the cache yet have their description and speakers loaded.
+
+    :param entries: A list returned by :func:`get_categories_ical_events`
+    """
+    components = _ical_cache.get_multi([key for key, __ in entries])
+    missing = [(key, event) for key, event in entries if components[key] is None]
+    if missing:
+        # load the data needed to serialize the events which are not cached yet
+        (Event.query
+         .filter(Event.id.in_({event.id for __, event in missing}))
+         .options(load_only('id', 'description'), joinedload('person_links').joinedload('person'))
+         .all())
+        new_components = {key: _serialize_event_ical(event) for key, event in missing}
+        _ical_cache.set_multi(new_components, timedelta(days=1))
+        components.update(new_components)
+
     cal = ical.Calendar()
     cal.add('version', '2.0')
     cal.add('prodid', '-//CERN//INDICO//EN')
+    # the components are inserted between the calendar properties and
+    # its END line, each of them with the current DTSTAMP
+    header, footer = cal.to_ical().rsplit(b'END:VCALENDAR', 1)
+    dtstamp = b'DTSTAMP:' + ical.vDatetime(now_utc(False)).to_ical() + b'\r\n'
+    buf = BytesIO()
+    buf.write(header)
+    for key, __ in entries:
+        begin, rest = components[key].split(b'\r\n', 1)
+        buf.write(begin + b'\r\n' + dtstamp + rest)
+    buf.write(b'END:VCALENDAR' + footer)
+    buf.seek(0)
+    return buf
 
-    now = now_utc(False)
-    for event in events:
-        if not event.can_access(user):
-            continue
-        location = ('{} ({})'.format(event.room_name, event.venue_name)
-                    if event.venue_name and event.room_name
-                    else (event.venue_name or event.room_name))
-        cal_event = ical.Event()
-        cal_event.add('uid', u'indico-event-{}@{}'.format(event.id, url_parse(config.BASE_URL).host))
-        cal_event.add('dtstamp', now)
-        cal_event.add('dtstart', event.start_dt)
-        cal_event.add('dtend', event.end_dt)
-        cal_event.add('url', event.external_url)
-        cal_event.add('summary', event.title)
-        cal_event.add('location', location)
-        description = []
-        if event.person_links:
-            speakers = [u'{} ({})'.format(x.full_name, x.affiliation) if x.affiliation else x.full_name
-                        for x in event.person_links]
-            description.append(u'Speakers: {}'.format(u', '.join(speakers)))
-
-        if event.description:
-            desc_text = unicode(event.description) or u'<p/>'  # get rid of RichMarkup
-            try:
-                description.append(unicode(html.fromstring(desc_text).text_content()))
-            except ParserError:
-                # this happens e.g. if desc_text contains only a html comment
-                pass
-        description.append(event.external_url)
-        cal_event.add('description', u'\n'.join(description))
-        cal.add_component(cal_event)
-    return BytesIO(cal.to_ical())
+
+def serialize_categories_ical(category_ids, user, event_filter=True, event_filter_fn=None, update_query=None):
+    """Export the events in a category to iCal
+
+    :param category_ids: Category IDs to export
+    :param user: The user who needs to be able to access the events
+    :param event_filter: A SQLalchemy criterion to restrict which
+                         events will be returned.  Usually something
+                         involving the start/end date of the event.
+    :param event_filter_fn: A callable that determines which events to include (after querying)
+    :param update_query: A callable that can update the query used to retrieve the events.
+                         Must return the updated query object.
+    """
+    return serialize_ical_events(get_categories_ical_events(category_ids, user, event_filter=event_filter,
+                                                            event_filter_fn=event_filter_fn,
+                                                            update_query=update_query))
 
 
 def serialize_category_atom(category, url, user, event_filter):
@@ -128,7 +217,7 @@ def serialize_category_atom(category, url, user, event_filter):
                                 'access_key'),
                       subqueryload('acl_entries'))
              .order_by(Event.start_dt))
-    events = [e for e in query if e.can_access(user)]
+    events = Event.filter_accessible(query, user)
 
     feed = AtomFeed(feed_url=url, title='Indico Feed [{}]'.format(category.title))
     for event in events:
@@ -140,13 +229,14 @@ def serialize_category_atom(category, url, user, event_filter):
 
 
 def serialize_category(category, with_favorite=False, with_path=False, parent_path=None, child_path=None):
+    tree = get_category_tree()
     data = {
         'id': category.id,
         'title': category.title,
         'is_protected': category.is_protected,
         'has_events': category.has_events,
-        'deep_category_count': category.deep_children_count,
-        'deep_event_count': category.deep_events_count,
+        'deep_category_count': tree.get_deep_children_count(category.id),
+        'deep_event_count': tree.get_deep_events_count(category.id),
         'can_access': category.can_access(session.user),
         'can_create_events': category.can_create_events(session.user),
     }
@@ -161,7 +251,7 @@ def serialize_category(category, with_favorite=False, with_path=False, parent_pa
             data['path'] = parent_path[:]
             data['path'].append({'id': category.id, 'title': category.title})
         else:
-            data['path'] = category.chain
+            data['path'] = tree.get_chain(category.id)
         data['parent_path'] = data['path'][:-1]
     if with_favorite:
         data['is_favorite'] = session.user and category in session.user.favorite_categories
@@ -174,8 +264,6 @@ def serialize_category_chain(category, include_children=False, include_parents=F
         data['subcategories'] = [serialize_category(c, with_path=True, parent_path=data['category']['path'])
                                  for c in category.children]
     if include_parents:
-        query = (category.parent_chain_query
-                 .options(undefer('deep_events_count'), undefer('deep_children_count')))
         data['supercategories'] = [serialize_category(c, with_path=True, child_path=data['category']['path'])
-                                   for c in query]
+                                   for c in category.parent_chain_query]
     return data
@@ -0,0 +1,103 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+
+from datetime import datetime, timedelta
+
+import icalendar as ical
+import pytest
+import pytz
+
+from indico.modules.categories import serialize
+from indico.modules.categories.serialize import get_categories_ical_events, serialize_categories_ical
+from indico.modules.events.models.persons import EventPerson, EventPersonLink
+
+
+@pytest.fixture
+def ical_events(create_event, dummy_category):
+    start_dt = pytz.utc.localize(datetime(2018, 6, 18, 8, 0))
+    return [create_event(i, title='Event {}'.format(i), start_dt=start_dt + timedelta(days=i),
+                         end_dt=start_dt + timedelta(days=i, hours=1), category=dummy_category)
+            for i in xrange(1, 4)]
+
+
+@pytest.fixture
+def speaker(db, ical_events):
+    event = ical_events[0]
+    person = EventPerson(event=event, first_name='Guinea', last_name='Pig', email='pig@example.com')
+    event.person_links.append(EventPersonLink(person=person))
+    db.session.flush()
+    return person
+
+
+def _get_vevents(category):
+    cal = ical.Calendar.from_ical(serialize_categories_ical([category.id], None).read())
+    return {int(vevent['uid'].split('-')[2].split('@')[0]): vevent for vevent in cal.walk('VEVENT')}
+
+
+def test_ical_cache(freeze_time, mocker, dummy_category, ical_events):
+    freeze_time(datetime(2018, 6, 1, 12, 0))
+    serialize_spy = mocker.spy(serialize, '_serialize_event_ical')
+    vevents = _get_vevents(dummy_category)
+    assert serialize_spy.call_count == 3
+    assert ({id_: vevent.to_ical() for id_, vevent in _get_vevents(dummy_category).iteritems()} ==
+            {id_: vevent.to_ical() for id_, vevent in vevents.iteritems()})
+    assert serialize_spy.call_count == 3
+    # only the modified event needs to be serialized again
+    ical_events[0].title = 'Changed'
+    vevents = _get_vevents(dummy_category)
+    assert serialize_spy.call_count == 4
+    assert vevents[1]['summary'] == 'Changed'
+    assert vevents[2]['summary'] == 'Event 2'
+
+
+@pytest.mark.parametrize('change', ('title', 'description', 'speaker_added', 'speaker_changed', 'speaker_link'))
+def test_ical_cache_key(db, dummy_category, ical_events, speaker, change):
+    event = ical_events[0]
+    keys = dict(get_categories_ical_events([dummy_category.id], None))
+    if change == 'title':
+        event.title = 'Changed'
+    elif change == 'description':
+        event.description = 'Changed'
+    elif change == 'speaker_added':
+        person = EventPerson(event=event, first_name='Another', last_name='Pig', email='pig2@example.com')
+        event.person_links.append(EventPersonLink(person=person))
+    elif change == 'speaker_changed':
+        speaker.affiliation = 'CERN'
+    elif change == 'speaker_link':
+        # the data of a person may be overridden for a specific event
+        speaker.event_links[0].last_name = 'Piggy'
+    db.session.flush()
+    new_keys = dict(get_categories_ical_events([dummy_category.id], None))
+    changed = {event.id for key, event in new_keys.iteritems() if key not in keys}
+    assert changed == {event.id}
+    assert len(new_keys) == 3
+
+
+def test_ical_dtstamp(freeze_time, mocker, dummy_category, ical_events, speaker):
+    serialize_spy = mocker.spy(serialize, '_serialize_event_ical')
+    freeze_time(datetime(2018, 6, 1, 12, 0))
+    vevents = _get_vevents(dummy_category)
+    assert set(vevents) == {1, 2, 3}
+    assert 'Guinea Pig' in vevents[1]['description']
+    assert {vevent['dtstamp'].dt for vevent in vevents.itervalues()} == {pytz.utc.localize(datetime(2018, 6, 1, 12, 0))}
+    # cached components get the current DTSTAMP as well
+    freeze_time(datetime(2018, 6, 2, 12, 0))
+    vevents = _get_vevents(dummy_category)
+    assert serialize_spy.call_count == 3
+    assert {vevent['dtstamp'].dt for vevent in vevents.itervalues()} == {pytz.utc.localize(datetime(2018, 6, 2, 12, 0))}
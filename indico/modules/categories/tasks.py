@@ -19,43 +19,89 @@ from __future__ import unicode_literals
 from datetime import timedelta
 
 from celery.schedules import crontab
+from sqlalchemy.orm import subqueryload
 
 from indico.core.celery import celery
 from indico.core.config import config
 from indico.core.db import db
 from indico.modules.categories import Category, logger
+from indico.modules.categories.tree import get_category_tree
 from indico.modules.users import User, UserSetting
 from indico.modules.users.models.suggestions import SuggestedCategory
 from indico.modules.users.util import get_related_categories
 from indico.util.date_time import now_utc
-from indico.util.suggestions import get_category_scores
+from indico.util.string import crc32
+from indico.util.struct.iterables import grouper
+from indico.util.suggestions import get_attended_event_ids, get_category_scores
 
 
 # Minimum score for a category to be suggested
 SUGGESTION_MIN_SCORE = 0.25
+# Number of users whose suggestions are updated in one transaction
+SUGGESTION_BATCH_SIZE = 100
+
+
+def _get_attendance_signature(event_ids):
+    """Get a value which changes whenever a user's scores may change.
+
+    Besides the attended events this covers the attended events which
+    have not started yet since they give the category a bonus as long
+    as they are in the future.  The scores also depend on the time
+    since the last attended event and on the events created in the
+    category meanwhile, so the current week is included as well to
+    rescore every user at least once a week.
+    """
+    upcoming_ids = set()
+    now = now_utc()
+    if event_ids:
+        from indico.modules.events import Event
+        upcoming_ids = {id_ for id_, in db.session.query(Event.id).filter(Event.id.in_(event_ids),
+                                                                          Event.start_dt > now)}
+    year, week = now.isocalendar()[:2]
+    return crc32('{}-{}|{}|{}'.format(year, week, ','.join(map(unicode, sorted(event_ids))),
+                                      ','.join(map(unicode, sorted(upcoming_ids)))))
+
+
+def _update_suggestions(user, category_scores, related, disabled_ids):
+    tree = get_category_tree()
+    existing = {x.category: x for x in user.suggested_categories}
+    for category, score in category_scores.iteritems():
+        if score < SUGGESTION_MIN_SCORE:
+            continue
+        if (category in related or category.is_deleted or
+                any(entry['id'] in disabled_ids for entry in tree.get_chain(category.id))):
+            continue
+        logger.debug('Suggesting %s with score %.03f for %s', category, score, user)
+        suggestion = existing.get(category) or SuggestedCategory(category=category, user=user)
+        suggestion.score = score
 
 
 @celery.periodic_task(name='category_suggestions', run_every=crontab(minute='0', hour='7'))
 def category_suggestions():
-    users = (User.query
+    query = (db.session.query(User.id)
              .filter(~User.is_deleted,
                      User._all_settings.any(db.and_(UserSetting.module == 'users',
                                                     UserSetting.name == 'suggest_categories',
-                                                    db.cast(UserSetting.value, db.String) == 'true'))))
-    for user in users:
-        existing = {x.category: x for x in user.suggested_categories}
-        related = set(get_related_categories(user, detailed=False))
-        for category, score in get_category_scores(user).iteritems():
-            if score < SUGGESTION_MIN_SCORE:
-                continue
-            if (category in related or category.is_deleted or category.suggestions_disabled or
-                    any(p.suggestions_disabled for p in category.parent_chain_query)):
-                continue
-            logger.debug('Suggesting %s with score %.03f for %s', category, score, user)
-            suggestion = existing.get(category) or SuggestedCategory(category=category, user=user)
-            suggestion.score = score
-        user.settings.set('suggest_categories', False)
+                                                    db.cast(UserSetting.value, db.String) == 'true')))
+             .order_by(User.id))
+    user_ids = [id_ for id_, in query]
+    disabled_ids = {id_ for id_, in db.session.query(Category.id).filter(Category.suggestions_disabled)}
+    skipped = 0
+    for batch in grouper(user_ids, SUGGESTION_BATCH_SIZE, skip_missing=True):
+        users = User.query.filter(User.id.in_(batch)).options(subqueryload('favorite_categories')).all()
+        for user in users:
+            event_ids = get_attended_event_ids(user)
+            signature = _get_attendance_signature(event_ids)
+            if signature == user.settings.get('suggestions_attendance'):
+                # nothing changed since the suggestions have been updated the last time
+                skipped += 1
+            else:
+                related = set(get_related_categories(user, detailed=False))
+                _update_suggestions(user, get_category_scores(user, event_ids=event_ids), related, disabled_ids)
+                user.settings.set('suggestions_attendance', signature)
+            user.settings.set('suggest_categories', False)
         db.session.commit()
+    logger.info('Updated category suggestions for %d users (%d unchanged)', len(user_ids) - skipped, skipped)
 
 
 @celery.periodic_task(name='category_cleanup', run_every=crontab(minute='0', hour='5'))
@@ -0,0 +1,31 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+
+from datetime import datetime
+
+from indico.modules.categories.tasks import _get_attendance_signature
+
+
+def test_attendance_signature_week(freeze_time):
+    freeze_time(datetime(2018, 6, 18, 8, 0))  # monday
+    signature = _get_attendance_signature(set())
+    freeze_time(datetime(2018, 6, 24, 20, 0))  # sunday
+    assert _get_attendance_signature(set()) == signature
+    freeze_time(datetime(2018, 6, 25, 8, 0))
+    assert _get_attendance_signature(set()) != signature
@@ -0,0 +1,454 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+"""In-memory copy of the category tree.
+
+The ``chain``, ``chain_titles``, ``effective_protection_mode``,
+``deep_children_count`` and ``deep_events_count`` column properties of
+:class:`.Category` are computed using recursive queries every time they
+are loaded.  :func:`get_category_tree` returns a process-wide snapshot
+of the whole tree which provides the same data without querying the
+database once it has been built.
+
+Changes are applied incrementally: :func:`invalidate_category_tree`
+marks categories (or their event counts) as changed, and only those are
+reloaded the next time the tree is used.  Until the transaction has been
+committed, the session making the changes uses a private copy of the
+tree.  After the commit, the tree version (a counter in the cache) is
+incremented atomically and the ids of the changed categories are stored
+for the new version, so other processes can update their copy of the
+tree instead of rebuilding it.  When a shared cache backend such as
+Redis is used, the data of a freshly built tree is stored there as well
+so only one process needs to build it.
+
+If the cache backend does not support counters, there is no way to know
+about changes made by other processes, so the tree is built from the
+database whenever it is needed (but at most once per request).
+"""
+
+from __future__ import unicode_literals
+
+import threading
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+
+from flask import g, has_request_context
+from sqlalchemy.event import listens_for
+from sqlalchemy.orm import Session
+
+from indico.core.db import db
+from indico.core.db.sqlalchemy.protection import ProtectionMode
+from indico.legacy.common.cache import GenericCache
+from indico.modules.categories.models.categories import Category
+from indico.util.date_time import now_utc
+
+
+#: Maximum number of published changes applied to an outdated tree
+#: before it is rebuilt instead
+MAX_CHANGES = 50
+
+_cache = GenericCache('category-tree')
+_lock = threading.RLock()
+_tree = None
+
+_CategoryNode = namedtuple('_CategoryNode', ('id', 'parent_id', 'title', 'protection_mode', 'is_deleted'))
+
+
+def _query_nodes(category_ids=None):
+    query = db.session.query(Category.id, Category.parent_id, Category.title, Category.protection_mode,
+                             Category.is_deleted)
+    if category_ids is not None:
+        query = query.filter(Category.id.in_(category_ids))
+    return [_CategoryNode(*row) for row in query]
+
+
+def _query_event_counts(category_ids=None):
+    from indico.modules.events import Event
+    query = (db.session.query(Event.category_id, db.func.count(Event.id))
+             .filter(~Event.is_deleted, Event.category_id.isnot(None))
+             .group_by(Event.category_id))
+    if category_ids is not None:
+        query = query.filter(Event.category_id.in_(category_ids))
+    return dict(query)
+
+
+class CategoryTree(object):
+    """A snapshot of the category tree.
+
+    Derived data such as the chain of a category or its effective
+    protection mode is computed lazily and kept until one of the
+    categories it depends on is invalidated.
+
+    :param nodes: A list of ``_CategoryNode`` tuples for all categories.
+    :param event_counts: A dict mapping category ids to the number of
+                         (not deleted) events in them.
+    :param version: The version of the tree in the shared cache.
+    """
+
+    #: The time after which the tree is rebuilt even if no change has
+    #: been announced, in case an update bypassed the signals
+    max_age = timedelta(hours=1)
+
+    def __init__(self, nodes, event_counts, version=None):
+        self.version = version
+        self.built_dt = now_utc()
+        self._nodes = {}
+        self._children = defaultdict(set)
+        self._event_counts = dict(event_counts)
+        self._chains = {}
+        self._protection_modes = {}
+        self._deep_counts = {}
+        self._changed_categories = set()
+        self._changed_event_counts = set()
+        self._lock = threading.RLock()
+        for node in nodes:
+            self._add_node(node)
+
+    @classmethod
+    def build(cls, version=None):
+        """Build a tree using the current state of the database."""
+        return cls(_query_nodes(), _query_event_counts(), version)
+
+    def __repr__(self):
+        return '<CategoryTree({}, {})>'.format(self.version, len(self._nodes))
+
+    def copy(self):
+        """Create an independent copy of the tree."""
+        with self._lock:
+            tree = CategoryTree((), self._event_counts, self.version)
+            tree.built_dt = self.built_dt
+            tree._nodes = dict(self._nodes)
+            tree._children = defaultdict(set, {id_: set(children) for id_, children in self._children.iteritems()})
+            tree._chains = dict(self._chains)
+            tree._protection_modes = dict(self._protection_modes)
+            tree._deep_counts = dict(self._deep_counts)
+            tree._changed_categories = set(self._changed_categories)
+            tree._changed_event_counts = set(self._changed_event_counts)
+            return tree
+
+    @property
+    def is_expired(self):
+        return now_utc() - self.built_dt > self.max_age
+
+    def get_data(self):
+        """Get the data needed to build a copy of the tree."""
+        with self._lock:
+            self._refresh()
+            return self._nodes.values(), dict(self._event_counts)
+
+    def invalidate(self, category_ids=(), event_category_ids=()):
+        """Mark parts of the tree as changed.
+
+        The affected data is reloaded the next time the tree is used.
+
+        :param category_ids: Categories which have been created,
+                             modified, moved or deleted.
+        :param event_category_ids: Categories in which events have been
+                                   created or deleted.
+        """
+        with self._lock:
+            self._changed_categories.update(category_ids)
+            self._changed_event_counts.update(event_category_ids)
+
+    def get_chain(self, category_id):
+        """Get the chain of the category.
+
+        This corresponds to :attr:`.Category.chain`: A list of dicts
+        containing the ``id`` and ``title`` of each category from the
+        root category down to the given category.
+        """
+        with self._lock:
+            return [dict(entry) for entry in self._get_chain(category_id)]
+
+    def get_chain_titles(self, category_id):
+        """Get the titles in the chain of the category.
+
+        This corresponds to :attr:`.Category.chain_titles`.
+        """
+        with self._lock:
+            return [entry['title'] for entry in self._get_chain(category_id)]
+
+    def get_effective_protection_mode(self, category_id):
+        """Get the protection mode of the category.
+
+        This corresponds to :attr:`.Category.effective_protection_mode`.
+        """
+        with self._lock:
+            return self._get_effective_protection_mode(category_id)
+
+    def _get_effective_protection_mode(self, category_id):
+        self._refresh()
+        try:
+            return self._protection_modes[category_id]
+        except KeyError:
+            pass
+        node = self._get_node(category_id)
+        if node.protection_mode != ProtectionMode.inheriting or node.parent_id is None:
+            rv = node.protection_mode
+        else:
+            rv = self._get_effective_protection_mode(node.parent_id)
+        self._protection_modes[category_id] = rv
+        return rv
+
+    def get_deep_children_count(self, category_id):
+        """Get the number of subcategories at any level of nesting.
+
+        This corresponds to :attr:`.Category.deep_children_count`.
+        """
+        with self._lock:
+            return self._get_deep_counts(category_id)[0]
+
+    def get_deep_events_count(self, category_id):
+        """Get the number of events in the category or its subcategories.
+
+        This corresponds to :attr:`.Category.deep_events_count`.
+        """
+        with self._lock:
+            return self._get_deep_counts(category_id)[1]
+
+    def _get_node(self, category_id):
+        self._refresh()
+        try:
+            return self._nodes[category_id]
+        except KeyError:
+            # the category may have been created without notifying us
+            self.invalidate([category_id])
+            self._refresh()
+            return self._nodes[category_id]
+
+    def _get_chain(self, category_id):
+        self._refresh()
+        try:
+            return self._chains[category_id]
+        except KeyError:
+            pass
+        node = self._get_node(category_id)
+        entry = {'id': node.id, 'title': node.title}
+        rv = (self._get_chain(node.parent_id) if node.parent_id is not None else ()) + (entry,)
+        self._chains[category_id] = rv
+        return rv
+
+    def _is_deleted(self, category_id):
+        return any(self._nodes[entry['id']].is_deleted for entry in self._get_chain(category_id))
+
+    def _get_deep_counts(self, category_id):
+        if self._is_deleted(category_id):
+            return 0, 0
+        # iterate over the subtree in post-order so each category is
+        # only counted after all its subcategories have been counted
+        stack = [(category_id, False)]
+        while stack:
+            id_, visited = stack.pop()
+            if id_ in self._deep_counts:
+                continue
+            children = [child_id for child_id in self._children[id_] if not self._nodes[child_id].is_deleted]
+            if not visited:
+                stack.append((id_, True))
+                stack.extend((child_id, False) for child_id in children)
+                continue
+            self._deep_counts[id_] = (sum(1 + self._deep_counts[child_id][0] for child_id in children),
+                                      sum((self._deep_counts[child_id][1] for child_id in children),
+                                          self._event_counts.get(id_, 0)))
+        return self._deep_counts[category_id]
+
+    def _add_node(self, node):
+        self._nodes[node.id] = node
+        if node.parent_id is not None:
+            self._children[node.parent_id].add(node.id)
+
+    def _remove_node(self, category_id):
+        node = self._nodes.pop(category_id, None)
+        if node is not None and node.parent_id is not None:
+            self._children[node.parent_id].discard(category_id)
+
+    def _discard_derived_data(self, category_id):
+        """Discard data which may change when a category changes.
+
+        This affects the chains and protection modes of the category
+        and its subcategories and the counts of its parent categories.
+        """
+        if category_id not in self._nodes:
+            return
+        for entry in self._get_chain(category_id):
+            self._deep_counts.pop(entry['id'], None)
+        stack = [category_id]
+        while stack:
+            id_ = stack.pop()
+            self._chains.pop(id_, None)
+            self._protection_modes.pop(id_, None)
+            self._deep_counts.pop(id_, None)
+            stack.extend(self._children[id_])
+
+    def _refresh(self):
+        with self._lock:
+            if not self._changed_categories and not self._changed_event_counts:
+                return
+            category_ids = self._changed_categories
+            event_category_ids = self._changed_event_counts
+            self._changed_categories = set()
+            self._changed_event_counts = set()
+            if category_ids:
+                nodes = {node.id: node for node in _query_nodes(category_ids)}
+                for category_id in category_ids:
+                    self._discard_derived_data(category_id)
+                    self._remove_node(category_id)
+                    if category_id in nodes:
+                        self._add_node(nodes[category_id])
+                        self._discard_derived_data(category_id)
+            if event_category_ids:
+                counts = _query_event_counts(event_category_ids)
+                for category_id in event_category_ids:
+                    self._event_counts[category_id] = counts.get(category_id, 0)
+                    self._discard_derived_data(category_id)
+
+
+def _get_published_changes(from_version, to_version):
+    """Get the changes published between two tree versions.
+
+    :return: A tuple containing the changed categories and the
+             categories with changed event counts, or ``None`` if the
+             changes are not available.
+    """
+    if to_version - from_version > MAX_CHANGES:
+        return None
+    keys = ['changes:{}'.format(version) for version in xrange(from_version + 1, to_version + 1)]
+    changes = _cache.get_multi(keys, asdict=False)
+    if any(x is None for x in changes):
+        # expired, or published by a transaction which has not stored
+        # its changes yet
+        return None
+    category_ids = set()
+    event_category_ids = set()
+    for changed_category_ids, changed_event_category_ids in changes:
+        category_ids |= changed_category_ids
+        event_category_ids |= changed_event_category_ids
+    return category_ids, event_category_ids
+
+
+def _load_tree():
+    global _tree
+    with _lock:
+        version = _cache.incr('version', 0)
+        if version is None:
+            return CategoryTree.build()
+        tree = _tree
+        # a version older than ours means that the counter has been
+        # removed from the cache, so the published changes are useless
+        if tree is not None and not tree.is_expired and tree.version <= version:
+            if version == tree.version:
+                return tree
+            changes = _get_published_changes(tree.version, version)
+            if changes is not None:
+                tree.invalidate(*changes)
+                tree.version = version
+                return tree
+        data = _cache.get('tree:{}'.format(version))
+        if data is not None and (tree is None or not tree.is_expired):
+            tree = CategoryTree(*data, version=version)
+        else:
+            tree = CategoryTree.build(version)
+            _cache.set('tree:{}'.format(version), tree.get_data(), CategoryTree.max_age)
+        _tree = tree
+        return tree
+
+
+def _get_session_tree(pending):
+    """Get the tree used by a session containing uncommitted changes."""
+    try:
+        return db.session.info['category_tree']
+    except KeyError:
+        tree = db.session.info['category_tree'] = _load_tree().copy()
+        tree.invalidate(*pending)
+        return tree
+
+
+def get_category_tree():
+    """Get the category tree.
+
+    The tree is shared by all requests handled by the current process.
+    It is updated if another process announced a change since it was
+    built, and only checked once per request.  A session which has
+    uncommitted changes in the tree uses its own copy of the tree.
+    """
+    pending = db.session.info.get('category_tree_changes')
+    if pending is not None:
+        return _get_session_tree(pending)
+    if not has_request_context():
+        return _load_tree()
+    try:
+        return g.category_tree
+    except AttributeError:
+        g.category_tree = tree = _load_tree()
+        return tree
+
+
+def invalidate_category_tree(category_ids=(), event_category_ids=()):
+    """Notify the category tree about changed categories.
+
+    The current session uses a private copy of the tree containing the
+    changes, while the shared tree and other processes are only updated
+    once the current transaction has been committed.
+
+    :param category_ids: Categories which have been created,
+                         modified, moved or deleted.
+    :param event_category_ids: Categories in which events have been
+                               created or deleted.
+    """
+    category_ids = set(category_ids)
+    event_category_ids = set(event_category_ids)
+    pending = db.session.info.setdefault('category_tree_changes', (set(), set()))
+    pending[0].update(category_ids)
+    pending[1].update(event_category_ids)
+    session_tree = db.session.info.get('category_tree')
+    if session_tree is not None:
+        session_tree.invalidate(category_ids, event_category_ids)
+
+
+@listens_for(Session, 'after_commit')
+def _publish_category_tree_changes(session):
+    if session.transaction.nested:
+        return
+    session.info.pop('category_tree', None)
+    pending = session.info.pop('category_tree_changes', None)
+    if pending is None:
+        return
+    with _lock:
+        # incrementing the counter gives each commit its own version even
+        # if several processes publish their changes at the same time
+        version = _cache.incr('version')
+        if version is None:
+            return
+        # other processes use this to update their trees
+        _cache.set('changes:{}'.format(version), pending, CategoryTree.max_age)
+        if _tree is not None and _tree.version == version - 1:
+            _tree.invalidate(*pending)
+            _tree.version = version
+        # otherwise our tree is outdated and will catch up with the
+        # published changes the next time it is used
+
+
+@listens_for(Session, 'after_soft_rollback')
+def _discard_category_tree_changes(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop('category_tree_changes', None)
+        session.info.pop('category_tree', None)
+        return
+    # rolling back a savepoint keeps the pending changes, but the
+    # session's tree may contain data from the savepoint
+    pending = session.info.get('category_tree_changes')
+    session_tree = session.info.get('category_tree')
+    if pending is not None and session_tree is not None:
+        session_tree.invalidate(*pending)
@@ -0,0 +1,221 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+from mock import MagicMock
+
+from indico.core.db.sqlalchemy.protection import ProtectionMode
+from indico.modules.categories import tree as tree_module
+from indico.modules.categories.tree import CategoryTree, _CategoryNode, get_category_tree
+from indico.testing.fixtures.cache import MemoryCacheClient
+
+
+def _node(id_, parent_id, protection_mode=ProtectionMode.inheriting, is_deleted=False):
+    return _CategoryNode(id_, parent_id, u'cat{}'.format(id_), protection_mode, is_deleted)
+
+
+@pytest.fixture
+def nodes():
+    #   0 (public)
+    #   +- 1 (protected)
+    #   |  +- 3
+    #   |  +- 4 (deleted)
+    #   |     +- 6
+    #   +- 2
+    #      +- 5 (public)
+    return [_node(0, None, ProtectionMode.public),
+            _node(1, 0, ProtectionMode.protected),
+            _node(2, 0),
+            _node(3, 1),
+            _node(4, 1, is_deleted=True),
+            _node(5, 2, ProtectionMode.public),
+            _node(6, 4)]
+
+
+@pytest.fixture
+def tree(nodes):
+    return CategoryTree(nodes, {0: 1, 1: 2, 3: 4, 4: 8, 5: 16, 6: 32})
+
+
+def test_chain(tree):
+    assert tree.get_chain(0) == [{'id': 0, 'title': 'cat0'}]
+    assert tree.get_chain(6) == [{'id': 0, 'title': 'cat0'}, {'id': 1, 'title': 'cat1'},
+                                 {'id': 4, 'title': 'cat4'}, {'id': 6, 'title': 'cat6'}]
+    assert tree.get_chain_titles(5) == ['cat0', 'cat2', 'cat5']
+
+
+@pytest.mark.parametrize(('category_id', 'expected'), (
+    (0, ProtectionMode.public),
+    (1, ProtectionMode.protected),
+    (2, ProtectionMode.public),
+    (3, ProtectionMode.protected),
+    (5, ProtectionMode.public),
+    (6, ProtectionMode.protected),
+))
+def test_effective_protection_mode(tree, category_id, expected):
+    assert tree.get_effective_protection_mode(category_id) == expected
+
+
+@pytest.mark.parametrize(('category_id', 'children', 'events'), (
+    (0, 4, 23),
+    (1, 1, 6),
+    (2, 1, 16),
+    (3, 0, 4),
+    (4, 0, 0),
+    (6, 0, 0),
+))
+def test_deep_counts(tree, category_id, children, events):
+    assert tree.get_deep_children_count(category_id) == children
+    assert tree.get_deep_events_count(category_id) == events
+
+
+def test_invalidate(monkeypatch, tree, nodes):
+    nodes[5] = _node(5, 1, ProtectionMode.inheriting)
+    monkeypatch.setattr(tree_module, '_query_nodes', lambda ids: [n for n in nodes if n.id in ids])
+    monkeypatch.setattr(tree_module, '_query_event_counts', lambda ids: {5: 15})
+    # make sure the derived data is cached
+    assert tree.get_deep_events_count(0) == 23
+    assert tree.get_effective_protection_mode(5) == ProtectionMode.public
+    tree.invalidate(category_ids={5}, event_category_ids={5})
+    assert tree.get_chain_titles(5) == ['cat0', 'cat1', 'cat5']
+    assert tree.get_effective_protection_mode(5) == ProtectionMode.protected
+    assert tree.get_deep_events_count(0) == 22
+    assert tree.get_deep_events_count(1) == 21
+    assert tree.get_deep_children_count(1) == 2
+    assert tree.get_deep_events_count(2) == 0
+    assert tree.get_deep_children_count(2) == 0
+
+
+def test_invalidate_unknown(monkeypatch, tree):
+    monkeypatch.setattr(tree_module, '_query_nodes', lambda ids: [_node(7, 3)] if 7 in ids else [])
+    assert tree.get_chain_titles(7) == ['cat0', 'cat1', 'cat3', 'cat7']
+    assert tree.get_deep_children_count(1) == 2
+    with pytest.raises(KeyError):
+        tree.get_chain(8)
+
+
+def test_copy(monkeypatch, tree, nodes):
+    nodes[5] = _node(5, 1, ProtectionMode.inheriting)
+    monkeypatch.setattr(tree_module, '_query_nodes', lambda ids: [n for n in nodes if n.id in ids])
+    monkeypatch.setattr(tree_module, '_query_event_counts', lambda ids: {})
+    assert tree.get_deep_events_count(0) == 23
+    copy = tree.copy()
+    copy.invalidate(category_ids={5})
+    assert copy.get_chain_titles(5) == ['cat0', 'cat1', 'cat5']
+    assert copy.get_deep_events_count(1) == 22
+    # the original tree is not affected
+    assert tree.get_chain_titles(5) == ['cat0', 'cat2', 'cat5']
+    assert tree.get_deep_events_count(1) == 6
+
+
+@pytest.fixture
+def mock_queries(monkeypatch, nodes):
+    counts = {0: 1, 1: 2, 3: 4, 4: 8, 5: 16, 6: 32}
+    monkeypatch.setattr(tree_module, '_query_nodes', lambda ids=None: [n for n in nodes if ids is None or n.id in ids])
+    monkeypatch.setattr(tree_module, '_query_event_counts',
+                        lambda ids=None: {id_: n for id_, n in counts.iteritems() if ids is None or id_ in ids})
+    return counts
+
+
+def _publish(*changes):
+    session = MagicMock(info={'category_tree_changes': changes})
+    session.transaction.nested = False
+    tree_module._publish_category_tree_changes(session)
+    assert not session.info
+
+
+@pytest.mark.parametrize(('available', 'updated'), (
+    # v0 -> v1 -> v2 -> v3 changes are all available
+    ((1, 2, 3), True),
+    # changes of v1 are missing
+    ((2, 3), False),
+))
+def test_load_published_changes(cache_client, mock_queries, nodes, available, updated):
+    tree = tree_module._load_tree()
+    assert tree.get_deep_events_count(0) == 23
+    # changes published by other processes
+    tree_module._tree = None
+    _publish(set(), set())
+    _publish(set(), {5})
+    _publish({5}, set())
+    tree_module._tree = tree
+    for version in {1, 2, 3} - set(available):
+        tree_module._cache.delete('changes:{}'.format(version))
+    nodes[5] = _node(5, 1, ProtectionMode.inheriting)
+    mock_queries[5] = 15
+    new_tree = tree_module._load_tree()
+    assert new_tree.version == 3
+    assert (new_tree is tree) == updated
+    assert new_tree.get_chain_titles(5) == ['cat0', 'cat1', 'cat5']
+    assert new_tree.get_deep_events_count(1) == 21
+
+
+def test_publish_concurrent(cache_client, mock_queries, nodes):
+    tree = tree_module._load_tree()
+    assert tree.version == 0
+    assert tree.get_chain_titles(5) == ['cat0', 'cat2', 'cat5']
+    # changes published by two other processes at the same time
+    tree_module._tree = None
+    _publish({5}, set())
+    _publish(set(), {3})
+    tree_module._tree = tree
+    nodes[5] = _node(5, 1, ProtectionMode.inheriting)
+    mock_queries[3] = 5
+    assert tree_module._load_tree() is tree
+    assert tree.version == 2
+    assert tree.get_chain_titles(5) == ['cat0', 'cat1', 'cat5']
+    assert tree.get_deep_events_count(3) == 5
+
+
+def test_publish_updates_own_tree(cache_client, mock_queries, nodes):
+    tree = tree_module._load_tree()
+    assert tree.get_deep_events_count(5) == 16
+    mock_queries[5] = 17
+    _publish(set(), {5})
+    assert tree.version == 1
+    assert tree.get_deep_events_count(5) == 17
+    assert tree_module._load_tree() is tree
+
+
+def test_version_reset(cache_client, mock_queries):
+    tree = tree_module._load_tree()
+    tree.version = 5
+    # the counter is lower than our version if it has been removed
+    assert tree_module._load_tree() is not tree
+
+
+def test_no_counters(monkeypatch, cache_client, mock_queries):
+    monkeypatch.setattr(MemoryCacheClient, 'incr', lambda self, key, delta=1: None)
+    tree = tree_module._load_tree()
+    assert tree_module._load_tree() is not tree
+    _publish({5}, set())
+    assert tree_module._tree is None
+
+
+@pytest.mark.usefixtures('request_context')
+def test_get_category_tree(mock_queries):
+    tree = get_category_tree()
+    assert get_category_tree() is tree
+    tree_module.invalidate_category_tree(category_ids={5})
+    # uncommitted changes use a private copy
+    session_tree = get_category_tree()
+    assert session_tree is not tree
+    assert tree_module.db.session.info['category_tree'] is session_tree
+    transaction = MagicMock()
+    transaction.parent = None
+    tree_module._discard_category_tree_changes(tree_module.db.session, transaction)
+    assert not tree_module.db.session.info
+    assert get_category_tree() is tree
@@ -88,6 +88,7 @@ _bp.add_url_rule('/manage/abstracts/teams', 'manage_reviewing_roles', management
 _bp.add_url_rule('/manage/abstracts/list/', 'manage_abstract_list', abstract_list.RHAbstractList)
 _bp.add_url_rule('/manage/abstracts/list/customize', 'customize_abstract_list', abstract_list.RHAbstractListCustomize,
                  methods=('GET', 'POST'))
+_bp.add_url_rule('/manage/abstracts/list/page', 'manage_abstract_list_page', abstract_list.RHAbstractListPage)
 _bp.add_url_rule('/manage/abstracts/list/static-url', 'generate_static_url', abstract_list.RHAbstractListStaticURL,
                  methods=('POST',))
 _bp.add_url_rule('/manage/abstracts/abstracts.pdf', 'abstracts_pdf_export', abstract_list.RHAbstractsExportPDF,
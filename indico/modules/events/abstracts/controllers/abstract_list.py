@@ -35,7 +35,7 @@ from indico.modules.events.abstracts.schemas import abstract_review_questions_sc
 from indico.modules.events.abstracts.util import make_abstract_form
 from indico.modules.events.abstracts.views import WPManageAbstracts
 from indico.modules.events.contributions.models.persons import AuthorType
-from indico.modules.events.util import get_field_values
+from indico.modules.events.util import ListPageMixin, get_field_values
 from indico.util.i18n import _, ngettext
 from indico.web.util import jsonify_data, jsonify_form, jsonify_template
 
@@ -105,6 +105,10 @@ class RHAbstractListCustomize(CustomizeAbstractListMixin, RHAbstractListBase):
     ALLOW_LOCKED = True
 
 
+class RHAbstractListPage(ListPageMixin, RHAbstractListBase):
+    """Return a page of the abstract list as JSON"""
+
+
 class RHAbstractListStaticURL(RHAbstractListBase):
     """Generate a static URL for the configuration of the abstract list"""
 
@@ -26,9 +26,10 @@ from indico.core.db import db
 from indico.modules.events.abstracts.models.abstracts import Abstract, AbstractState
 from indico.modules.events.abstracts.models.fields import AbstractFieldValue
 from indico.modules.events.abstracts.models.reviews import AbstractReview
+from indico.modules.events.abstracts.settings import abstracts_reviewing_settings
 from indico.modules.events.contributions.models.fields import ContributionField
 from indico.modules.events.tracks.models.tracks import Track
-from indico.modules.events.util import ListGeneratorBase
+from indico.modules.events.util import ListGeneratorBase, PaginatedListGeneratorMixin
 from indico.util.i18n import _
 from indico.web.flask.templating import get_template_module
 
@@ -65,13 +66,36 @@ class AbstractListGeneratorBase(ListGeneratorBase):
                                        'filter_choices': OrderedDict(type_empty.items() + type_choices.items())}),
             ('submitted_contrib_type', {'title': _('Submitted type'),
                                         'filter_choices': OrderedDict(type_empty.items() + type_choices.items())}),
-            ('score', {'title': _('Score')}),
+            ('score', {'title': _('Score'), 'filter_choices': self._get_score_filter_choices()}),
             ('submitted_dt', {'title': _('Submission date')}),
             ('modified_dt', {'title': _('Modification date')})
         ])
         self.extra_filters = {}
         self.list_config = self._get_config()
 
+    def _get_score_filter_choices(self):
+        # one choice for each step of the rating scale; the last one
+        # includes the upper end of the scale
+        lower = abstracts_reviewing_settings.get(self.event, 'scale_lower')
+        upper = abstracts_reviewing_settings.get(self.event, 'scale_upper')
+        choices = OrderedDict([(None, _('No score'))])
+        choices.update((unicode(n), '{} - {}'.format(n, n + 1)) for n in xrange(lower, upper))
+        return choices
+
+    def _get_score_criteria(self, values):
+        upper = abstracts_reviewing_settings.get(self.event, 'scale_upper')
+        criteria = []
+        for value in values:
+            if value is None:
+                criteria.append(Abstract.score.is_(None))
+                continue
+            lower = int(value)
+            if lower == upper - 1:
+                criteria.append(Abstract.score.between(lower, upper))
+            else:
+                criteria.append(db.and_(Abstract.score >= lower, Abstract.score < lower + 1))
+        return criteria
+
     def _get_static_columns(self, ids):
         """
         Retrieve information needed for the header of the static columns.
@@ -164,6 +188,8 @@ class AbstractListGeneratorBase(ListGeneratorBase):
             if 'state' in item_filters:
                 states = [AbstractState(int(state)) for state in item_filters['state']]
                 criteria.append(Abstract.state.in_(states))
+            if item_filters.get('score') and 'score' in self.static_items:
+                criteria.append(db.or_(*self._get_score_criteria(item_filters['score'])))
         if extra_filters:
             if extra_filters.get('multiple_tracks'):
                 submitted_for_count = (db.select([db.func.count()])
@@ -178,7 +204,9 @@ class AbstractListGeneratorBase(ListGeneratorBase):
         list_config = self._get_config()
         abstracts_query = self._build_query()
         total_entries = abstracts_query.count()
-        abstracts = self._filter_list_entries(abstracts_query, list_config['filters']).all()
+        abstracts, pagination = self._get_list_entries(self._filter_list_entries(abstracts_query,
+                                                                                 list_config['filters']))
+        filtered_entries = pagination.total if pagination else len(abstracts)
         dynamic_item_ids, static_item_ids = self._split_item_ids(list_config['items'], 'dynamic')
         static_columns = self._get_static_columns(static_item_ids)
         dynamic_columns = self._get_sorted_contribution_fields(dynamic_item_ids)
@@ -187,7 +215,8 @@ class AbstractListGeneratorBase(ListGeneratorBase):
             'total_abstracts': total_entries,
             'static_columns': static_columns,
             'dynamic_columns': dynamic_columns,
-            'filtering_enabled': total_entries != len(abstracts)
+            'pagination': pagination,
+            'filtering_enabled': total_entries != filtered_entries
         }
 
     def get_list_export_config(self):
@@ -203,13 +232,15 @@ class AbstractListGeneratorBase(ListGeneratorBase):
         tpl = get_template_module('events/abstracts/management/_abstract_list.html')
         filtering_enabled = list_kwargs.pop('filtering_enabled')
         tpl_lists = get_template_module('events/management/_lists.html')
-        filter_statistics = tpl_lists.render_displayed_entries_fragment(len(list_kwargs['abstracts']),
+        pagination = list_kwargs['pagination']
+        filtered_entries = pagination.total if pagination else len(list_kwargs['abstracts'])
+        filter_statistics = tpl_lists.render_displayed_entries_fragment(filtered_entries,
                                                                         list_kwargs['total_abstracts'])
         return {
             'html': tpl.render_abstract_list(**list_kwargs),
             'filtering_enabled': filtering_enabled,
             'filter_statistics': filter_statistics,
-            'hide_abstract': abstract not in list_kwargs['abstracts'] if abstract else None
+            'hide_abstract': not self.is_entry_displayed(abstract) if abstract else None
         }
 
     def flash_info_message(self, abstract):
@@ -217,7 +248,7 @@ class AbstractListGeneratorBase(ListGeneratorBase):
               .format(abstract.title), 'info')
 
 
-class AbstractListGeneratorManagement(AbstractListGeneratorBase):
+class AbstractListGeneratorManagement(PaginatedListGeneratorMixin, AbstractListGeneratorBase):
     """Listing and filtering actions in the abstract list in the management view"""
 
     list_link_type = 'abstract_management'
@@ -233,6 +264,30 @@ class AbstractListGeneratorManagement(AbstractListGeneratorBase):
             ('comments', {'title': _('Must have comments'), 'type': 'bool'})
         ])
 
+    def get_sort_columns(self):
+        columns = {'id': Abstract.friendly_id,
+                   'title': Abstract.title,
+                   'state': Abstract.state,
+                   'submitted_dt': Abstract.submitted_dt,
+                   'modified_dt': Abstract.modified_dt}
+        if 'score' in self.static_items:
+            columns['score'] = Abstract.score
+            columns['score_count'] = Abstract.score_count
+        return columns
+
+    def serialize_list_entries(self, abstracts):
+        # the schemas need all models to be loaded when they are imported
+        from indico.modules.events.abstracts.schemas import AbstractSchema
+        # the static items are named like the schema fields except for the authors
+        fields = {'id', 'friendly_id', 'title'} | {'persons' if item_id == 'authors' else item_id
+                                                   for item_id in self.static_items}
+        return AbstractSchema(many=True, only=fields).dump(abstracts).data
+
+    def get_list_kwargs(self):
+        kwargs = super(AbstractListGeneratorManagement, self).get_list_kwargs()
+        kwargs['page'] = self.get_current_page()
+        return kwargs
+
 
 class AbstractListGeneratorDisplay(AbstractListGeneratorBase):
     """Listing and filtering actions in the abstract list in the display view"""
@@ -0,0 +1,82 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+
+import pytest
+
+from indico.modules.events.abstracts.lists import AbstractListGeneratorDisplay, AbstractListGeneratorManagement
+from indico.modules.events.abstracts.models.abstracts import Abstract, AbstractState
+
+
+@pytest.fixture
+def create_abstracts(db, dummy_event, dummy_user):
+    def _create_abstracts(count):
+        abstracts = [Abstract(title='Abstract {}'.format(i), event=dummy_event, submitter=dummy_user)
+                     for i in xrange(count)]
+        db.session.add_all(abstracts)
+        db.session.flush()
+        return abstracts
+
+    return _create_abstracts
+
+
+@pytest.mark.usefixtures('request_context')
+def test_list_page(dummy_event, create_abstracts):
+    create_abstracts(5)
+    generator = AbstractListGeneratorManagement(dummy_event)
+    page = generator.get_list_page(page=2, page_size=2)
+    assert page['total'] == page['filtered'] == 5
+    assert page['pages'] == 3
+    assert [a['title'] for a in page['entries']] == ['Abstract 2', 'Abstract 3']
+    assert page['entries'][0]['state'] == AbstractState.submitted.name
+    page = generator.get_list_page(page=1, page_size=2, sort='title', desc=True)
+    assert [a['title'] for a in page['entries']] == ['Abstract 4', 'Abstract 3']
+
+
+@pytest.mark.usefixtures('request_context')
+def test_list_page_filtered(dummy_event, create_abstracts):
+    abstracts = create_abstracts(3)
+    abstracts[1].state = AbstractState.withdrawn
+    generator = AbstractListGeneratorManagement(dummy_event)
+    generator.list_config['filters']['items'] = {'state': [AbstractState.withdrawn.value]}
+    page = generator.get_list_page()
+    assert page['total'] == 3
+    assert page['filtered'] == 1
+    assert [a['title'] for a in page['entries']] == ['Abstract 1']
+    assert not generator.is_entry_displayed(abstracts[0])
+    assert generator.is_entry_displayed(abstracts[1])
+
+
+def test_list_kwargs_paginated(app, dummy_event, create_abstracts):
+    create_abstracts(5)
+    with app.test_request_context(query_string={'page': '3'}):
+        generator = AbstractListGeneratorManagement(dummy_event)
+        generator.page_size = 2
+        kwargs = generator.get_list_kwargs()
+        assert kwargs['page'] == 3
+        assert kwargs['total_abstracts'] == kwargs['pagination'].total == 5
+        assert not kwargs['filtering_enabled']
+        assert [a.title for a in kwargs['abstracts']] == ['Abstract 4']
+    with app.test_request_context(query_string={'page': 'all'}):
+        generator = AbstractListGeneratorManagement(dummy_event)
+        generator.page_size = 2
+        assert len(generator.get_list_kwargs()['abstracts']) == 5
+
+
+def test_display_list_not_paginated():
+    assert not hasattr(AbstractListGeneratorDisplay, 'get_list_page')
@@ -22,7 +22,7 @@ from operator import attrgetter
 
 from sqlalchemy import inspect
 from sqlalchemy.ext.declarative import declared_attr
-from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.ext.hybrid import hybrid_method, hybrid_property
 
 from indico.core.db import db
 from indico.core.db.sqlalchemy import PyIntEnum, UTCDateTime
@@ -449,13 +449,32 @@ class Abstract(ProposalMixin, ProposalRevisionMixin, DescriptionMixin, CustomFie
         else:
             return AbstractReviewingState.mixed
 
-    @property
+    @hybrid_property
     def score(self):
         scores = [x.score for x in self.reviews if x.score is not None]
         if not scores:
             return None
         return sum(scores) / len(scores)
 
+    @score.expression
+    def score(cls):
+        return (db.select([db.func.avg(AbstractReview.score)])
+                .where(AbstractReview.abstract_id == cls.id)
+                .correlate_except(AbstractReview)
+                .as_scalar())
+
+    @hybrid_property
+    def score_count(self):
+        """The number of reviews with a score."""
+        return sum(1 for x in self.reviews if x.score is not None)
+
+    @score_count.expression
+    def score_count(cls):
+        return (db.select([db.func.count(AbstractReview.score)])
+                .where(AbstractReview.abstract_id == cls.id)
+                .correlate_except(AbstractReview)
+                .as_scalar())
+
     @property
     def data_by_field(self):
         return {value.contribution_field_id: value for value in self.field_values}
@@ -612,7 +631,7 @@ class Abstract(ProposalMixin, ProposalRevisionMixin, DescriptionMixin, CustomFie
                  .join(AbstractReviewRating.question)
                  .filter(AbstractReview.abstract == self,
                          AbstractReviewQuestion.field_type == 'rating',
-                         db.func.json_typeof(AbstractReviewRating.value) == 'null',
+                         db.func.json_typeof(AbstractReviewRating.value) != 'null',
                          ~AbstractReviewQuestion.is_deleted,
                          ~AbstractReviewQuestion.no_score)
                  .group_by(AbstractReview.track_id, AbstractReviewQuestion.id))
@@ -627,6 +646,7 @@ class Abstract(ProposalMixin, ProposalRevisionMixin, DescriptionMixin, CustomFie
             return self.reviewed_for_tracks | already_reviewed
         return (self.reviewed_for_tracks & user.abstract_reviewer_for_tracks) | already_reviewed
 
+    @hybrid_method
     def get_track_score(self, track):
         if track not in self.reviewed_for_tracks:
             raise ValueError("Abstract not in review for given track")
@@ -636,6 +656,58 @@ class Abstract(ProposalMixin, ProposalRevisionMixin, DescriptionMixin, CustomFie
             return None
         return sum(scores) / len(scores)
 
+    @get_track_score.expression
+    def get_track_score(cls, track):
+        return (db.select([db.func.avg(AbstractReview.score)])
+                .where(db.and_(AbstractReview.abstract_id == cls.id,
+                               AbstractReview.track_id == track.id))
+                .correlate_except(AbstractReview)
+                .as_scalar())
+
+    @hybrid_method
+    def get_track_score_count(self, track):
+        """Get the number of reviews with a score in a track."""
+        return sum(1 for x in self.reviews if x.track == track and x.score is not None)
+
+    @get_track_score_count.expression
+    def get_track_score_count(cls, track):
+        return (db.select([db.func.count(AbstractReview.score)])
+                .where(db.and_(AbstractReview.abstract_id == cls.id,
+                               AbstractReview.track_id == track.id))
+                .correlate_except(AbstractReview)
+                .as_scalar())
+
+    @hybrid_method
+    def get_question_score(self, question, track=None):
+        """Get the average rating given for a review question.
+
+        :param question: An :class:`AbstractReviewQuestion`
+        :param track: A track to only include the reviews for that
+                      track; if omitted, all reviews are used.
+        """
+        values = [rating.value
+                  for review in self.reviews if track is None or review.track == track
+                  for rating in review.ratings
+                  if rating.question == question and isinstance(rating.value, (int, long, float))
+                  and not isinstance(rating.value, bool)]
+        if not values:
+            return None
+        return sum(values) / len(values)
+
+    @get_question_score.expression
+    def get_question_score(cls, question, track=None):
+        criteria = [AbstractReview.abstract_id == cls.id,
+                    AbstractReviewRating.review_id == AbstractReview.id,
+                    AbstractReviewRating.question_id == question.id,
+                    db.func.json_typeof(AbstractReviewRating.value) == 'number']
+        if track is not None:
+            criteria.append(AbstractReview.track_id == track.id)
+        value = db.cast(AbstractReviewRating.value.op('#>>')('{}'), db.Float)
+        return (db.select([db.func.avg(value)])
+                .where(db.and_(*criteria))
+                .correlate_except(AbstractReview, AbstractReviewRating)
+                .as_scalar())
+
     def reset_state(self):
         self.state = AbstractState.submitted
         self.judgment_comment = ''
@@ -0,0 +1,92 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+
+import pytest
+
+from indico.modules.events.abstracts.models.abstracts import Abstract
+from indico.modules.events.abstracts.models.review_questions import AbstractReviewQuestion
+from indico.modules.events.abstracts.models.review_ratings import AbstractReviewRating
+from indico.modules.events.abstracts.models.reviews import AbstractAction, AbstractReview
+from indico.modules.events.tracks.models.tracks import Track
+
+
+@pytest.fixture
+def dummy_abstract(db, dummy_event, dummy_user):
+    abstract = Abstract(title='Dummy Abstract', event=dummy_event, submitter=dummy_user)
+    db.session.add(abstract)
+    db.session.flush()
+    return abstract
+
+
+def _review(abstract, user, track, ratings):
+    review = AbstractReview(abstract=abstract, user=user, track=track, proposed_action=AbstractAction.accept)
+    for question, value in ratings.iteritems():
+        review.ratings.append(AbstractReviewRating(question=question, value=value))
+    return review
+
+
+def test_score(db, dummy_event, dummy_abstract, dummy_user, create_user):
+    track1 = Track(title='Track 1', event=dummy_event)
+    track2 = Track(title='Track 2', event=dummy_event)
+    q1 = AbstractReviewQuestion(event=dummy_event, title='Q1', field_type='rating')
+    q2 = AbstractReviewQuestion(event=dummy_event, title='Q2', field_type='rating')
+    q3 = AbstractReviewQuestion(event=dummy_event, title='Q3', field_type='bool')
+    q4 = AbstractReviewQuestion(event=dummy_event, title='Q4', field_type='rating', is_deleted=True)
+    other_user = create_user(123)
+    dummy_abstract.reviewed_for_tracks = {track1, track2}
+    _review(dummy_abstract, dummy_user, track1, {q1: 3, q2: 4, q3: True, q4: 10})
+    _review(dummy_abstract, other_user, track1, {q1: 1, q2: None})
+    _review(dummy_abstract, dummy_user, track2, {q3: False})
+    db.session.flush()
+    assert dummy_abstract.score == 2.25
+    assert dummy_abstract.get_track_score(track1) == 2.25
+    assert dummy_abstract.get_track_score(track2) is None
+    query = db.session.query(Abstract.score,
+                             Abstract.get_track_score(track1),
+                             Abstract.get_track_score(track2)).filter(Abstract.id == dummy_abstract.id)
+    assert query.one() == (2.25, 2.25, None)
+    assert dummy_abstract.score_count == 2
+    assert dummy_abstract.get_track_score_count(track1) == 2
+    assert dummy_abstract.get_track_score_count(track2) == 0
+    assert dummy_abstract.get_question_score(q1) == 2
+    assert dummy_abstract.get_question_score(q2, track1) == 4
+    assert dummy_abstract.get_question_score(q3) is None
+    query = db.session.query(Abstract.score_count,
+                             Abstract.get_track_score_count(track1),
+                             Abstract.get_track_score_count(track2),
+                             Abstract.get_question_score(q1),
+                             Abstract.get_question_score(q2, track1),
+                             Abstract.get_question_score(q3)).filter(Abstract.id == dummy_abstract.id)
+    assert query.one() == (2, 2, 0, 2, 4, None)
+    assert Abstract.query.filter(Abstract.score.between(2, 3)).all() == [dummy_abstract]
+    assert (db.session.query(AbstractReview.score).filter(AbstractReview.track == track1)
+            .order_by(AbstractReview.score).all()) == [(1,), (3.5,)]
+
+
+def test_track_question_scores(db, dummy_event, dummy_abstract, dummy_user, create_user):
+    track = Track(title='Track 1', event=dummy_event)
+    q1 = AbstractReviewQuestion(event=dummy_event, title='Q1', field_type='rating')
+    q2 = AbstractReviewQuestion(event=dummy_event, title='Q2', field_type='rating')
+    q3 = AbstractReviewQuestion(event=dummy_event, title='Q3', field_type='rating', no_score=True)
+    dummy_abstract.reviewed_for_tracks = {track}
+    _review(dummy_abstract, dummy_user, track, {q1: 3, q2: 4, q3: 5})
+    _review(dummy_abstract, create_user(123), track, {q1: 1, q2: None})
+    db.session.flush()
+    scores = dummy_abstract.get_track_question_scores()
+    assert scores[track.id] == {q1: 2, q2: 4}
@@ -16,6 +16,8 @@
 
 from __future__ import division, unicode_literals
 
+from sqlalchemy.ext.hybrid import hybrid_property
+
 from indico.core.db.sqlalchemy import PyIntEnum, UTCDateTime, db
 from indico.core.db.sqlalchemy.descriptions import RenderMode, RenderModeMixin
 from indico.modules.events.models.reviews import ProposalReviewMixin
@@ -49,6 +51,7 @@ class AbstractReview(ProposalReviewMixin, RenderModeMixin, db.Model):
 
     __tablename__ = 'abstract_reviews'
     __table_args__ = (db.UniqueConstraint('abstract_id', 'user_id', 'track_id'),
+                      db.Index(None, 'abstract_id', 'track_id'),
                       db.CheckConstraint("proposed_action = {} OR (proposed_contribution_type_id IS NULL)"
                                          .format(AbstractAction.accept), name='prop_contrib_id_only_accepted'),
                       db.CheckConstraint("(proposed_action IN ({}, {})) = (proposed_related_abstract_id IS NOT NULL)"
@@ -182,7 +185,7 @@ class AbstractReview(ProposalReviewMixin, RenderModeMixin, db.Model):
     def visibility(self):
         return AbstractCommentVisibility.reviewers
 
-    @property
+    @hybrid_property
     def score(self):
         ratings = [r for r in self.ratings if not r.question.no_score and not r.question.is_deleted and
                    r.value is not None]
@@ -190,6 +193,20 @@ class AbstractReview(ProposalReviewMixin, RenderModeMixin, db.Model):
             return None
         return sum(x.value for x in ratings) / len(ratings)
 
+    @score.expression
+    def score(cls):
+        from indico.modules.events.abstracts.models.review_questions import AbstractReviewQuestion
+        from indico.modules.events.abstracts.models.review_ratings import AbstractReviewRating
+        # json null values become NULL and are thus ignored by AVG
+        value = db.cast(AbstractReviewRating.value.op('#>>')('{}'), db.Float)
+        return (db.select([db.func.avg(value)])
+                .where(db.and_(AbstractReviewRating.review_id == cls.id,
+                               AbstractReviewRating.question_id == AbstractReviewQuestion.id,
+                               ~AbstractReviewQuestion.no_score,
+                               ~AbstractReviewQuestion.is_deleted))
+                .correlate_except(AbstractReviewRating, AbstractReviewQuestion)
+                .as_scalar())
+
     def can_edit(self, user, check_state=False):
         if user is None:
             return False
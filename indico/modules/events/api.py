@@ -16,7 +16,9 @@
 
 import fnmatch
 import re
-from datetime import datetime
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from calendar import timegm
+from datetime import datetime, timedelta
 from hashlib import md5
 from operator import attrgetter
 
@@ -29,12 +31,14 @@ from werkzeug.exceptions import ServiceUnavailable
 from indico.core.config import config
 from indico.core.db import db
 from indico.core.db.sqlalchemy.principals import PrincipalType
-from indico.core.db.sqlalchemy.protection import ProtectionMode
+from indico.core.db.sqlalchemy.protection import ProtectionChecker, ProtectionMode
 from indico.modules.attachments.api.util import build_folders_api_data, build_material_legacy_api_data
 from indico.modules.categories import Category, LegacyCategoryMapping
 from indico.modules.categories.serialize import serialize_categories_ical
+from indico.modules.categories.tree import get_category_tree
 from indico.modules.events import Event
 from indico.modules.events.models.persons import PersonLinkBase
+from indico.modules.events.modifications import get_categories_last_modified, get_events_last_modified
 from indico.modules.events.notes.util import build_note_api_data, build_note_legacy_api_data
 from indico.modules.events.sessions.models.sessions import Session
 from indico.modules.events.timetable.legacy import TimetableSerializer
@@ -53,6 +57,7 @@ from indico.web.http_api.util import get_query_parameter
 utc = pytz.timezone('UTC')
 MAX_DATETIME = utc.localize(datetime(2099, 12, 31, 23, 59, 0))
 MIN_DATETIME = utc.localize(datetime(2000, 1, 1))
+EPOCH = utc.localize(datetime(1970, 1, 1))
 
 
 class Period(object):
@@ -61,6 +66,21 @@ class Period(object):
         self.endDT = endDT
 
 
+def encode_event_cursor(start_dt, event_id):
+    """Create an opaque continuation token pointing after an event."""
+    timestamp = timegm(start_dt.utctimetuple()) * 1000000 + start_dt.microsecond
+    return urlsafe_b64encode('{}:{}'.format(timestamp, event_id)).rstrip('=')
+
+
+def decode_event_cursor(cursor):
+    """Get the ``(start_dt, id)`` keyset from a continuation token."""
+    try:
+        timestamp, event_id = urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).split(':')
+        return EPOCH + timedelta(microseconds=int(timestamp)), int(event_id)
+    except (TypeError, ValueError):
+        raise HTTPAPIError('Invalid cursor', 400)
+
+
 def find_event_day_bounds(obj, day):
     if not (obj.start_dt_local.date() <= day <= obj.end_dt_local.date()):
         return None, None
@@ -114,6 +134,7 @@ class CategoryEventHook(HTTPAPIHook):
         'subcontributions': 500,
         'sessions': 100,
     }
+    STREAM_EXTRA_FIELDS = ('categoryId',)
 
     def _getParams(self):
         super(CategoryEventHook, self)._getParams()
@@ -128,16 +149,34 @@ class CategoryEventHook(HTTPAPIHook):
         self._occurrences = get_query_parameter(self._queryParams, ['occ', 'occurrences'], 'no') == 'yes'
         self._location = get_query_parameter(self._queryParams, ['l', 'location'])
         self._room = get_query_parameter(self._queryParams, ['r', 'room'])
+        cursor = get_query_parameter(self._queryParams, ['cursor'])
+        self._cursor = decode_event_cursor(cursor) if cursor else None
+        self._next_cursor = None
 
-    def export_categ(self, user):
-        expInt = CategoryEventFetcher(user, self)
+    def _get_category_ids(self, user):
         id_list = set(self._idList)
         if self._wantFavorites and user:
             id_list.update(str(c.id) for c in user.favorite_categories)
         legacy_id_map = {m.legacy_category_id: m.category_id
                          for m in LegacyCategoryMapping.find(LegacyCategoryMapping.legacy_category_id.in_(id_list))}
-        id_list = {str(legacy_id_map.get(id_, id_)) for id_ in id_list}
-        return expInt.category(id_list, self._format)
+        return {str(legacy_id_map.get(id_, id_)) for id_ in id_list}
+
+    def _get_last_modified(self, user):
+        if self._wantFavorites:
+            # the favorite categories of the user are not versioned
+            return None
+        try:
+            if self._type == 'categ':
+                return get_categories_last_modified(map(int, self._get_category_ids(user)))
+            elif self._type == 'event':
+                return get_events_last_modified(map(int, self._idList))
+        except ValueError:
+            # invalid ids are rejected when running the hook
+            return None
+
+    def export_categ(self, user):
+        expInt = CategoryEventFetcher(user, self)
+        return expInt.category(self._get_category_ids(user), self._format)
 
     def export_categ_extra(self, user, resultList):
         expInt = CategoryEventFetcher(user, self)
@@ -413,12 +452,16 @@ class SerializerBase(object):
 
 
 class CategoryEventFetcher(IteratedDataFetcher, SerializerBase):
+    #: The number of events loaded at once when using keyset pagination
+    BATCH_SIZE = 100
+
     def __init__(self, user, hook):
         super(CategoryEventFetcher, self).__init__(user, hook)
         self._eventType = hook._eventType
         self._occurrences = hook._occurrences
         self._location = hook._location
         self._room = hook._room
+        self._cursor = hook._cursor
         self.user = user
         self._detail_level = get_query_parameter(request.args.to_dict(), ['d', 'detail'], 'events')
         if self._detail_level not in ('events', 'contributions', 'subcontributions', 'sessions'):
@@ -469,8 +512,7 @@ class CategoryEventFetcher(IteratedDataFetcher, SerializerBase):
                              Event.category_chain_overlaps(idlist),
                              Event.happens_between(self._fromDT, self._toDT))
                      .options(*self._get_query_options(self._detail_level)))
-        query = self._update_query(query)
-        return self.serialize_events(x for x in query if self._filter_event(x) and x.can_access(self.user))
+        return self.serialize_events(self._iter_events(query))
 
     def category_extra(self, ids):
         if self._toDT is None:
@@ -478,18 +520,77 @@ class CategoryEventFetcher(IteratedDataFetcher, SerializerBase):
         else:
             query = Event.find(Event.category_id.in_(ids), ~Event.is_deleted, Event.start_dt > self._toDT)
             has_future_events = query.has_rows()
-        return {
+        extra = {
             'eventCategories': self._build_category_path_data(ids),
             'moreFutureEvents': has_future_events
         }
+        order, desc, limit, offset = self._get_sort_params()
+        if self._is_keyset_paginated(order, offset) and self._hook._next_cursor:
+            extra['nextCursor'] = self._hook._next_cursor
+        return extra
 
     def event(self, idlist):
         query = (Event.find(Event.id.in_(idlist),
                             ~Event.is_deleted,
                             Event.happens_between(self._fromDT, self._toDT))
                  .options(*self._get_query_options(self._detail_level)))
-        query = self._update_query(query)
-        return self.serialize_events(x for x in query if self._filter_event(x) and x.can_access(self.user))
+        return self.serialize_events(self._iter_events(query))
+
+    def _iter_events(self, query):
+        # the query is only executed once the generator is consumed, which
+        # may happen while streaming the response
+        for events in self._iter_batches(query):
+            events = [e for e in events if self._filter_event(e)]
+            for event in Event.filter_accessible(events, self.user):
+                yield event
+
+    def _iter_batches(self, query):
+        """Iterate over batches of the events matching a query.
+
+        When sorting by start date the events are loaded in batches using
+        keyset pagination on ``(start_dt, id)``, so deep pages are as cheap
+        as the first one and the eager-loaded relationships of only one
+        batch are kept in memory at a time.  If the requested limit is
+        reached and there are more events, a continuation token pointing
+        after the last event that was loaded is made available in the
+        `nextCursor` extra data.
+
+        The access checks are performed for a whole batch at once.
+        """
+        order, desc, limit, offset = self._get_sort_params()
+        if not self._is_keyset_paginated(order, offset):
+            yield self._update_query(query).all()
+            return
+        query = self._update_query(query, paginate=False)
+        remaining = int(limit) if limit else None
+        last = None
+        while remaining is None or remaining > 0:
+            batch_size = self.BATCH_SIZE if remaining is None else min(remaining, self.BATCH_SIZE)
+            batch_query = query.filter(self._get_keyset_filter(last, desc)) if last else query
+            events = batch_query.limit(batch_size).all()
+            yield events
+            if len(events) < batch_size:
+                return
+            last = events[-1].start_dt, events[-1].id
+            if remaining is not None:
+                remaining -= len(events)
+        if last and query.filter(self._get_keyset_filter(last, desc)).has_rows():
+            self._hook._next_cursor = encode_event_cursor(*last)
+
+    def _get_sort_params(self):
+        args = request.args.to_dict()
+        order = get_query_parameter(args, ['o', 'order'])
+        desc = get_query_parameter(args, ['c', 'descending']) == 'yes'
+        limit = get_query_parameter(args, ['n', 'limit'])
+        offset = get_query_parameter(args, ['O', 'offset'])
+        return order, desc, limit, offset
+
+    def _is_keyset_paginated(self, order, offset):
+        return order in {None, 'start'} and not offset
+
+    def _get_keyset_filter(self, keyset, desc):
+        key = db.tuple_(Event.start_dt, Event.id)
+        return key < keyset if desc else key > keyset
 
     def _filter_event(self, event):
         if self._room or self._location or self._eventType:
@@ -505,11 +606,16 @@ class CategoryEventFetcher(IteratedDataFetcher, SerializerBase):
                     return False
         return True
 
-    def _update_query(self, query):
-        order = get_query_parameter(request.args.to_dict(), ['o', 'order'])
-        desc = get_query_parameter(request.args.to_dict(), ['c', 'descending']) == 'yes'
-        limit = get_query_parameter(request.args.to_dict(), ['n', 'limit'])
-        offset = get_query_parameter(request.args.to_dict(), ['O', 'offset'])
+    def _update_query(self, query, paginate=True):
+        order, desc, limit, offset = self._get_sort_params()
+
+        if self._is_keyset_paginated(order, offset):
+            query = query.order_by(*((Event.start_dt.desc(), Event.id.desc()) if desc else (Event.start_dt, Event.id)))
+            if self._cursor:
+                query = query.filter(self._get_keyset_filter(self._cursor, desc))
+            return query.limit(limit) if paginate and limit else query
+        elif self._cursor:
+            raise HTTPAPIError('A cursor cannot be used with an offset or when not sorting by start date', 400)
 
         col = {
             'start': Event.start_dt,
@@ -519,19 +625,21 @@ class CategoryEventFetcher(IteratedDataFetcher, SerializerBase):
         }.get(order)
         if col:
             query = query.order_by(col.desc() if desc else col)
-        if limit:
+        if paginate and limit:
             query = query.limit(limit)
-        if offset:
+        if paginate and offset:
             query = query.offset(offset)
 
         return query
 
     def serialize_events(self, events):
-        return map(self._build_event_api_data, events)
+        for event in events:
+            yield self._build_event_api_data(event)
 
     def _serialize_category_path(self, category):
         visibility = {'id': None, 'name': 'Everywhere'}
-        path = [self._serialize_path_entry(category_data) for category_data in category.chain]
+        path = [self._serialize_path_entry(category_data)
+                for category_data in get_category_tree().get_chain(category.id)]
         if category.visibility is not None:
             try:
                 path_segment = path[-category.visibility]
@@ -554,7 +662,7 @@ class CategoryEventFetcher(IteratedDataFetcher, SerializerBase):
 
     def _build_category_path_data(self, ids):
         return [{'_type': 'CategoryPath', 'categoryId': category.id, 'path': self._serialize_category_path(category)}
-                for category in Category.query.filter(Category.id.in_(ids)).options(undefer('chain'))]
+                for category in Category.query.filter(Category.id.in_(ids))]
 
     def _build_event_api_data(self, event):
         can_manage = self.user is not None and event.can_manage(self.user)
@@ -575,7 +683,7 @@ class CategoryEventFetcher(IteratedDataFetcher, SerializerBase):
             'material': build_material_legacy_api_data(event) + filter(None, [build_note_legacy_api_data(event.note)])
         })
 
-        event_category_path = event.category.chain
+        event_category_path = get_category_tree().get_chain(event.category_id)
         visibility = {'id': '', 'name': 'Everywhere'}
         if event.visibility is None:
             pass  # keep default
@@ -725,9 +833,10 @@ class EventSearchFetcher(IteratedDataFetcher):
                 query = query.order_by(sort_dir(db.func.lower(Event.title)))
 
             counter = 0
+            checker = ProtectionChecker(self._user)
             # Query the DB in chunks of 1000 records per query until the limit is satisfied
             for event in query.yield_per(1000):
-                if event.can_access(self._user):
+                if checker.can_access(event):
                     counter += 1
                     # Start yielding only when the counter reaches the given offset
                     if (self._offset is None) or (counter > self._offset):
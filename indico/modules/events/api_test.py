@@ -0,0 +1,117 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+from flask import request
+
+import indico.web.http_api  # noqa  isort:skip  # the hooks can only be imported from there
+from indico.modules.events import Event
+from indico.modules.events.api import (CategoryEventFetcher, CategoryEventHook, decode_event_cursor,
+                                       encode_event_cursor)
+from indico.web.http_api.responses import HTTPAPIError
+
+
+START_DT = pytz.utc.localize(datetime(2018, 6, 18, 8, 0))
+
+
+def _fetch(app, category, **params):
+    with app.test_request_context('/export/categ/{}.json'.format(category.id), query_string=params):
+        hook = CategoryEventHook(request.args.to_dict(), 'categ', {'idlist': unicode(category.id)}, 'json')
+        hook._getParams()
+        fetcher = CategoryEventFetcher(None, hook)
+        query = Event.query.filter(Event.category == category, ~Event.is_deleted)
+        ids = [event.id for event in fetcher._iter_events(query)]
+        return ids, fetcher.category_extra({category.id}).get('nextCursor')
+
+
+@pytest.fixture
+def events(create_event, dummy_category):
+    # the first three events start at the same time so the keyset needs
+    # the id to continue after an event
+    start_dts = [START_DT, START_DT, START_DT, START_DT + timedelta(hours=1), START_DT + timedelta(hours=2)]
+    return [create_event(i, start_dt=start_dt, end_dt=start_dt + timedelta(hours=1), category=dummy_category)
+            for i, start_dt in enumerate(start_dts, 1)]
+
+
+def test_event_cursor():
+    dt = pytz.utc.localize(datetime(2018, 6, 18, 8, 30, 15, 123456))
+    cursor = encode_event_cursor(dt, 123)
+    assert '=' not in cursor
+    assert decode_event_cursor(cursor) == (dt, 123)
+
+
+@pytest.mark.parametrize('cursor', (
+    'x',
+    'MTIz',  # 123
+    'YWJjOjEyMw',  # abc:123
+    'MTIzOjQ1Njo3ODk',  # 123:456:789
+))
+def test_event_cursor_invalid(cursor):
+    with pytest.raises(HTTPAPIError) as exc_info:
+        decode_event_cursor(cursor)
+    assert exc_info.value.getCode() == 400
+
+
+def test_hook_cursor_invalid():
+    hook = CategoryEventHook({'cursor': 'x'}, 'categ', {'idlist': '0'}, 'json')
+    with pytest.raises(HTTPAPIError) as exc_info:
+        hook._getParams()
+    assert exc_info.value.getCode() == 400
+
+
+@pytest.mark.parametrize(('desc', 'expected'), (
+    (False, [1, 2, 3, 4, 5]),
+    (True, [5, 4, 3, 2, 1]),
+))
+def test_keyset_batches(mocker, app, dummy_category, events, desc, expected):
+    mocker.patch.object(CategoryEventFetcher, 'BATCH_SIZE', 2)
+    params = {'c': 'yes'} if desc else {}
+    assert _fetch(app, dummy_category, **params) == (expected, None)
+    ids, cursor = _fetch(app, dummy_category, n='2', **params)
+    assert ids == expected[:2]
+    # continuing after an event which has the same start time as the next one
+    ids, cursor = _fetch(app, dummy_category, n='2', cursor=cursor, **params)
+    assert ids == expected[2:4]
+    ids, cursor = _fetch(app, dummy_category, n='2', cursor=cursor, **params)
+    assert ids == expected[4:]
+    assert cursor is None
+
+
+@pytest.mark.parametrize(('limit', 'has_more'), (
+    (3, True),
+    (4, True),
+    (5, False),
+    (6, False),
+))
+def test_next_cursor(mocker, app, dummy_category, events, limit, has_more):
+    mocker.patch.object(CategoryEventFetcher, 'BATCH_SIZE', 2)
+    ids, cursor = _fetch(app, dummy_category, n=unicode(limit))
+    assert ids == [1, 2, 3, 4, 5][:limit]
+    assert (cursor is not None) == has_more
+    if has_more:
+        assert decode_event_cursor(cursor) == (events[limit - 1].start_dt, limit)
+
+
+def test_next_cursor_offset(app, dummy_category, events):
+    # the cursor is only available when sorting by start date without an offset
+    assert _fetch(app, dummy_category, n='2', o='start', O='3') == ([4, 5], None)
+    assert _fetch(app, dummy_category, n='2', o='id') == ([1, 2], None)
@@ -30,6 +30,7 @@ _bp = IndicoBlueprint('contributions', __name__, template_folder='templates',
 _bp.add_url_rule('/manage/contributions/', 'manage_contributions', management.RHContributions)
 _bp.add_url_rule('/manage/contributions/customize', 'customize_contrib_list',
                  management.RHContributionListCustomize, methods=('GET', 'POST'))
+_bp.add_url_rule('/manage/contributions/page', 'manage_contributions_page', management.RHContributionListPage)
 _bp.add_url_rule('/manage/contributions/static-url', 'generate_static_url', management.RHContributionListStaticURL,
                  methods=('POST',))
 _bp.add_url_rule('/manage/contributions/create', 'manage_create_contrib', management.RHCreateContribution,
@@ -57,7 +57,7 @@ from indico.modules.events.sessions import Session
 from indico.modules.events.timetable.forms import ImportContributionsForm
 from indico.modules.events.timetable.operations import update_timetable_entry
 from indico.modules.events.tracks.models.tracks import Track
-from indico.modules.events.util import check_event_locked, get_field_values, track_time_changes
+from indico.modules.events.util import ListPageMixin, check_event_locked, get_field_values, track_time_changes
 from indico.util.date_time import format_datetime, format_human_timedelta
 from indico.util.i18n import _, ngettext
 from indico.util.spreadsheets import send_csv, send_xlsx
@@ -171,6 +171,10 @@ class RHContributionListStaticURL(RHManageContributionsBase):
         return jsonify(url=self.list_generator.generate_static_url())
 
 
+class RHContributionListPage(ListPageMixin, RHManageContributionsBase):
+    """Return a page of the contribution list as JSON"""
+
+
 class RHCreateContribution(RHManageContributionsBase):
     def _process(self):
         inherited_location = self.event.location_data
@@ -25,20 +25,16 @@ from sqlalchemy.orm import joinedload, subqueryload
 
 from indico.core.db import db
 from indico.modules.events.contributions.models.contributions import Contribution
-from indico.modules.events.util import ListGeneratorBase
+from indico.modules.events.util import ListGeneratorBase, PaginatedListGeneratorMixin
 from indico.util.i18n import _
 from indico.web.flask.templating import get_template_module
 
 
-class ContributionListGenerator(ListGeneratorBase):
-    """Listing and filtering actions in the contribution list."""
-
-    endpoint = '.manage_contributions'
-    list_link_type = 'contribution'
-    check_access = False
+class ContributionListGeneratorBase(ListGeneratorBase):
+    """Listing and filtering actions in a contribution list."""
 
     def __init__(self, event):
-        super(ContributionListGenerator, self).__init__(event)
+        super(ContributionListGeneratorBase, self).__init__(event)
         self.default_list_config = {'filters': {'items': {}}}
 
         session_empty = {None: _('No session')}
@@ -104,22 +100,55 @@ class ContributionListGenerator(ListGeneratorBase):
             criteria.append(db.or_(*column_criteria))
         return query.filter(*criteria)
 
+
+class ContributionListGenerator(PaginatedListGeneratorMixin, ContributionListGeneratorBase):
+    """Listing and filtering actions in the contribution management list."""
+
+    endpoint = '.manage_contributions'
+    list_link_type = 'contribution'
+
+    def get_sort_columns(self):
+        return {'id': Contribution.friendly_id,
+                'title': Contribution.title,
+                'duration': Contribution.duration,
+                'board_number': Contribution.board_number}
+
+    def serialize_list_entries(self, contributions):
+        return [{'id': contrib.id,
+                 'friendly_id': contrib.friendly_id,
+                 'title': contrib.title,
+                 'board_number': contrib.board_number,
+                 'start_dt': contrib.start_dt,
+                 'duration': int(contrib.duration.total_seconds() // 60),
+                 'session': {'id': contrib.session.id, 'title': contrib.session.title} if contrib.session else None,
+                 'track': {'id': contrib.track.id, 'title': contrib.track.title} if contrib.track else None,
+                 'type': {'id': contrib.type.id, 'name': contrib.type.name} if contrib.type else None,
+                 'speakers': [person.display_full_name
+                              for person in sorted(contrib.speakers, key=attrgetter('display_order_key'))],
+                 'subcontribution_count': contrib.subcontribution_count,
+                 'attachment_count': contrib.attachment_count}
+                for contrib in contributions]
+
+    def _get_total_duration(self):
+        """Get the total and the scheduled duration of the filtered contributions."""
+        query = self._filter_list_entries(Contribution.query.with_parent(self.event), self.list_config['filters'])
+        total, scheduled = query.with_entities(
+            db.func.sum(Contribution.duration),
+            db.func.sum(db.case([(Contribution.is_scheduled, Contribution.duration)]))
+        ).one()
+        return total or timedelta(), scheduled or timedelta()
+
     def get_list_kwargs(self):
-        if self.check_access:
-            self.event.preload_all_acl_entries()
         contributions_query = self._build_query()
-        total_entries = (sum(1 for c in contributions_query if c.can_access(session.user)) if self.check_access else
-                         contributions_query.count())
-        contributions = [c for c in self._filter_list_entries(contributions_query, self.list_config['filters'])
-                         if not self.check_access or c.can_access(session.user)]
+        filtered_query = self._filter_list_entries(contributions_query, self.list_config['filters'])
+        contributions, pagination = self._get_list_entries(filtered_query)
         sessions = [{'id': s.id, 'title': s.title, 'colors': s.colors} for s in self.event.sessions]
         tracks = [{'id': int(t.id), 'title': t.title} for t in self.event.tracks]
-        total_duration = (sum((c.duration for c in contributions), timedelta()),
-                          sum((c.duration for c in contributions if c.timetable_entry), timedelta()))
         selected_entry = request.args.get('selected')
         selected_entry = int(selected_entry) if selected_entry else None
-        return {'contribs': contributions, 'sessions': sessions, 'tracks': tracks, 'total_entries': total_entries,
-                'total_duration': total_duration, 'selected_entry': selected_entry}
+        return {'contribs': contributions, 'sessions': sessions, 'tracks': tracks,
+                'total_entries': contributions_query.count(), 'total_duration': self._get_total_duration(),
+                'pagination': pagination, 'page': self.get_current_page(), 'selected_entry': selected_entry}
 
     def render_list(self, contrib=None):
         """Render the contribution list template components.
@@ -135,11 +164,10 @@ class ContributionListGenerator(ListGeneratorBase):
         selected_entry = contrib_list_kwargs.pop('selected_entry')
         tpl_contrib = get_template_module('events/contributions/management/_contribution_list.html')
         tpl_lists = get_template_module('events/management/_lists.html')
-        contribs = contrib_list_kwargs['contribs']
-        filter_statistics = tpl_lists.render_filter_statistics(len(contribs), total_entries,
+        filter_statistics = tpl_lists.render_filter_statistics(contrib_list_kwargs['pagination'].total, total_entries,
                                                                contrib_list_kwargs.pop('total_duration'))
         return {'html': tpl_contrib.render_contrib_list(self.event, total_entries, **contrib_list_kwargs),
-                'hide_contrib': contrib not in contribs if contrib else None,
+                'hide_contrib': not self.is_entry_displayed(contrib) if contrib else None,
                 'filter_statistics': filter_statistics,
                 'selected_entry': selected_entry}
 
@@ -148,10 +176,18 @@ class ContributionListGenerator(ListGeneratorBase):
               .format(contrib.title), 'info')
 
 
-class ContributionDisplayListGenerator(ContributionListGenerator):
+class ContributionDisplayListGenerator(ContributionListGeneratorBase):
     endpoint = '.contribution_list'
     list_link_type = 'contribution_display'
-    check_access = True
+
+    def get_list_kwargs(self):
+        # the access checks cannot be done in the database
+        self.event.preload_all_acl_entries()
+        contributions_query = self._build_query()
+        total_entries = sum(1 for c in contributions_query if c.can_access(session.user))
+        contributions = [c for c in self._filter_list_entries(contributions_query, self.list_config['filters'])
+                         if c.can_access(session.user)]
+        return {'contribs': contributions, 'total_entries': total_entries}
 
     def render_contribution_list(self):
         """Render the contribution list template components.
@@ -0,0 +1,69 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+
+from datetime import timedelta
+
+import pytest
+
+from indico.modules.events.contributions.lists import ContributionDisplayListGenerator, ContributionListGenerator
+
+
+@pytest.mark.usefixtures('request_context')
+def test_list_page(dummy_event, create_contribution):
+    for i in xrange(5):
+        create_contribution(dummy_event, 'Contrib {}'.format(i), timedelta(minutes=10 * (5 - i)))
+    generator = ContributionListGenerator(dummy_event)
+    page = generator.get_list_page(page=2, page_size=2)
+    assert page['total'] == page['filtered'] == 5
+    assert page['pages'] == 3
+    assert [c['title'] for c in page['entries']] == ['Contrib 2', 'Contrib 3']
+    page = generator.get_list_page(page=1, page_size=2, sort='duration')
+    assert [c['title'] for c in page['entries']] == ['Contrib 4', 'Contrib 3']
+    assert page['entries'][0]['duration'] == 10
+    page = generator.get_list_page(page=3, page_size=2, sort='duration', desc=True)
+    assert [c['title'] for c in page['entries']] == ['Contrib 4']
+
+
+@pytest.mark.usefixtures('request_context')
+def test_list_page_filtered(dummy_event, create_contribution):
+    for i in xrange(3):
+        create_contribution(dummy_event, 'Contrib {}'.format(i), timedelta(minutes=20))
+    generator = ContributionListGenerator(dummy_event)
+    generator.list_config['filters'] = {'items': {'status': ['scheduled']}}
+    page = generator.get_list_page()
+    assert page['total'] == 3
+    assert page['filtered'] == 0
+    assert page['pages'] == 1
+    assert page['entries'] == []
+
+
+def test_list_kwargs_paginated(app, dummy_event, create_contribution):
+    for i in xrange(3):
+        create_contribution(dummy_event, 'Contrib {}'.format(i), timedelta(minutes=20))
+    with app.test_request_context(query_string={'page': '2'}):
+        generator = ContributionListGenerator(dummy_event)
+        generator.page_size = 2
+        kwargs = generator.get_list_kwargs()
+        assert kwargs['page'] == 2
+        assert kwargs['total_entries'] == kwargs['pagination'].total == 3
+        assert [c.title for c in kwargs['contribs']] == ['Contrib 2']
+        # the durations include the contributions on the other pages
+        assert kwargs['total_duration'] == (timedelta(hours=1), timedelta())
+
+
+def test_display_list_not_paginated():
+    assert not hasattr(ContributionDisplayListGenerator, 'get_list_page')
@@ -16,6 +16,7 @@
 
 from __future__ import unicode_literals
 
+import cPickle
 import os
 import posixpath
 import re
@@ -23,7 +24,9 @@ import tarfile
 from collections import OrderedDict, defaultdict
 from datetime import date, datetime
 from io import BytesIO
+from itertools import groupby
 from operator import itemgetter
+from tempfile import SpooledTemporaryFile
 from uuid import uuid4
 
 import click
@@ -51,9 +54,21 @@ from indico.modules.users.util import get_user_by_email
 from indico.util.console import cformat
 from indico.util.date_time import now_utc
 from indico.util.string import strict_unicode
+from indico.util.struct.iterables import grouper
 
 
+#: Number of exported rows stored in each file of the archive
+EXPORT_CHUNK_SIZE = 1000
+#: Maximum number of rows inserted with a single query during an import
+IMPORT_BATCH_SIZE = 500
+#: Size (in bytes) after which rows that are waiting to be exported are
+#: moved from memory to a temporary file
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
 _notset = object()
+# the C implementations are much faster than the pure-python ones
+_yaml_dumper = getattr(yaml, 'CDumper', yaml.Dumper)
+_yaml_loader = getattr(yaml, 'CLoader', yaml.Loader)
 
 
 def export_event(event, target_file):
@@ -100,9 +115,14 @@ def _make_globals(**extra):
     return globals_
 
 
-def _exec_custom(code, **extra):
-    """Execute a custom code snippet and return all non-underscored values."""
-    globals_ = _make_globals(**extra)
+def _exec_custom(code, globals_=None, **extra):
+    """Execute a custom code snippet and return all non-underscored values.
+
+    :param code: The code to execute, usually compiled in advance.
+    :param globals_: A dict created using :func:`_make_globals` which
+                     can be passed to avoid building it every time.
+    """
+    globals_ = dict(globals_, **extra) if globals_ is not None else _make_globals(**extra)
     locals_ = {}
     exec code in globals_, locals_
     return {unicode(k): v for k, v in locals_.iteritems() if k[0] != '_'}
@@ -121,6 +141,17 @@ def _resolve_col(col):
     return attr.prop.columns[0]
 
 
+def _compile_spec_code(code, name, mode='exec'):
+    """Compile a code snippet from the export spec.
+
+    :param code: A string containing Python code.
+    :param name: A name identifying the snippet in tracebacks.
+    :param mode: ``'exec'`` for statements, ``'eval'`` for a single
+                 expression.
+    """
+    return compile(code, '<export.yaml:{}>'.format(name), mode)
+
+
 def _get_single_fk(col):
     """Get the single-column FK constraint of the specified column."""
     # find the column-specific FK, not some compound fk containing this column
@@ -136,10 +167,36 @@ def _get_pk(table):
     return pks[0]
 
 
-def _get_inserted_pk(result):
-    """Get the single PK value inserted by a query"""
-    assert len(result.inserted_primary_key) == 1
-    return result.inserted_primary_key[0]
+def _needs_id(data):
+    """Check if an exported row needs its ID before being inserted."""
+    return any(isinstance(value, tuple) and value[0] in ('idref_set', 'file') for value in data.itervalues())
+
+
+class _SpooledRows(object):
+    """A sequence of exported rows that is moved to disk when it gets large.
+
+    Rows can only be read once, and only after all of them have been
+    added.
+    """
+
+    def __init__(self):
+        self._file = None
+        self._count = 0
+
+    def extend(self, rows):
+        for row in rows:
+            if self._file is None:
+                self._file = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+            cPickle.dump(row, self._file, cPickle.HIGHEST_PROTOCOL)
+            self._count += 1
+
+    def __iter__(self):
+        if self._file is None:
+            return
+        self._file.seek(0)
+        for __ in xrange(self._count):
+            yield cPickle.load(self._file)
+        self._file.close()
 
 
 class EventExporter(object):
@@ -151,8 +208,10 @@ class EventExporter(object):
         self.used_uuids = set()
         self.seen_rows = set()
         self.fk_map = self._get_reverse_fk_map()
+        self.globals = _make_globals()
         self.spec = self._load_spec()
         self.users = {}
+        self.id_ref_targets = {}
 
     def _add_file(self, name, size, data):
         if isinstance(data, basestring):
@@ -162,10 +221,19 @@ class EventExporter(object):
         self.archive.addfile(info, data)
 
     def serialize(self):
+        # the rows are written in chunks as soon as they have been
+        # serialized so we never need to keep all of them in memory
+        object_chunks = []
+        objects = self._serialize_objects(Event.__table__, Event.id == self.event.id)
+        for i, chunk in enumerate(grouper(objects, EXPORT_CHUNK_SIZE, skip_missing=True)):
+            name = 'objects-{:05d}.yaml'.format(i)
+            yaml_data = yaml.dump(list(chunk), indent=2, Dumper=_yaml_dumper)
+            self._add_file(name, len(yaml_data), yaml_data)
+            object_chunks.append(name)
         metadata = {
             'timestamp': now_utc(),
             'indico_version': indico.__version__,
-            'objects': list(self._serialize_objects(Event.__table__, Event.id == self.event.id)),
+            'object_chunks': object_chunks,
             'users': self.users
         }
         yaml_data = yaml.dump(metadata, indent=2)
@@ -179,6 +247,14 @@ class EventExporter(object):
             tablespec.setdefault('skipif', None)
             tablespec.setdefault('order', None)
             tablespec.setdefault('allow_duplicates', False)
+            tablespec['cols'] = {col: (_compile_spec_code(code, '{}.{}'.format(tablename, col))
+                                       if code is not None else None)
+                                 for col, code in tablespec['cols'].iteritems()}
+            if tablespec['skipif']:
+                tablespec['skipif'] = _compile_spec_code(tablespec['skipif'], tablename, 'eval')
+            if tablespec['order']:
+                order = eval(tablespec['order'], self.globals)
+                tablespec['order'] = order if isinstance(order, tuple) else (order,)
             fks = OrderedDict()
             for fk_name in tablespec['fks']:
                 col = _resolve_col(fk_name)
@@ -268,6 +344,18 @@ class EventExporter(object):
             }
         return type_, uuid
 
+    def _get_event_idref(self):
+        key = '{}.{}'.format(Event.__table__.fullname, Event.id.name)
+        assert key in self.id_map
+        return 'idref', self.id_map[key][self.event.id]
+
+    def _make_custom_idref(self, target, id_):
+        try:
+            target_column = self.id_ref_targets[target]
+        except KeyError:
+            target_column = self.id_ref_targets[target] = _resolve_col(target)
+        return self._make_idref(None, id_, target_column=target_column)
+
     def _make_value(self, value):
         """Convert values that need extra handling."""
         if isinstance(value, (date, datetime)):
@@ -315,14 +403,11 @@ class EventExporter(object):
             # This is mainly needed for self-referential FKs and CHECK
             # constraints that require certain objects to be exported before
             # the ones referencing them
-            order = eval(spec['order'], _make_globals())
-            if not isinstance(order, tuple):
-                order = (order,)
-            query = query.order_by(*order)
+            query = query.order_by(*spec['order'])
         query = query.order_by(*table.primary_key.columns)
-        cascaded = []
+        cascaded = _SpooledRows()
         for row in query:
-            if spec['skipif'] and eval(spec['skipif'], _make_globals(ROW=row)):
+            if spec['skipif'] and eval(spec['skipif'], self.globals, {'ROW': row}):
                 continue
             rowdict = row._asdict()
             pk = tuple(v for k, v in rowdict.viewitems() if table.c[k].primary_key)
@@ -344,16 +429,9 @@ class EventExporter(object):
                 elif col_custom is not _notset:
                     # column has custom code to process its value (and possibly name)
                     if value is not None:
-                        def _get_event_idref():
-                            key = '{}.{}'.format(Event.__table__.fullname, Event.id.name)
-                            assert key in self.id_map
-                            return 'idref', self.id_map[key][self.event.id]
-
-                        def _make_id_ref(target, id_):
-                            return self._make_idref(None, id_, target_column=_resolve_col(target))
-
-                        data.update(_exec_custom(col_custom, VALUE=value, MAKE_EVENT_REF=_get_event_idref,
-                                                 MAKE_ID_REF=_make_id_ref))
+                        data.update(_exec_custom(col_custom, self.globals, VALUE=value,
+                                                 MAKE_EVENT_REF=self._get_event_idref,
+                                                 MAKE_ID_REF=self._make_custom_idref))
                 elif col_fullname in self.fk_map:
                     # an FK references this column -> generate a uuid
                     data[col] = self._make_idref(colspec, value, incoming=colspec.primary_key)
@@ -377,7 +455,8 @@ class EventExporter(object):
             # serialize objects referencing the current row, but don't export them yet
             for col, fks in spec['fks'].iteritems():
                 value = rowdict[col]
-                cascaded += [x for fk in fks for x in self._serialize_objects(fk.table, value == fk)]
+                for fk in fks:
+                    cascaded.extend(self._serialize_objects(fk.table, value == fk))
         # we only add incoming fks after being done with all objects in case one
         # of the referenced objects references another object from the current table
         # that has not been serialized yet (e.g. abstract reviews proposing as duplicate)
@@ -393,13 +472,15 @@ class EventImporter(object):
         self.verbose = verbose
         self.force = force
         self.archive = tarfile.open(fileobj=source_file)
-        self.data = yaml.load(self.archive.extractfile('data.yaml'))
+        self.data = yaml.load(self.archive.extractfile('data.yaml'), Loader=_yaml_loader)
         self.id_map = {}
         self.user_map = {}
         self.event_id = None
         self.system_user_id = User.get_system_user().id
+        self.globals = _make_globals()
         self.spec = self._load_spec()
         self.deferred_idrefs = defaultdict(set)
+        self.resolved_idrefs = defaultdict(list)
 
     def _load_spec(self):
         def _resolve_col_name(col):
@@ -415,8 +496,12 @@ class EventImporter(object):
 
         spec = spec['import']
         spec['defaults'] = {_model_to_table(k): v for k, v in spec.get('defaults', {}).iteritems()}
-        spec['custom'] = {_model_to_table(k): v for k, v in spec.get('custom', {}).iteritems()}
-        spec['missing_users'] = {_resolve_col_name(k): v for k, v in spec.get('missing_users', {}).iteritems()}
+        spec['custom'] = {_model_to_table(k): {col: _compile_spec_code(code, '{}.{}'.format(k, col))
+                                               for col, code in v.iteritems()}
+                          for k, v in spec.get('custom', {}).iteritems()}
+        spec['missing_users'] = {_resolve_col_name(k): (_compile_spec_code(v, k)
+                                                        if v not in {'system', 'none', 'skip'} else v)
+                                 for k, v in spec.get('missing_users', {}).iteritems()}
         spec['verbose'] = {_model_to_table(k): _process_format(v) for k, v in spec.get('verbose', {}).iteritems()}
         return spec
 
@@ -481,8 +566,11 @@ class EventImporter(object):
                         .format(self.data['indico_version'], indico.__version__), fg='red')
             return None
         self._load_users(self.data)
-        for tablename, tabledata in self.data['objects']:
-            self._deserialize_object(db.metadata.tables[tablename], tabledata)
+        # consecutive rows of the same table are inserted together
+        for tablename, objects in groupby(self._iter_objects(), key=itemgetter(0)):
+            table = db.metadata.tables[tablename]
+            for batch in grouper(objects, IMPORT_BATCH_SIZE, skip_missing=True):
+                self._deserialize_objects(table, [data for __, data in batch])
         if self.deferred_idrefs:
             # Any reference to an ID that was exported need to be replaced
             # with an actual ID at some point - either immediately (if the
@@ -501,6 +589,15 @@ class EventImporter(object):
         db.session.flush()
         return event
 
+    def _iter_objects(self):
+        if 'objects' in self.data:
+            # archives created by older versions contain all rows in
+            # the main data file
+            return iter(self.data['objects'])
+        return (obj
+                for name in self.data['object_chunks']
+                for obj in yaml.load(self.archive.extractfile(name), Loader=_yaml_loader))
+
     def _associate_users_by_email(self, event):
         # link objects to users by email where possible
         # event principals
@@ -594,7 +691,59 @@ class EventImporter(object):
             'md5': md5
         }
 
-    def _deserialize_object(self, table, data):
+    def _deserialize_objects(self, table, rows):
+        """Import rows of a single table.
+
+        The IDs of rows which are referenced by other rows or need an
+        ID for their file are reserved in advance, so all the rows can
+        be inserted using a single query.
+        """
+        is_event = (table == Event.__table__)
+        reserved_ids = iter(self._reserve_ids(table, sum(1 for data in rows if _needs_id(data))))
+        insert_rows = []
+        for data in rows:
+            converted = self._convert_row(table, data)
+            if converted is None:
+                continue
+            insert_values, set_idref, file_data, deferred_idrefs = converted
+            pk_value = None
+            if set_idref is not None or file_data is not None or deferred_idrefs or is_event:
+                pk_name = _get_pk(table).name
+                assert pk_name not in insert_values
+                pk_value = next(reserved_ids, None) or self._reserve_ids(table, 1)[0]
+                insert_values[pk_name] = pk_value
+            if file_data is not None:
+                # restore a file from the import archive and save it in storage
+                insert_values.update(self._process_file(pk_value, file_data))
+            if self.verbose and table.fullname in self.spec['verbose']:
+                fmt = self.spec['verbose'][table.fullname]
+                click.echo(fmt.format(**insert_values))
+            insert_rows.append(insert_values)
+            if set_idref is not None:
+                # if a column was marked as having incoming FKs, store
+                # the ID so the reference can be resolved to the ID
+                self._set_idref(set_idref, pk_value)
+            if is_event:
+                self.event_id = pk_value
+            for col, uuid in deferred_idrefs.iteritems():
+                # store all the data needed to resolve a deferred ID reference
+                # later once the ID is available
+                self.deferred_idrefs[uuid].add((table, col, pk_value))
+        # a multi-row insert needs the same columns in all rows; rows
+        # using different columns are inserted separately but keep their
+        # order since they may reference each other
+        for __, group in groupby(insert_rows, key=sorted):
+            db.session.execute(table.insert().values(list(group)))
+        self._update_resolved_idrefs()
+
+    def _convert_row(self, table, data):
+        """Convert an exported row to the values to insert.
+
+        :return: A tuple containing the values to insert, the UUID used
+                 to reference the row, the data of the row's file and a
+                 dict mapping columns to the UUIDs of rows which have not
+                 been imported yet, or ``None`` if the row is skipped.
+        """
         is_event = (table == Event.__table__)
         import_defaults = self.spec['defaults'].get(table.fullname, {})
         import_custom = self.spec['custom'].get(table.fullname, {})
@@ -624,7 +773,7 @@ class EventImporter(object):
                 # custom python code to process the imported value
                 def _resolve_id_ref(value):
                     return self._convert_value(colspec, value)
-                rv = _exec_custom(import_custom[col], VALUE=value, RESOLVE_ID_REF=_resolve_id_ref)
+                rv = _exec_custom(import_custom[col], self.globals, VALUE=value, RESOLVE_ID_REF=_resolve_id_ref)
                 assert rv.keys() == [col]
                 insert_values[col] = rv[col]
                 continue
@@ -648,40 +797,34 @@ class EventImporter(object):
             # anything referencing it will also be skipped
             if set_idref is not None:
                 self.id_map[set_idref] = None
-            return
+            return None
         elif missing_user_exec:
             # run custom code to deal with missing users
             for code in missing_user_exec:
-                insert_values.update(_exec_custom(code))
-        if file_data is not None:
-            # restore a file from the import archive and save it in storage
-            pk_name = _get_pk(table).name
-            assert pk_name not in insert_values
-            # get an ID early since we use it in the filename
-            stmt = db.func.nextval(db.func.pg_get_serial_sequence(table.fullname, pk_name))
-            insert_values[pk_name] = pk_value = db.session.query(stmt).scalar()
-            insert_values.update(self._process_file(pk_value, file_data))
-        if self.verbose and table.fullname in self.spec['verbose']:
-            fmt = self.spec['verbose'][table.fullname]
-            click.echo(fmt.format(**insert_values))
-        res = db.session.execute(table.insert(), insert_values)
-        if set_idref is not None:
-            # if a column was marked as having incoming FKs, store
-            # the ID so the reference can be resolved to the ID
-            self._set_idref(set_idref, _get_inserted_pk(res))
-        if is_event:
-            self.event_id = _get_inserted_pk(res)
-        for col, uuid in deferred_idrefs.iteritems():
-            # store all the data needed to resolve a deferred ID reference
-            # later once the ID is available
-            self.deferred_idrefs[uuid].add((table, col, _get_inserted_pk(res)))
+                insert_values.update(_exec_custom(code, self.globals))
+        return insert_values, set_idref, file_data, deferred_idrefs
+
+    def _reserve_ids(self, table, count):
+        """Get the next IDs from the sequence of a table's PK."""
+        if not count:
+            return []
+        sequence = db.func.pg_get_serial_sequence(table.fullname, _get_pk(table).name)
+        query = db.session.query(db.func.nextval(sequence)).select_from(db.func.generate_series(1, count))
+        return [id_ for id_, in query]
 
     def _set_idref(self, uuid, id_):
         self.id_map[uuid] = id_
-        # update all the previously-deferred ID references
+        # the previously-deferred ID references are updated once the
+        # row with the ID has been inserted
         for table, col, pk_value in self.deferred_idrefs.pop(uuid, ()):
+            self.resolved_idrefs[table, col].append({'_pk_value': pk_value, '_ref_value': id_})
+
+    def _update_resolved_idrefs(self):
+        for (table, col), values in self.resolved_idrefs.iteritems():
             pk = _get_pk(table)
-            db.session.execute(table.update().where(pk == pk_value).values({col: id_}))
+            stmt = table.update().where(pk == db.bindparam('_pk_value')).values({col: db.bindparam('_ref_value')})
+            db.session.execute(stmt, values)
+        self.resolved_idrefs.clear()
 
 
 class IdRefDeferred(Exception):
@@ -71,12 +71,15 @@ def test_event_export(db, dummy_event, monkeypatch):
     f.seek(0)
 
     with open(os.path.join(os.path.dirname(__file__), 'export_test_1.yaml'), 'r') as ref_file:
-        data_yaml_content = ref_file.read()
+        expected = yaml.load(ref_file)
 
-    # check composition of tarfile and data.yaml content
+    # check composition of tarfile and the exported data
     with tarfile.open(fileobj=f) as tarf:
-        assert tarf.getnames() == ['data.yaml']
-        assert tarf.extractfile('data.yaml').read() == data_yaml_content
+        assert tarf.getnames() == ['objects-00000.yaml', 'data.yaml']
+        data = yaml.load(tarf.extractfile('data.yaml'))
+        assert data.pop('object_chunks') == ['objects-00000.yaml']
+        data['objects'] = yaml.load(tarf.extractfile('objects-00000.yaml'))
+        assert data == expected
 
 
 @pytest.mark.usefixtures('reproducible_uuids')
@@ -97,9 +100,7 @@ def test_event_attachment_export(db, dummy_event, dummy_attachment):
     f.seek(0)
 
     with tarfile.open(fileobj=f) as tarf:
-        data_file = tarf.extractfile('data.yaml')
-        data = yaml.load(data_file)
-        objs = data['objects']
+        objs = yaml.load(tarf.extractfile('objects-00000.yaml'))
         event_uid = objs[0][1]['id'][1]
 
         # check that the exported metadata contains all the right objects
@@ -117,7 +118,7 @@ def test_event_attachment_export(db, dummy_event, dummy_attachment):
         assert file_['size'] == 11
         assert file_['md5'] == '5eb63bbbe01eeed093cb22bb8f5acdc3'
         # check that the file itself was included (and verify content)
-        assert tarf.getnames() == ['00000000-0000-4000-8000-000000000013', 'data.yaml']
+        assert tarf.getnames() == ['00000000-0000-4000-8000-000000000013', 'objects-00000.yaml', 'data.yaml']
         assert tarf.extractfile('00000000-0000-4000-8000-000000000013').read() == 'hello world'
 
 
@@ -158,3 +159,31 @@ def test_event_import(db, dummy_user):
     assert attachment.title == 'dummy_attachment'
     # Check that the actual file is accessible
     assert attachment.file.open().read() == 'hello world'
+
+
+def test_event_export_import_chunked(db, dummy_event, dummy_user, monkeypatch):
+    monkeypatch.setattr('indico.modules.events.export.EXPORT_CHUNK_SIZE', 2)
+    monkeypatch.setattr('indico.modules.events.export.IMPORT_BATCH_SIZE', 2)
+    dummy_event.creator = dummy_user
+    sessions = [Session(event=dummy_event, title='s{}'.format(i)) for i in xrange(3)]
+    for i in xrange(5):
+        Contribution(event=dummy_event, title='c{}'.format(i), session=sessions[i % 3],
+                     duration=timedelta(minutes=30))
+    db.session.flush()
+
+    f = BytesIO()
+    export_event(dummy_event, f)
+    f.seek(0)
+    with tarfile.open(fileobj=f) as tarf:
+        data = yaml.load(tarf.extractfile('data.yaml'))
+        assert len(data['object_chunks']) > 1
+        assert 'objects' not in data
+    f.seek(0)
+
+    e = import_event(f, create_users=False)
+    assert e != dummy_event
+    assert e.creator == dummy_user
+    assert sorted(s.title for s in e.sessions) == ['s0', 's1', 's2']
+    assert {c.title: c.session.title for c in e.contributions} == {'c0': 's0', 'c1': 's1', 'c2': 's2',
+                                                                   'c3': 's0', 'c4': 's1'}
+    assert all(c.session.event == e for c in e.contributions)
@@ -21,8 +21,9 @@ from mock import MagicMock
 
 from indico.core import signals
 from indico.core.db.sqlalchemy.principals import EmailPrincipal, PrincipalType
-from indico.core.db.sqlalchemy.protection import ProtectionMode
+from indico.core.db.sqlalchemy.protection import ProtectionChecker, ProtectionMode
 from indico.core.permissions import get_available_permissions
+from indico.modules.categories import Category
 from indico.modules.events import Event
 from indico.modules.events.models.principals import EventPrincipal
 from indico.testing.util import bool_matrix
@@ -361,6 +362,73 @@ def test_can_manage_permissions_invalid(create_event, dummy_user):
         event.can_manage(dummy_user, permission='invalid')
 
 
+@pytest.mark.usefixtures('request_context')
+def test_filter_accessible(db, create_event, create_category, create_user, dummy_user):
+    user = create_user(123)
+    protected_categ = create_category(1, title='protected', protection_mode=ProtectionMode.protected)
+    protected_categ.update_principal(user, read_access=True)
+    events = [create_event(protection_mode=ProtectionMode.public),
+              create_event(protection_mode=ProtectionMode.protected),
+              create_event(protection_mode=ProtectionMode.protected),
+              create_event(protection_mode=ProtectionMode.inheriting, category=protected_categ),
+              create_event(protection_mode=ProtectionMode.inheriting)]
+    events[2].update_principal(dummy_user, read_access=True)
+    db.session.flush()
+    for u in (None, dummy_user, user):
+        expected = [e for e in events if e.can_access(u)]
+        assert Event.filter_accessible(events, u) == expected
+    assert Event.filter_accessible(events, dummy_user) == [events[0], events[2], events[4]]
+
+
+@pytest.mark.usefixtures('request_context')
+@pytest.mark.parametrize('allow_admin', (True, False))
+def test_protection_checker(db, create_event, create_category, create_user, dummy_user, allow_admin):
+    user = create_user(123)
+    admin = create_user(456, admin=True)
+    protected_categ = create_category(1, title='protected', protection_mode=ProtectionMode.protected)
+    protected_categ.update_principal(user, full_access=True)
+    events = [create_event(protection_mode=ProtectionMode.public),
+              create_event(protection_mode=ProtectionMode.protected),
+              create_event(protection_mode=ProtectionMode.protected),
+              create_event(protection_mode=ProtectionMode.inheriting, category=protected_categ),
+              create_event(protection_mode=ProtectionMode.inheriting)]
+    events[1].update_principal(dummy_user, full_access=True)
+    events[2].update_principal(dummy_user, read_access=True)
+    db.session.flush()
+    for u in (None, dummy_user, user, admin):
+        checker = ProtectionChecker(u, allow_admin=allow_admin)
+        for event in events:
+            assert checker.can_access(event) == event.can_access(u, allow_admin=allow_admin)
+            assert checker.can_manage(event) == bool(u and event.can_manage(u, allow_admin=allow_admin))
+
+
+@pytest.mark.usefixtures('request_context')
+def test_protection_checker_parent_cached(mocker, create_event, dummy_category, dummy_user):
+    check_access = mocker.spy(Category, '_check_access_rules')
+    check_manage = mocker.spy(Category, '_check_manage_rules')
+    events = [create_event(protection_mode=ProtectionMode.inheriting, category=dummy_category) for _ in range(3)]
+    checker = ProtectionChecker(dummy_user)
+    assert all(checker.can_access(event) for event in events)
+    assert not any(checker.can_manage(event) for event in events)
+    # once for the category and once for the root category
+    assert check_access.call_count == 2
+    assert check_manage.call_count == 2
+
+
+@pytest.mark.usefixtures('request_context')
+@pytest.mark.parametrize('signal_rv', (True, False))
+def test_protection_checker_signal_override(create_event, dummy_user, signal_rv):
+    def _signal_fn(sender, **kwargs):
+        return signal_rv
+
+    event = create_event(protection_mode=ProtectionMode.protected)
+    checker = ProtectionChecker(dummy_user)
+    with signals.acl.can_access.connected_to(_signal_fn, sender=Event):
+        with signals.acl.can_manage.connected_to(_signal_fn, sender=Event):
+            assert checker.can_access(event) == signal_rv
+            assert checker.can_manage(event) == signal_rv
+
+
 def test_merge_privs():
     p = EventPrincipal(read_access=True, permissions={'foo', 'bar'})
     p.merge_privs(EventPrincipal(permissions={'bar', 'foobar'}, full_access=True))
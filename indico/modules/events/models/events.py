@@ -16,18 +16,19 @@
 
 from __future__ import unicode_literals
 
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 from contextlib import contextmanager
 from datetime import timedelta
 
 import pytz
 from flask import has_request_context, session
-from sqlalchemy import DDL, orm
+from sqlalchemy import DDL, inspect, orm
 from sqlalchemy.dialects.postgresql import ARRAY, JSON
 from sqlalchemy.event import listens_for
 from sqlalchemy.ext.declarative import declared_attr
 from sqlalchemy.ext.hybrid import hybrid_method, hybrid_property
-from sqlalchemy.orm import column_property
+from sqlalchemy.orm import column_property, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.orm.base import NEVER_SET, NO_VALUE
 from sqlalchemy.sql import select
 
@@ -100,6 +101,7 @@ class Event(SearchableTitleMixin, DescriptionMixin, LocationMixin, ProtectionMan
     def __auto_table_args(cls):
         return (db.Index('ix_events_start_dt_desc', cls.start_dt.desc()),
                 db.Index('ix_events_end_dt_desc', cls.end_dt.desc()),
+                db.Index('ix_events_start_dt_id', cls.start_dt, cls.id),
                 db.Index('ix_events_not_deleted_category', cls.is_deleted, cls.category_id),
                 db.Index('ix_events_not_deleted_category_dates',
                          cls.is_deleted, cls.category_id, cls.start_dt, cls.end_dt),
@@ -438,6 +440,23 @@ class Event(SearchableTitleMixin, DescriptionMixin, LocationMixin, ProtectionMan
         cte = Category.get_tree_cte()
         return (cte.c.id == Event.category_id) & cte.c.path.overlap(category_ids)
 
+    @classmethod
+    def preload_protection_data(cls, events):
+        """Load the ACLs of the events and their category chains at once."""
+        from indico.modules.events.models.principals import EventPrincipal
+        events = [e for e in events if e.id is not None]
+        unloaded = [e for e in events if 'acl_entries' in inspect(e).unloaded]
+        if unloaded:
+            acl_entries = defaultdict(set)
+            for entry in EventPrincipal.find(EventPrincipal.event_id.in_({e.id for e in unloaded})):
+                acl_entries[entry.event_id].add(entry)
+            for event in unloaded:
+                set_committed_value(event, 'acl_entries', acl_entries[event.id])
+        category_ids = {e.category_id for e in events if e.category_id is not None}
+        if not category_ids:
+            return []
+        return Category._get_chain_query(Category.id.in_(category_ids)).options(joinedload('acl_entries')).all()
+
     @classmethod
     def is_visible_in(cls, category):
         """
@@ -0,0 +1,189 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+
+"""Modification times of events and categories.
+
+Nothing in the database records when an event or a category was last
+modified, and changes to the objects belonging to them (contributions,
+attachments, ACL entries, etc.) would not be covered by a column in the
+event or category table anyway.  Instead, the events and categories
+affected by the objects written to the database are collected whenever
+the session is flushed, and once the transaction has been committed the
+current time is stored in the cache for each of them.
+
+This lets e.g. the HTTP API tell whether the data it exports changed
+without loading it.
+"""
+
+from __future__ import unicode_literals
+
+import time
+from datetime import timedelta
+from itertools import chain
+
+from sqlalchemy import inspect
+from sqlalchemy.event import listens_for
+from sqlalchemy.orm import Session
+
+from indico.core.db import db
+from indico.legacy.common.cache import GenericCache
+from indico.modules.categories import Category
+from indico.modules.categories.tree import get_category_tree
+from indico.modules.events import Event
+
+
+#: How long a modification time is kept in the cache.  Once it expired,
+#: the event or category is considered modified at the time it is used
+#: the next time.
+TIMESTAMP_TTL = timedelta(days=30)
+
+#: Attributes leading from an object to the object it belongs to, if it
+#: does not have an `event` or `category` itself
+_PARENT_ATTRS = ('attachment', 'folder', 'subcontribution', 'contribution', 'session_block', 'session',
+                 'linked_object')
+
+_cache = GenericCache('modification-times')
+
+
+def _get_owner(obj):
+    """Get the event or category an object belongs to."""
+    while obj is not None and not isinstance(obj, (Event, Category)):
+        event = getattr(obj, 'event', None)
+        if isinstance(event, Event):
+            return event
+        category = getattr(obj, 'category', None)
+        if isinstance(category, Category):
+            return category
+        parents = (getattr(obj, attr, None) for attr in _PARENT_ATTRS)
+        obj = next((parent for parent in parents if isinstance(parent, db.Model) and parent is not obj), None)
+    return obj
+
+
+def _get_previous_ids(obj, relationship):
+    """Get the ids a many-to-one relationship pointed to before the flush."""
+    attrs = inspect(obj).attrs
+    ids = {x.id for x in attrs[relationship].history.deleted if x is not None}
+    ids.update(x for x in attrs[relationship + '_id'].history.deleted if x is not None)
+    return ids
+
+
+def _get_chain_ids(tree, category_id):
+    try:
+        return [entry['id'] for entry in tree.get_chain(category_id)]
+    except KeyError:
+        # the category does not exist (anymore)
+        return [category_id]
+
+
+def _get_last_modified(keys):
+    if not keys:
+        return None
+    timestamps = _cache.get_multi(keys)
+    missing = {key for key, timestamp in timestamps.iteritems() if timestamp is None}
+    if missing:
+        # we do not know when these objects were modified (or the cache
+        # has been cleared), so they are considered modified just now
+        now = time.time()
+        _cache.set_multi(dict.fromkeys(missing, now), TIMESTAMP_TTL)
+        timestamps.update(dict.fromkeys(missing, now))
+    return max(timestamps.itervalues())
+
+
+def get_categories_last_modified(category_ids):
+    """Get the time when the contents of categories were last modified.
+
+    This covers changes to the categories, their subcategories and the
+    events in them (including the objects belonging to the events), but
+    also changes to the parent categories since e.g. their protection
+    affects who can see the contents of the categories.
+
+    :param category_ids: The IDs of the categories.
+    :return: A UTC timestamp or ``None`` if no categories were given.
+    """
+    tree = get_category_tree()
+    keys = set()
+    for category_id in category_ids:
+        keys.add('tree:{}'.format(category_id))
+        keys.update('category:{}'.format(id_) for id_ in _get_chain_ids(tree, category_id))
+    return _get_last_modified(keys)
+
+
+def get_events_last_modified(event_ids):
+    """Get the time when events were last modified.
+
+    This covers changes to the events and the objects belonging to them
+    as well as changes to their categories.
+
+    :param event_ids: The IDs of the events.
+    :return: A UTC timestamp or ``None`` if no events were given.
+    """
+    keys = {'event:{}'.format(id_) for id_ in event_ids}
+    if keys:
+        tree = get_category_tree()
+        query = (db.session.query(Event.category_id)
+                 .filter(Event.id.in_(event_ids), Event.category_id.isnot(None))
+                 .distinct())
+        for category_id, in query:
+            keys.update('category:{}'.format(id_) for id_ in _get_chain_ids(tree, category_id))
+    return _get_last_modified(keys)
+
+
+@listens_for(Session, 'after_flush')
+def _collect_modifications(session, flush_context):
+    event_ids = set()
+    category_ids = set()
+    # categories whose contents changed, i.e. they and all their parents
+    tree_category_ids = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        owner = _get_owner(obj)
+        if isinstance(owner, Event):
+            event_ids.add(owner.id)
+            tree_category_ids.add(owner.category_id)
+            if owner is obj:
+                tree_category_ids |= _get_previous_ids(obj, 'category')
+        elif isinstance(owner, Category):
+            category_ids.add(owner.id)
+            tree_category_ids.add(owner.id)
+            if owner is obj:
+                tree_category_ids |= _get_previous_ids(obj, 'parent')
+    tree_category_ids.discard(None)
+    if not event_ids and not category_ids and not tree_category_ids:
+        return
+    keys = session.info.setdefault('modified_objects', set())
+    keys.update('event:{}'.format(id_) for id_ in event_ids)
+    keys.update('category:{}'.format(id_) for id_ in category_ids)
+    if tree_category_ids:
+        tree = get_category_tree()
+        for category_id in tree_category_ids:
+            keys.update('tree:{}'.format(id_) for id_ in _get_chain_ids(tree, category_id))
+
+
+@listens_for(Session, 'after_commit')
+def _publish_modifications(session):
+    if session.transaction.nested:
+        return
+    keys = session.info.pop('modified_objects', None)
+    if keys:
+        _cache.set_multi(dict.fromkeys(keys, time.time()), TIMESTAMP_TTL)
+
+
+@listens_for(Session, 'after_soft_rollback')
+def _discard_modifications(session, previous_transaction):
+    # when rolling back a savepoint, the collected modifications are kept
+    # since marking too many objects as modified is harmless
+    if previous_transaction.parent is None:
+        session.info.pop('modified_objects', None)
@@ -0,0 +1,123 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+
+from datetime import timedelta
+
+import pytest
+from mock import MagicMock
+
+from indico.modules.events import modifications
+
+
+@pytest.fixture
+def mock_time(mocker):
+    time = mocker.patch('indico.modules.events.modifications.time')
+    time.time.return_value = 1000.0
+    return time.time
+
+
+def _publish(*keys):
+    session = MagicMock(info={'modified_objects': set(keys)})
+    session.transaction.nested = False
+    modifications._publish_modifications(session)
+
+
+def test_last_modified_unknown(mock_time):
+    assert modifications._get_last_modified(set()) is None
+    # objects without a known modification time are modified "now"
+    assert modifications._get_last_modified({'event:1', 'category:0'}) == 1000
+    mock_time.return_value = 2000.0
+    assert modifications._get_last_modified({'event:1', 'category:0'}) == 1000
+    assert modifications._get_last_modified({'event:1', 'event:2'}) == 2000
+
+
+def test_publish(mock_time):
+    modifications._get_last_modified({'event:1', 'event:2'})
+    mock_time.return_value = 2000.0
+    _publish('event:2', 'tree:0')
+    mock_time.return_value = 3000.0
+    assert modifications._get_last_modified({'event:1'}) == 1000
+    assert modifications._get_last_modified({'event:1', 'event:2'}) == 2000
+    assert modifications._get_last_modified({'tree:0'}) == 2000
+
+
+def test_discard(mock_time):
+    session = MagicMock(info={'modified_objects': {'event:1'}})
+    transaction = MagicMock()
+    transaction.parent = None
+    modifications._discard_modifications(session, transaction)
+    assert not session.info
+    modifications._publish_modifications(session)
+    assert modifications._get_last_modified({'event:1'}) == 1000
+
+
+def test_collect_event_changes(db, dummy_event, create_contribution):
+    db.session.flush()
+    db.session.info.pop('modified_objects', None)
+    contrib = create_contribution(dummy_event, 'Test', timedelta(minutes=10))
+    category = dummy_event.category
+    assert db.session.info['modified_objects'] == {'event:{}'.format(dummy_event.id),
+                                                   'tree:{}'.format(category.parent.id),
+                                                   'tree:{}'.format(category.id)}
+    db.session.info.pop('modified_objects')
+    contrib.title = 'Changed'
+    db.session.flush()
+    assert 'event:{}'.format(dummy_event.id) in db.session.info['modified_objects']
+
+
+def test_collect_moved_event(db, dummy_event, create_category):
+    old_category = dummy_event.category
+    new_category = create_category(1, title='new')
+    db.session.flush()
+    db.session.info.pop('modified_objects', None)
+    dummy_event.move(new_category)
+    db.session.flush()
+    keys = db.session.info['modified_objects']
+    assert 'event:{}'.format(dummy_event.id) in keys
+    assert 'tree:{}'.format(old_category.id) in keys
+    assert 'tree:{}'.format(new_category.id) in keys
+
+
+def test_collect_category_changes(db, create_category):
+    parent = create_category(1, title='parent')
+    category = create_category(2, title='child', parent=parent)
+    db.session.flush()
+    db.session.info.pop('modified_objects', None)
+    category.title = 'changed'
+    db.session.flush()
+    assert db.session.info['modified_objects'] == {'category:2', 'tree:2', 'tree:1', 'tree:0'}
+
+
+def test_get_last_modified(db, dummy_event, create_category, mock_time):
+    other = create_category(1, title='other')
+    db.session.flush()
+    event_id = dummy_event.id
+    category_id = dummy_event.category.id
+    assert modifications.get_events_last_modified([event_id]) == 1000
+    assert modifications.get_categories_last_modified([category_id]) == 1000
+    mock_time.return_value = 2000.0
+    _publish('tree:{}'.format(other.id), 'category:{}'.format(other.id))
+    assert modifications.get_events_last_modified([event_id]) == 1000
+    assert modifications.get_categories_last_modified([category_id]) == 1000
+    assert modifications.get_categories_last_modified([category_id, other.id]) == 2000
+    # the protection of the root category affects everything
+    mock_time.return_value = 3000.0
+    _publish('category:0')
+    assert modifications.get_events_last_modified([event_id]) == 3000
+    assert modifications.get_categories_last_modified([category_id]) == 3000
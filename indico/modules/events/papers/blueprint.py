@@ -90,6 +90,8 @@ _bp.add_url_rule('/manage/papers/schedule', 'schedule_cfp', management.RHSchedul
                  methods=('GET', 'POST'))
 _bp.add_url_rule('/manage/papers/open', 'open_cfp', management.RHOpenCFP, methods=('POST',))
 _bp.add_url_rule('/manage/papers/close', 'close_cfp', management.RHCloseCFP, methods=('POST',))
+_bp.add_url_rule('/manage/papers/assignment-list/page', 'papers_list_page', paper.RHPapersListPage,
+                 defaults={'management': True})
 
 # URLs available in both management and display areas
 # Note: When adding a new one here make sure to specify `defaults=defaults`
@@ -32,7 +32,7 @@ from indico.modules.events.papers.models.revisions import PaperRevisionState
 from indico.modules.events.papers.operations import judge_paper, update_reviewing_roles
 from indico.modules.events.papers.settings import PaperReviewingRole
 from indico.modules.events.papers.views import WPDisplayJudgingArea, WPManagePapers
-from indico.modules.events.util import ZipGeneratorMixin
+from indico.modules.events.util import ListPageMixin, ZipGeneratorMixin
 from indico.util.fs import secure_filename
 from indico.util.i18n import _, ngettext
 from indico.web.util import jsonify_data, jsonify_form, jsonify_template
@@ -77,6 +77,10 @@ class RHPapersList(RHPapersListBase):
         return 'management/assignment.html' if self.management else 'display/judging_area.html'
 
 
+class RHPapersListPage(ListPageMixin, RHPapersListBase):
+    """Return a page of the paper list as JSON"""
+
+
 class RHCustomizePapersList(RHPapersListBase):
     """Filter options and columns to display for the paper list"""
 
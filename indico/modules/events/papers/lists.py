@@ -26,7 +26,7 @@ from indico.core.db import db
 from indico.modules.events.contributions import Contribution
 from indico.modules.events.papers.models.revisions import PaperRevision, PaperRevisionState
 from indico.modules.events.papers.settings import PaperReviewingRole
-from indico.modules.events.util import ListGeneratorBase
+from indico.modules.events.util import ListGeneratorBase, PaginatedListGeneratorMixin
 from indico.modules.users import User
 from indico.util.i18n import _
 from indico.web.flask.templating import get_template_module
@@ -139,13 +139,14 @@ class PaperListGeneratorBase(ListGeneratorBase):
         list_config = self._get_config()
         contributions_query = self._build_query()
         total_entries = contributions_query.count()
-        contributions = self._filter_list_entries(contributions_query, self.list_config['filters']).all()
+        contributions, pagination = self._get_list_entries(self._filter_list_entries(contributions_query,
+                                                                                     self.list_config['filters']))
         selected_entry = request.args.get('selected')
         selected_entry = int(selected_entry) if selected_entry else None
         static_item_ids, dynamic_item_ids = self._split_item_ids(list_config['items'], 'static')
         static_columns = self._get_static_columns(static_item_ids)
         return {'contribs': contributions, 'total_entries': total_entries, 'selected_entry': selected_entry,
-                'static_columns': static_columns}
+                'static_columns': static_columns, 'pagination': pagination}
 
     def render_list(self):
         """Render the contribution list template components.
@@ -159,14 +160,15 @@ class PaperListGeneratorBase(ListGeneratorBase):
         selected_entry = contrib_list_kwargs.pop('selected_entry')
         tpl_contrib = get_template_module('events/papers/_paper_list.html')
         tpl_lists = get_template_module('events/management/_lists.html')
-        contribs = contrib_list_kwargs['contribs']
-        filter_statistics = tpl_lists.render_displayed_entries_fragment(len(contribs), total_entries)
+        pagination = contrib_list_kwargs['pagination']
+        filtered_entries = pagination.total if pagination else len(contrib_list_kwargs['contribs'])
+        filter_statistics = tpl_lists.render_displayed_entries_fragment(filtered_entries, total_entries)
         return {'html': tpl_contrib.render_paper_assignment_list(self.event, total_entries, **contrib_list_kwargs),
                 'filter_statistics': filter_statistics,
                 'selected_entry': selected_entry}
 
 
-class PaperAssignmentListGenerator(PaperListGeneratorBase):
+class PaperAssignmentListGenerator(PaginatedListGeneratorMixin, PaperListGeneratorBase):
     """Listing and filtering actions in a paper assignment list."""
 
     endpoint = '.papers_list'
@@ -179,9 +181,30 @@ class PaperAssignmentListGenerator(PaperListGeneratorBase):
             'filters': {'items': {}}
         }
 
+    def get_sort_columns(self):
+        return {'id': Contribution.friendly_id,
+                'title': Contribution.title}
+
+    def serialize_list_entries(self, contributions):
+        def _serialize_users(users):
+            return [{'id': user.id, 'full_name': user.display_full_name} for user in users]
+
+        return [{'id': contrib.id,
+                 'friendly_id': contrib.friendly_id,
+                 'title': contrib.title,
+                 'state': contrib.paper.state.name if contrib.paper else None,
+                 'track_id': contrib.track_id,
+                 'session_id': contrib.session_id,
+                 'type_id': contrib.type_id,
+                 'judges': _serialize_users(contrib.paper_judges),
+                 'content_reviewers': _serialize_users(contrib.paper_content_reviewers),
+                 'layout_reviewers': _serialize_users(contrib.paper_layout_reviewers)}
+                for contrib in contributions]
+
     def get_list_kwargs(self):
         kwargs = super(PaperAssignmentListGenerator, self).get_list_kwargs()
         kwargs['management'] = True
+        kwargs['page'] = self.get_current_page()
         return kwargs
 
 
@@ -59,6 +59,8 @@ _bp.add_url_rule('/manage/registration/<int:reg_form_id>/registrations/', 'manag
                  reglists.RHRegistrationsListManage)
 _bp.add_url_rule('/manage/registration/<int:reg_form_id>/registrations/customize', 'customize_reglist',
                  reglists.RHRegistrationsListCustomize, methods=('GET', 'POST'))
+_bp.add_url_rule('/manage/registration/<int:reg_form_id>/registrations/page', 'manage_reglist_page',
+                 reglists.RHRegistrationsListPage)
 _bp.add_url_rule('/manage/registration/<int:reg_form_id>/registrations/static-url', 'generate_static_url',
                  reglists.RHRegistrationListStaticURL, methods=('POST',))
 _bp.add_url_rule('/manage/registration/<int:reg_form_id>/registrations/create', 'create_registration',
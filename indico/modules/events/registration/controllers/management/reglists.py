@@ -50,11 +50,12 @@ from indico.modules.events.registration.models.items import PersonalDataType, Re
 from indico.modules.events.registration.models.registrations import Registration, RegistrationData, RegistrationState
 from indico.modules.events.registration.notifications import notify_registration_state_update
 from indico.modules.events.registration.settings import event_badge_settings
+from indico.modules.events.registration.tasks import notify_imported_registrations
 from indico.modules.events.registration.util import (create_registration, generate_spreadsheet_from_registrations,
                                                      get_event_section_data, get_ticket_attachments, get_title_uuid,
                                                      import_registrations_from_csv, make_registration_form)
 from indico.modules.events.registration.views import WPManageRegistration
-from indico.modules.events.util import ZipGeneratorMixin
+from indico.modules.events.util import ListPageMixin, ZipGeneratorMixin
 from indico.modules.users import User
 from indico.util.fs import secure_filename
 from indico.util.i18n import _, ngettext
@@ -85,8 +86,13 @@ class RHRegistrationsListManage(RHManageRegFormBase):
                            if tpl.type == TemplateType.badge]
         has_tickets = any(tpl.is_ticket for tpl in badge_templates)
         has_badges = any(not tpl.is_ticket for tpl in badge_templates)
+        has_pending_registrations = (Registration.query.with_parent(self.regform)
+                                     .filter(Registration.state == RegistrationState.pending, ~Registration.is_deleted)
+                                     .has_rows())
         return WPManageRegistration.render_template('management/regform_reglist.html', self.event,
-                                                    has_badges=has_badges, has_tickets=has_tickets, **reg_list_kwargs)
+                                                    has_badges=has_badges, has_tickets=has_tickets,
+                                                    has_pending_registrations=has_pending_registrations,
+                                                    **reg_list_kwargs)
 
 
 class RHRegistrationsListCustomize(RHManageRegFormBase):
@@ -117,6 +123,10 @@ class RHRegistrationListStaticURL(RHManageRegFormBase):
         return jsonify(url=self.list_generator.generate_static_url())
 
 
+class RHRegistrationsListPage(ListPageMixin, RHManageRegFormBase):
+    """Return a page of the registrations list as JSON"""
+
+
 class RHRegistrationDetails(RHManageRegistrationBase):
     """Displays information about a registration"""
 
@@ -379,8 +389,10 @@ class RHRegistrationsImport(RHRegistrationsActionBase):
         if form.validate_on_submit():
             skip_moderation = self.regform.moderation_enabled and form.skip_moderation.data
             registrations = import_registrations_from_csv(self.regform, form.source_file.data,
-                                                          skip_moderation=skip_moderation,
-                                                          notify_users=form.notify_users.data)
+                                                          skip_moderation=skip_moderation)
+            db.session.commit()
+            notify_imported_registrations.delay(self.regform, [r.id for r in registrations], session.user,
+                                                form.notify_users.data)
             flash(ngettext("{} registration has been imported.",
                            "{} registrations have been imported.",
                            len(registrations)).format(len(registrations)), 'success')
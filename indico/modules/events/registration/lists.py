@@ -26,12 +26,12 @@ from indico.modules.events.registration.models.form_fields import (RegistrationF
                                                                    RegistrationFormPersonalDataField)
 from indico.modules.events.registration.models.items import PersonalDataType, RegistrationFormItem
 from indico.modules.events.registration.models.registrations import Registration, RegistrationData, RegistrationState
-from indico.modules.events.util import ListGeneratorBase
+from indico.modules.events.util import ListGeneratorBase, PaginatedListGeneratorMixin
 from indico.util.i18n import _
 from indico.web.flask.templating import get_template_module
 
 
-class RegistrationListGenerator(ListGeneratorBase):
+class RegistrationListGenerator(PaginatedListGeneratorMixin, ListGeneratorBase):
     """Listing and filtering actions in the registration list."""
 
     endpoint = '.manage_reglist'
@@ -139,6 +139,32 @@ class RegistrationListGenerator(ListGeneratorBase):
                 .options(joinedload('data').joinedload('field_data').joinedload('field'))
                 .order_by(db.func.lower(Registration.last_name), db.func.lower(Registration.first_name)))
 
+    def get_sort_columns(self):
+        return {'id': Registration.friendly_id,
+                'first_name': db.func.lower(Registration.first_name),
+                'last_name': db.func.lower(Registration.last_name),
+                'email': Registration.email,
+                'reg_date': Registration.submitted_dt,
+                'state': Registration.state,
+                'checked_in_date': Registration.checked_in_dt}
+
+    def serialize_list_entries(self, registrations):
+        static_item_ids, item_ids = self.get_item_ids()
+        return [{'id': registration.id,
+                 'friendly_id': registration.friendly_id,
+                 'full_name': registration.display_full_name,
+                 'email': registration.email,
+                 'state': registration.state.name,
+                 'submitted_dt': registration.submitted_dt,
+                 'price': unicode(registration.price),
+                 'currency': registration.currency,
+                 'checked_in': registration.checked_in,
+                 'checked_in_dt': registration.checked_in_dt,
+                 'payment_dt': registration.payment_dt if 'payment_date' in static_item_ids else None,
+                 'fields': {data.field_data.field_id: data.friendly_data for data in registration.data
+                            if data.field_data.field_id in item_ids}}
+                for registration in registrations]
+
     def _filter_list_entries(self, query, filters):
         if not (filters.get('fields') or filters.get('items')):
             return query
@@ -178,7 +204,8 @@ class RegistrationListGenerator(ListGeneratorBase):
         reg_list_config = self._get_config()
         registrations_query = self._build_query()
         total_entries = registrations_query.count()
-        registrations = self._filter_list_entries(registrations_query, reg_list_config['filters']).all()
+        registrations, pagination = self._get_list_entries(self._filter_list_entries(registrations_query,
+                                                                                     reg_list_config['filters']))
         dynamic_item_ids, static_item_ids = self._split_item_ids(reg_list_config['items'], 'dynamic')
         static_columns = self._get_static_columns(static_item_ids)
         regform_items = self._get_sorted_regform_items(dynamic_item_ids)
@@ -188,7 +215,9 @@ class RegistrationListGenerator(ListGeneratorBase):
             'total_registrations': total_entries,
             'static_columns': static_columns,
             'dynamic_columns': regform_items,
-            'filtering_enabled': total_entries != len(registrations)
+            'pagination': pagination,
+            'page': self.get_current_page(),
+            'filtering_enabled': total_entries != pagination.total
         }
 
     def get_list_export_config(self):
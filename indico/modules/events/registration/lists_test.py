@@ -0,0 +1,90 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+
+from io import BytesIO
+
+import pytest
+
+from indico.modules.events.registration.lists import RegistrationListGenerator
+from indico.modules.events.registration.models.forms import RegistrationForm
+from indico.modules.events.registration.models.registrations import RegistrationState
+from indico.modules.events.registration.util import create_personal_data_fields, import_registrations_from_csv
+
+
+@pytest.fixture
+def dummy_regform(db, dummy_event):
+    regform = RegistrationForm(event=dummy_event, title='Registration Form', currency='USD')
+    create_personal_data_fields(regform)
+
+    # enable all fields
+    for field in regform.sections[0].fields:
+        field.is_enabled = True
+    db.session.add(regform)
+    db.session.flush()
+    return regform
+
+
+@pytest.fixture
+def dummy_registrations(dummy_regform):
+    csv = b'\n'.join([b'John,Doe,,,,jdoe@example.com',
+                      b'Jane,Smith,,,,jane@example.com',
+                      b'Billy Bob,Doe,,,,billy@example.com',
+                      b'Alice,Brown,,,,alice@example.com',
+                      b'Bob,Adams,,,,bob@example.com'])
+    return import_registrations_from_csv(dummy_regform, BytesIO(csv))
+
+
+@pytest.mark.usefixtures('request_context', 'dummy_registrations')
+def test_list_page(dummy_regform):
+    generator = RegistrationListGenerator(dummy_regform)
+    page = generator.get_list_page(page=2, page_size=2)
+    assert page['total'] == page['filtered'] == 5
+    assert page['pages'] == 3
+    assert [r['full_name'] for r in page['entries']] == ['Billy Bob Doe', 'John Doe']
+    assert page['entries'][0]['state'] == RegistrationState.complete.name
+    page = generator.get_list_page(page=1, page_size=2, sort='first_name', desc=True)
+    assert [r['full_name'] for r in page['entries']] == ['John Doe', 'Jane Smith']
+
+
+@pytest.mark.usefixtures('request_context')
+def test_list_page_filtered(dummy_regform, dummy_registrations):
+    dummy_registrations[0].state = RegistrationState.pending
+    generator = RegistrationListGenerator(dummy_regform)
+    generator.list_config['filters'] = {'fields': {}, 'items': {'state': [RegistrationState.pending.value]}}
+    page = generator.get_list_page()
+    assert page['total'] == 5
+    assert page['filtered'] == 1
+    assert [r['full_name'] for r in page['entries']] == ['John Doe']
+
+
+@pytest.mark.usefixtures('dummy_registrations')
+def test_list_kwargs_paginated(app, dummy_regform):
+    with app.test_request_context(query_string={'page': '3'}):
+        generator = RegistrationListGenerator(dummy_regform)
+        generator.page_size = 2
+        kwargs = generator.get_list_kwargs()
+        assert kwargs['page'] == 3
+        assert kwargs['total_registrations'] == kwargs['pagination'].total == 5
+        assert not kwargs['filtering_enabled']
+        assert [r.full_name for r in kwargs['registrations']] == ['Jane Smith']
+    # pages past the end of the list show its last page
+    with app.test_request_context(query_string={'page': '10'}):
+        generator = RegistrationListGenerator(dummy_regform)
+        generator.page_size = 2
+        assert [r.full_name for r in generator.get_list_kwargs()['registrations']] == ['Jane Smith']
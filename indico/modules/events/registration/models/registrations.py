@@ -431,7 +431,7 @@ class Registration(db.Model):
     def render_price_adjustment(self):
         return self._render_price(self.price_adjustment)
 
-    def sync_state(self, _skip_moderation=True):
+    def sync_state(self, _skip_moderation=True, _send_signal=True):
         """Sync the state of the registration"""
         initial_state = self.state
         regform = self.registration_form
@@ -453,7 +453,7 @@ class Registration(db.Model):
         elif self.state == RegistrationState.complete:
             if payment_required:
                 self.state = RegistrationState.unpaid
-        if self.state != initial_state:
+        if _send_signal and self.state != initial_state:
             signals.event.registration_state_updated.send(self, previous_state=initial_state)
 
     def update_state(self, approved=None, paid=None, rejected=None, _skip_moderation=False):
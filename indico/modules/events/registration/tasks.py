@@ -0,0 +1,60 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+
+from indico.core import signals
+from indico.core.celery import celery
+from indico.core.db import db
+from indico.core.notifications import flush_email_queue
+from indico.modules.events.logs import EventLogKind, EventLogRealm
+from indico.modules.events.registration import logger
+from indico.modules.events.registration.models.registrations import Registration
+from indico.modules.events.registration.notifications import notify_registration_creation
+from indico.util.struct.iterables import grouper
+
+
+# Number of imported registrations processed in one transaction
+NOTIFICATION_BATCH_SIZE = 100
+
+
+@celery.task(request_context=True)
+def notify_imported_registrations(regform, registration_ids, user, notify_users):
+    """Do what's usually done when a registration is created.
+
+    This sends the emails and signals for registrations created by
+    :func:`.import_registrations_from_csv` and logs them.
+
+    :param regform: The registration form.
+    :param registration_ids: The IDs of the imported registrations.
+    :param user: The user who imported the registrations.
+    :param notify_users: Whether to send emails to the registrants.
+    """
+    event = regform.event
+    done = 0
+    for ids in grouper(registration_ids, NOTIFICATION_BATCH_SIZE, skip_missing=True):
+        registrations = Registration.query.filter(Registration.id.in_(ids)).order_by(Registration.id).all()
+        for registration in registrations:
+            signals.event.registration_state_updated.send(registration, previous_state=None)
+            notify_registration_creation(registration, notify_users)
+            event.log(EventLogRealm.participants, EventLogKind.positive, 'Registration',
+                      'New registration: {}'.format(registration.full_name), user,
+                      data={'Email': registration.email})
+        db.session.commit()
+        flush_email_queue()
+        done += len(registrations)
+        logger.info('Processed %d/%d imported registrations in %r', done, len(registration_ids), regform)
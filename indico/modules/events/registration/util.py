@@ -18,7 +18,7 @@ from __future__ import unicode_literals
 
 import csv
 import itertools
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 from operator import attrgetter
 
 from flask import current_app, json, session
@@ -30,6 +30,7 @@ from wtforms import BooleanField, ValidationError
 from indico.core import signals
 from indico.core.config import config
 from indico.core.db import db
+from indico.core.db.sqlalchemy.util.queries import increment_and_get
 from indico.core.db.sqlalchemy.util.session import no_autoflush
 from indico.core.errors import UserValueError
 from indico.modules.events import EventLogKind, EventLogRealm
@@ -57,6 +58,10 @@ from indico.web.forms.base import IndicoForm
 from indico.web.forms.widgets import SwitchWidget
 
 
+#: The number of registrations inserted at once when importing them
+IMPORT_BATCH_SIZE = 500
+
+
 def get_title_uuid(regform, title):
     """Convert a string title to its UUID value
 
@@ -516,13 +521,43 @@ def update_regform_item_positions(regform):
             child.position = next(positions if child_active else disabled_positions)
 
 
-def import_registrations_from_csv(regform, fileobj, skip_moderation=True, notify_users=False):
-    """Import event registrants from a CSV file into a form."""
-    reader = csv.reader(fileobj.read().splitlines())
+def _get_users_by_email(emails):
+    """Get the users with the given email addresses.
+
+    This is the same as calling :func:`get_user_by_email` for each of
+    the email addresses but uses a single query.
+    """
+    from indico.modules.users import User
+    from indico.modules.users.models.emails import UserEmail
+    query = (db.session.query(UserEmail.email, User)
+             .join(User, User.id == UserEmail.user_id)
+             .filter(UserEmail.email.in_(emails), ~User.is_deleted))
+    users = defaultdict(set)
+    for email, user in query:
+        users[email].add(user)
+    return {email: next(iter(matches)) for email, matches in users.iteritems() if len(matches) == 1}
+
+
+def _get_next_registration_ids(count):
+    """Reserve primary keys for new registrations.
+
+    Knowing the IDs in advance allows SQLAlchemy to insert the
+    registrations in batches instead of one at a time.
+    """
+    sequence = db.func.pg_get_serial_sequence(Registration.__table__.fullname, 'id')
+    query = db.session.query(db.func.nextval(sequence)).select_from(db.func.generate_series(1, count))
+    return [id_ for id_, in query]
+
+
+def _read_registrations_csv(regform, fileobj):
+    """Read and validate the rows of a registration CSV file."""
+    # the file is read line by line; splitting each line again takes
+    # care of files which only use \r as the line separator
+    reader = csv.reader(line for chunk in fileobj for line in chunk.splitlines())
     query = db.session.query(Registration.email).with_parent(regform).filter(Registration.is_active)
     registered_emails = {email for (email,) in query}
     used_emails = set()
-    todo = []
+    rows = []
     for row_num, row in enumerate(reader, 1):
         try:
             first_name, last_name, affiliation, position, phone, email = [to_unicode(value).strip() for value in row]
@@ -543,7 +578,7 @@ def import_registrations_from_csv(regform, fileobj, skip_moderation=True, notify
             raise UserValueError(_('Row {}: email address is not unique').format(row_num))
 
         used_emails.add(email)
-        todo.append({
+        rows.append({
             'email': email,
             'first_name': first_name.title(),
             'last_name': last_name.title(),
@@ -551,5 +586,77 @@ def import_registrations_from_csv(regform, fileobj, skip_moderation=True, notify
             'phone': phone,
             'position': position
         })
-    return [create_registration(regform, data, notify_user=notify_users, skip_moderation=skip_moderation)
-            for data in todo]
+    return rows
+
+
+@no_autoflush
+def _create_imported_registrations(regform, rows, skip_moderation):
+    """Create registrations for validated rows of an import.
+
+    Everything needed by all registrations is loaded upfront and the
+    registrations are inserted in batches.  Unlike
+    :func:`create_registration` this neither sends notifications nor
+    triggers signals; that's done by :func:`.notify_imported_registrations`
+    once the registrations have been committed.
+    """
+    if not rows:
+        return []
+    emails = [row['email'] for row in rows]
+    users = _get_users_by_email(emails)
+    invitations = {}
+    invitation_query = (RegistrationInvitation.query
+                        .with_parent(regform)
+                        .filter(RegistrationInvitation.email.in_(emails),
+                                RegistrationInvitation.registration_id.is_(None))
+                        .order_by(RegistrationInvitation.id))
+    for invitation in invitation_query:
+        invitations.setdefault(invitation.email, invitation)
+    fields = regform.active_fields
+    registration_ids = _get_next_registration_ids(len(rows))
+    last_friendly_id = increment_and_get(Event._last_friendly_registration_id, Event.id == regform.event_id,
+                                         len(rows))
+    friendly_ids = xrange(last_friendly_id - len(rows) + 1, last_friendly_id + 1)
+    registrations = []
+    for row_num, (data, id_, friendly_id) in enumerate(itertools.izip(rows, registration_ids, friendly_ids), 1):
+        registration = Registration(id=id_, friendly_id=friendly_id, registration_form=regform,
+                                    event_id=regform.event_id, user=users.get(data['email']),
+                                    base_price=regform.base_price, currency=regform.currency)
+        for form_item in fields:
+            if form_item.parent.is_manager_only:
+                value = form_item.field_impl.default_value
+            else:
+                value = data.get(form_item.html_field_name)
+            data_entry = RegistrationData()
+            registration.data.append(data_entry)
+            for attr, value in form_item.field_impl.process_form_data(registration, value).iteritems():
+                setattr(data_entry, attr, value)
+            if form_item.type == RegistrationFormItemType.field_pd and form_item.personal_data_type.column:
+                setattr(registration, form_item.personal_data_type.column, value)
+        invitation = invitations.get(data['email'])
+        if invitation:
+            invitation.state = InvitationState.accepted
+            invitation.registration = registration
+        registration.sync_state(_skip_moderation=skip_moderation, _send_signal=False)
+        registrations.append(registration)
+        if row_num % IMPORT_BATCH_SIZE == 0:
+            db.session.flush()
+            logger.info('Imported %d/%d registrations into %r', row_num, len(rows), regform)
+    db.session.flush()
+    return registrations
+
+
+def import_registrations_from_csv(regform, fileobj, skip_moderation=True):
+    """Import event registrants from a CSV file into a form.
+
+    All rows are validated before any registration is created.
+
+    Since importing many registrations with notifications and signals
+    for each of them would be very slow, the caller needs to run
+    :func:`.notify_imported_registrations` for the returned
+    registrations after committing them.
+    """
+    registrations = _create_imported_registrations(regform, _read_registrations_csv(regform, fileobj),
+                                                   skip_moderation)
+    user = session.user if session else None
+    logger.info('%d registrations imported into %r by %s', len(registrations), regform, user)
+    return registrations
@@ -19,9 +19,14 @@ from __future__ import unicode_literals
 from io import BytesIO
 
 import pytest
+from mock import MagicMock
 
+from indico.core import signals
 from indico.core.errors import UserValueError
+from indico.modules.events.logs import EventLogRealm
 from indico.modules.events.registration.models.forms import RegistrationForm
+from indico.modules.events.registration.models.invitations import InvitationState, RegistrationInvitation
+from indico.modules.events.registration.tasks import notify_imported_registrations
 from indico.modules.events.registration.util import (create_personal_data_fields, create_registration,
                                                      import_registrations_from_csv)
 
@@ -71,6 +76,48 @@ def test_import_registrations(dummy_regform, dummy_user):
     assert 'phone' not in data
 
 
+def test_import_registrations_batches(monkeypatch, db, dummy_regform, dummy_user):
+    monkeypatch.setattr('indico.modules.events.registration.util.IMPORT_BATCH_SIZE', 2)
+    invitation = RegistrationInvitation(registration_form=dummy_regform, email='jane@example.com',
+                                        first_name='Jane', last_name='Smith', affiliation='ACME Inc.')
+    db.session.add(invitation)
+    db.session.flush()
+    csv = b'\n'.join([b'John,Doe,,,,jdoe@example.com',
+                      b'Jane,Smith,,,,jane@example.com',
+                      b'Billy Bob,Doe,,,,1337@example.com',
+                      b'Alice,Brown,,,,alice@example.com',
+                      b'Bob,Adams,,,,bob@example.com'])
+    registrations = import_registrations_from_csv(dummy_regform, BytesIO(csv))
+    assert [r.friendly_id for r in registrations] == [1, 2, 3, 4, 5]
+    assert len({r.id for r in registrations}) == 5
+    assert all(r.registration_form == dummy_regform and r.state.name == 'complete' for r in registrations)
+    assert registrations[2].user == dummy_user
+    assert invitation.state == InvitationState.accepted
+    assert invitation.registration == registrations[1]
+    # logging the registrations is left to the notification task
+    assert not dummy_regform.event.log_entries.all()
+
+
+def test_notify_imported_registrations(mocker, monkeypatch, dummy_regform, dummy_user):
+    monkeypatch.setattr('indico.modules.events.registration.tasks.NOTIFICATION_BATCH_SIZE', 2)
+    notify = mocker.patch('indico.modules.events.registration.tasks.notify_registration_creation')
+    mocker.patch('indico.modules.events.registration.tasks.flush_email_queue')
+    csv = b'\n'.join([b'John,Doe,,,,jdoe@example.com',
+                      b'Jane,Smith,,,,jane@example.com',
+                      b'Billy Bob,Doe,,,,1337@example.com'])
+    registrations = import_registrations_from_csv(dummy_regform, BytesIO(csv))
+    receiver = MagicMock()
+    with signals.event.registration_state_updated.connected_to(receiver):
+        notify_imported_registrations(dummy_regform, [r.id for r in registrations], dummy_user, False)
+    assert {call[0][0] for call in receiver.call_args_list} == set(registrations)
+    assert {call[0][0] for call in notify.call_args_list} == set(registrations)
+    assert all(call[0][1] is False for call in notify.call_args_list)
+    entries = dummy_regform.event.log_entries.all()
+    assert len(entries) == 3
+    assert all(entry.realm == EventLogRealm.participants and entry.user == dummy_user for entry in entries)
+    assert {entry.data['Email'] for entry in entries} == {r.email for r in registrations}
+
+
 def test_import_error(dummy_regform):
     create_registration(dummy_regform, {
         'email': 'boss@example.com',
@@ -23,11 +23,11 @@ import warnings
 from collections import defaultdict
 from contextlib import contextmanager
 from copy import deepcopy
+from functools import partial
 from mimetypes import guess_extension
 from tempfile import NamedTemporaryFile
-from zipfile import ZipFile
 
-from flask import current_app, flash, g, redirect, request, session
+from flask import current_app, flash, g, jsonify, redirect, request, session, stream_with_context
 from sqlalchemy import inspect
 from sqlalchemy.orm import load_only, noload
 from werkzeug.exceptions import BadRequest, Forbidden
@@ -49,12 +49,14 @@ from indico.modules.events.sessions.models.sessions import Session
 from indico.modules.events.timetable.models.breaks import Break
 from indico.modules.events.timetable.models.entries import TimetableEntry
 from indico.modules.networks import IPNetworkGroup
-from indico.util.fs import chmod_umask, secure_filename
+from indico.util.date_time import utc_to_server
+from indico.util.fs import secure_filename
 from indico.util.i18n import _
 from indico.util.string import strip_tags
 from indico.util.user import principal_from_fossil
+from indico.util.zip import generate_zip
 from indico.web.flask.templating import get_template_module
-from indico.web.flask.util import send_file, url_for
+from indico.web.flask.util import url_for
 from indico.web.forms.colors import get_colors
 
 
@@ -340,6 +342,22 @@ class ListGeneratorBase(object):
         """Apply user's filters to query and return it."""
         raise NotImplementedError
 
+    def _get_list_entries(self, query):
+        """Get the entries to show in the list.
+
+        :param query: The query of the list's entries with the user's
+                      filters applied.
+        :return: A tuple containing the list of entries and the
+                 `Pagination` of the list, or `None` if the list is
+                 not paginated.
+        """
+        return query.all(), None
+
+    def is_entry_displayed(self, entry):
+        """Check whether an entry matches the user's filters."""
+        query = self._filter_list_entries(self._build_query(), self.list_config['filters'])
+        return query.filter(type(entry).id == entry.id).has_rows()
+
     def _get_filters_from_request(self):
         """Get the new filters after the filter form is submitted."""
         def get_selected_options(item_id, item):
@@ -389,6 +407,133 @@ class ListGeneratorBase(object):
         raise NotImplementedError
 
 
+class PaginatedListGeneratorMixin(object):
+    """Mixin for list generators showing the list's entries page by page.
+
+    Filtering, sorting and counting is done in the database, so only
+    the entries on the current page are loaded.  The mixin needs to
+    come before :class:`ListGeneratorBase` in the bases of the list
+    generator.
+    """
+
+    #: The default number of entries on a page of the list
+    page_size = 50
+    #: The maximum number of entries on a page of the list
+    max_page_size = 500
+
+    def _get_page_session_key(self):
+        return '{}_page_{}'.format(self.list_link_type, self.entry_parent.id)
+
+    def get_current_page(self):
+        """Get the page of the list to show.
+
+        The page is taken from the ``page`` argument in the query
+        string, which may also be ``all`` to show all entries at once.
+        It is remembered in the session so the list stays on the same
+        page when it is refreshed after modifying its entries.
+        """
+        session_key = self._get_page_session_key()
+        page = request.args.get('page')
+        if page is None:
+            return session.get(session_key, 1)
+        if page != 'all':
+            try:
+                page = int(page)
+            except ValueError:
+                raise BadRequest('Invalid page')
+            if page < 1:
+                raise BadRequest('Invalid page')
+        session[session_key] = page
+        return page
+
+    def _get_list_entries(self, query):
+        page = self.get_current_page()
+        if page == 'all':
+            pagination = query.paginate(show_all=True)
+        else:
+            pagination = query.paginate(page=page, per_page=self.page_size)
+            if not pagination.items and page > 1:
+                # entries were deleted or filtered out since the page was selected
+                pagination = query.paginate(page=max(1, pagination.pages), per_page=self.page_size)
+        return pagination.items, pagination
+
+    def store_configuration(self):
+        super(PaginatedListGeneratorMixin, self).store_configuration()
+        # the previously selected page may not exist with the new filters
+        session.pop(self._get_page_session_key(), None)
+
+    def get_sort_columns(self):
+        """Return the columns the list's entries can be sorted by.
+
+        :return: A dict mapping the names of the columns to the SQL
+                 expressions used to sort them.
+        """
+        return {}
+
+    def serialize_list_entries(self, entries):
+        """Serialize the list's entries for :meth:`get_list_page`.
+
+        :return: A list of JSON-serializable objects.
+        """
+        raise NotImplementedError
+
+    def get_list_page(self, page=1, page_size=None, sort=None, desc=False):
+        """Get a page of the list's entries matching the user's filters.
+
+        Filtering, sorting and counting is done in the database, so
+        only the entries on the requested page are loaded.
+
+        :param page: The number of the page, starting at 1.
+        :param page_size: The number of entries per page.
+        :param sort: The name of a column from :meth:`get_sort_columns`;
+                     if omitted, the list's default order is used.
+        :param desc: Whether to sort in descending order.
+        :return: A dict containing the serialized ``entries`` of the
+                 page, the number of entries before (``total``) and
+                 after (``filtered``) applying the filters and the
+                 number of ``pages``.
+        """
+        page_size = min(page_size or self.page_size, self.max_page_size)
+        query = self._build_query()
+        total = query.order_by(None).count()
+        filtered_query = self._filter_list_entries(query, self.list_config['filters'])
+        if sort is not None:
+            column = self.get_sort_columns()[sort]
+            entity = filtered_query.column_descriptions[0]['entity']
+            # sort by id as well to get a stable order for the pagination
+            filtered_query = (filtered_query.order_by(None)
+                              .order_by((column.desc() if desc else column.asc()).nullslast(), entity.id))
+        pagination = filtered_query.paginate(page=page, per_page=page_size)
+        return {'entries': self.serialize_list_entries(pagination.items),
+                'page': page,
+                'pages': max(1, pagination.pages),
+                'page_size': page_size,
+                'total': total,
+                'filtered': pagination.total}
+
+
+class ListPageMixin(object):
+    """Mixin for RHs returning a page of a list as JSON.
+
+    The RH needs to set ``list_generator``.  The ``page``,
+    ``page_size``, ``sort`` and ``desc`` arguments from the query
+    string are passed to
+    :meth:`PaginatedListGeneratorMixin.get_list_page`.
+    """
+
+    ALLOW_LOCKED = True
+
+    def _process(self):
+        page = request.args.get('page', 1, type=int)
+        page_size = request.args.get('page_size', type=int)
+        sort = request.args.get('sort')
+        if page < 1 or (page_size is not None and page_size < 1):
+            raise BadRequest('Invalid page')
+        if sort is not None and sort not in self.list_generator.get_sort_columns():
+            raise BadRequest('Invalid sort column')
+        return jsonify(self.list_generator.get_list_page(page, page_size, sort, desc=request.args.get('desc') == '1'))
+
+
 def get_base_ical_parameters(user, detail, path, params=None):
     """Returns a dict of all parameters expected by iCal template"""
 
@@ -645,29 +790,34 @@ class ZipGeneratorMixin:
         for f in files_holder:
             yield f
 
+    def _iter_zip_files(self, files_holder):
+        self.used_filenames = set()
+        for item in self._iter_items(files_holder):
+            name = self._prepare_folder_structure(item)
+            self.used_filenames.add(name)
+            created_dt = getattr(item, 'created_dt', None)
+            yield (name, partial(item.storage.open, item.storage_file_id), item.size,
+                   utc_to_server(created_dt).replace(tzinfo=None) if created_dt else None)
+
     def _generate_zip_file(self, files_holder, name_prefix='material', name_suffix=None):
         """Generate a zip file containing the files passed.
 
+        The zip file is streamed to the client while it is being
+        generated, reading the files directly from their storage.
+
         :param files_holder: An iterable (or an iterable containing) object that
                              contains the files to be added in the zip file.
         :param name_prefix: The prefix to the zip file name
         :param name_suffix: The suffix to the zip file name
-        :return: The generated zip file.
+        :return: A response containing the generated zip file.
         """
-
-        temp_file = NamedTemporaryFile(suffix='indico.tmp', dir=config.TEMP_DIR)
-        with ZipFile(temp_file.name, 'w', allowZip64=True) as zip_handler:
-            self.used_filenames = set()
-            for item in self._iter_items(files_holder):
-                name = self._prepare_folder_structure(item)
-                self.used_filenames.add(name)
-                with item.storage.get_local_path(item.storage_file_id) as filepath:
-                    zip_handler.write(filepath.encode('utf-8'), name)
-
-        temp_file.delete = False
+        # build the file list while we can still access the database
+        files = list(self._iter_zip_files(files_holder))
         zip_file_name = '{}-{}.zip'.format(name_prefix, name_suffix) if name_suffix else '{}.zip'.format(name_prefix)
-        chmod_umask(temp_file.name)
-        return send_file(zip_file_name, temp_file.name, 'application/zip', inline=False)
+        response = current_app.response_class(stream_with_context(generate_zip(files)), mimetype='application/zip',
+                                              direct_passthrough=True)
+        response.headers.add('Content-Disposition', 'attachment', filename=secure_filename(zip_file_name, 'file'))
+        return response
 
     def _prepare_folder_structure(self, item):
         file_name = secure_filename('{}_{}'.format(unicode(item.id), item.filename), item.filename)
@@ -22,6 +22,7 @@ from flask_multipass import MultipassException
 from werkzeug.utils import cached_property
 
 from indico.core.auth import multipass
+from indico.core.config import config
 from indico.core.db import db
 from indico.core.db.sqlalchemy.principals import PrincipalType
 from indico.legacy.common.cache import GenericCache
@@ -31,6 +32,82 @@ from indico.util.caching import memoize_request
 from indico.util.string import return_ascii
 
 
+_membership_cache = GenericCache('group-membership', local_ttl=300)
+
+
+def _get_membership_key(group, user):
+    return '{}:{}:{}'.format(group.provider, group.name, user.id)
+
+
+def _get_identity_groups_key(provider, user):
+    return 'groups:{}:{}'.format(provider, user.id)
+
+
+def _supports_identity_groups(provider):
+    # only newer versions of Flask-Multipass can get all groups of an
+    # identity, and even there not every provider supports it
+    return getattr(multipass.identity_providers[provider], 'supports_get_identity_groups', False)
+
+
+def _get_identity_group_names(provider, user):
+    identity_provider = multipass.identity_providers[provider]
+    names = set()
+    try:
+        for __, identifier in user.iter_identifiers(check_providers=True, providers={provider}):
+            names |= {group.name for group in identity_provider.get_identity_groups(identifier)}
+    except MultipassException as e:
+        warn('Could not retrieve groups of {} from {}: {}'.format(user, provider, e))
+        return None
+    return frozenset(names)
+
+
+def get_group_memberships(user, groups):
+    """Check whether a user is a member of several groups.
+
+    Cached memberships in multipass groups are retrieved at once.  If a
+    provider can list all groups of a user, they are loaded and cached
+    together instead of checking every group separately.  Both positive
+    and negative results are cached for ``GROUP_MEMBERSHIP_CACHE_TTL``
+    seconds.  If the groups of a user cannot be retrieved from a
+    provider, the user is not a member of any of its groups, but this
+    is not cached.
+
+    :param user: A :class:`.User` or ``None``
+    :param groups: An iterable containing :class:`GroupProxy` objects
+    :return: A dict mapping the groups to a bool indicating whether the
+             user is a member of the group.
+    """
+    groups = set(groups)
+    if not user:
+        return dict.fromkeys(groups, False)
+    rv = {group: bool(group.has_member(user)) for group in groups if group.is_local}
+    multipass_groups = groups - rv.viewkeys()
+    if not multipass_groups:
+        return rv
+    providers = {group.provider for group in multipass_groups if _supports_identity_groups(group.provider)}
+    keys = ([_get_identity_groups_key(provider, user) for provider in providers] +
+            [_get_membership_key(group, user) for group in multipass_groups if group.provider not in providers])
+    cached = _membership_cache.get_multi(keys)
+    updates = {}
+    for provider in providers:
+        key = _get_identity_groups_key(provider, user)
+        if cached[key] is None:
+            cached[key] = _get_identity_group_names(provider, user)
+            if cached[key] is not None:
+                updates[key] = cached[key]
+    for group in multipass_groups:
+        if group.provider in providers:
+            rv[group] = group.name in (cached[_get_identity_groups_key(group.provider, user)] or ())
+            continue
+        key = _get_membership_key(group, user)
+        if cached[key] is None:
+            cached[key] = updates[key] = group._check_membership(user)
+        rv[group] = cached[key]
+    if updates:
+        _membership_cache.set_multi(updates, config.GROUP_MEMBERSHIP_CACHE_TTL)
+    return rv
+
+
 class GroupProxy(object):
     """Provides a generic interface for both local and multipass groups.
 
@@ -233,21 +310,17 @@ class _MultipassGroupProxy(GroupProxy):
     def provider_title(self):
         return multipass.identity_providers[self.provider].title
 
+    @memoize_request
     def has_member(self, user):
         if not user:
             return False
-        cache = GenericCache('group-membership')
-        key = '{}:{}:{}'.format(self.provider, self.name, user.id)
-        rv = cache.get(key)
-        if rv is not None:
-            return rv
-        elif self.group is None:
+        return get_group_memberships(user, {self})[self]
+
+    def _check_membership(self, user):
+        if self.group is None:
             warn('Tried to check if {} is in invalid group {}'.format(user, self))
-            rv = False
-        else:
-            rv = any(x[1] in self.group for x in user.iter_identifiers(check_providers=True, providers={self.provider}))
-        cache.set(key, rv, 1800)
-        return rv
+            return False
+        return any(x[1] in self.group for x in user.iter_identifiers(check_providers=True, providers={self.provider}))
 
     @memoize_request
     def get_members(self):
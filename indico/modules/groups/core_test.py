@@ -0,0 +1,112 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+from collections import namedtuple
+
+import pytest
+from flask_multipass import MultipassException
+from mock import MagicMock
+
+from indico.modules.groups import GroupProxy
+from indico.modules.groups import core as core_module
+from indico.modules.groups.core import get_group_memberships
+
+
+_Group = namedtuple('_Group', ('name',))
+
+
+class _DictCache(dict):
+    def get_multi(self, keys):
+        return {key: self.get(key) for key in keys}
+
+    def set_multi(self, mapping, time=0):
+        self.update(mapping)
+
+
+@pytest.fixture
+def membership_cache(monkeypatch):
+    cache = _DictCache()
+    monkeypatch.setattr(core_module, '_membership_cache', cache)
+    monkeypatch.setattr(core_module, 'config', MagicMock(GROUP_MEMBERSHIP_CACHE_TTL=1800))
+    return cache
+
+
+@pytest.fixture
+def providers(monkeypatch):
+    full = MagicMock(supports_get_identity_groups=True)
+    full.get_identity_groups.side_effect = lambda identifier: [_Group('a'), _Group('b')]
+    simple = MagicMock(spec=['name'])
+    # newer versions of Flask-Multipass have the method even if the provider does not support it
+    unsupported = MagicMock(supports_get_identity_groups=False)
+    unsupported.get_identity_groups.side_effect = RuntimeError
+    providers = {'full': full, 'simple': simple, 'unsupported': unsupported}
+    monkeypatch.setattr(core_module, 'multipass', MagicMock(identity_providers=providers))
+    return providers
+
+
+@pytest.fixture
+def user():
+    user = MagicMock(id=123)
+    user.iter_identifiers.side_effect = lambda **kwargs: [(provider, 'jdoe') for provider in kwargs['providers']]
+    return user
+
+
+def test_get_group_memberships(mocker, membership_cache, providers, user):
+    def _check_membership(self, user):
+        return self.name == 'x'
+
+    mocker.patch.object(core_module._MultipassGroupProxy, '_check_membership', _check_membership)
+    groups = [GroupProxy('a', 'full'), GroupProxy('b', 'full'), GroupProxy('c', 'full'),
+              GroupProxy('x', 'simple'), GroupProxy('y', 'simple')]
+    expected = dict(zip(groups, [True, True, False, True, False]))
+    assert get_group_memberships(user, groups) == expected
+    # all groups from a provider supporting it are loaded at once
+    assert providers['full'].get_identity_groups.call_count == 1
+    # non-memberships are cached as well
+    assert membership_cache == {'groups:full:123': frozenset({'a', 'b'}),
+                                'simple:x:123': True,
+                                'simple:y:123': False}
+    mocker.patch.object(core_module._MultipassGroupProxy, '_check_membership', side_effect=Exception)
+    assert get_group_memberships(user, groups) == expected
+    assert providers['full'].get_identity_groups.call_count == 1
+
+
+def test_get_group_memberships_unsupported(mocker, membership_cache, providers, user):
+    def _check_membership(self, user):
+        return self.name == 'x'
+
+    mocker.patch.object(core_module._MultipassGroupProxy, '_check_membership', _check_membership)
+    groups = [GroupProxy('x', 'unsupported'), GroupProxy('y', 'unsupported')]
+    assert get_group_memberships(user, groups) == dict(zip(groups, [True, False]))
+    assert not providers['unsupported'].get_identity_groups.called
+    assert membership_cache == {'unsupported:x:123': True, 'unsupported:y:123': False}
+
+
+@pytest.mark.filterwarnings('ignore:Could not retrieve groups')
+def test_get_group_memberships_error(membership_cache, providers, user):
+    providers['full'].get_identity_groups.side_effect = MultipassException('unavailable')
+    groups = [GroupProxy('a', 'full'), GroupProxy('b', 'full')]
+    assert get_group_memberships(user, groups) == dict.fromkeys(groups, False)
+    # the failure is not cached
+    assert not membership_cache
+    providers['full'].get_identity_groups.side_effect = lambda identifier: [_Group('a')]
+    assert get_group_memberships(user, groups) == dict(zip(groups, [True, False]))
+
+
+def test_get_group_memberships_no_user(membership_cache):
+    group = GroupProxy('a', 'full')
+    assert get_group_memberships(None, [group]) == {group: False}
+    assert not membership_cache
@@ -55,6 +55,10 @@ _bp.add_url_rule('/location/<locationId>/',
                  'roomBooking-adminLocation',
                  location_handlers.RHRoomBookingAdminLocation)
 
+_bp.add_url_rule('/location/<locationId>/occupancy.csv',
+                 'export_location_occupancy',
+                 location_handlers.RHRoomBookingExportLocationOccupancy)
+
 _bp.add_url_rule('/location/<locationId>/attribute/delete',
                  'roomBooking-deleteCustomAttribute',
                  location_handlers.RHRoomBookingDeleteCustomAttribute,
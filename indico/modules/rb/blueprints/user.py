@@ -130,6 +130,10 @@ _bp.add_url_rule('/room/<roomLocation>/<int:roomID>/stats',
                  'roomBooking-roomStats',
                  room_handlers.RHRoomBookingRoomStats)
 
+_bp.add_url_rule('/room/<roomLocation>/<int:roomID>/stats.csv',
+                 'export_room_occupancy',
+                 room_handlers.RHRoomBookingRoomStatsExport)
+
 
 # Room blocking
 _bp.add_url_rule('/blocking/<int:blocking_id>/',
@@ -24,9 +24,10 @@ from indico.modules.rb.models.locations import Location
 from indico.modules.rb.models.reservations import Reservation
 from indico.modules.rb.models.room_attributes import RoomAttribute
 from indico.modules.rb.models.rooms import Room
-from indico.modules.rb.statistics import calculate_rooms_occupancy, compose_rooms_stats
+from indico.modules.rb.statistics import RoomOccupancy, calculate_rooms_occupancy, compose_rooms_stats
 from indico.modules.rb.views.admin.locations import WPRoomBookingAdmin, WPRoomBookingAdminLocation
 from indico.util.i18n import _
+from indico.util.spreadsheets import send_csv
 from indico.util.string import natural_sort_key
 from indico.web.flask.util import url_for
 
@@ -107,6 +108,19 @@ class RHRoomBookingAdminLocation(RHRoomBookingAdminBase):
                                           kpi=kpi).display()
 
 
+class RHRoomBookingExportLocationOccupancy(RHRoomBookingAdminBase):
+    """Export the daily occupancy of all rooms of a location as CSV"""
+
+    def _process_args(self):
+        self._location = Location.find_first(name=request.view_args['locationId'])
+        if not self._location:
+            raise NotFound(_('No such location'))
+
+    def _process(self):
+        headers, rows = RoomOccupancy(self._location.rooms).get_spreadsheet_data()
+        return send_csv('room-occupancy-{}.csv'.format(self._location.name), headers, rows)
+
+
 class RHRoomBookingDeleteCustomAttribute(RHRoomBookingAdminBase):
     def _process_args(self):
         name = request.view_args.get('locationId')
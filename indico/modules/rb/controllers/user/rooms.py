@@ -32,10 +32,11 @@ from indico.modules.rb.models.locations import Location
 from indico.modules.rb.models.reservation_occurrences import ReservationOccurrence
 from indico.modules.rb.models.reservations import Reservation
 from indico.modules.rb.models.rooms import Room
-from indico.modules.rb.statistics import calculate_rooms_occupancy, compose_rooms_stats
+from indico.modules.rb.statistics import RoomOccupancy, calculate_rooms_occupancy, compose_rooms_stats
 from indico.modules.rb.views.user.rooms import (WPRoomBookingMapOfRooms, WPRoomBookingMapOfRoomsWidget,
                                                 WPRoomBookingRoomDetails, WPRoomBookingRoomStats,
                                                 WPRoomBookingSearchRooms, WPRoomBookingSearchRoomsResults)
+from indico.util.spreadsheets import send_csv
 from indico.web.forms.base import FormDefaults
 
 
@@ -156,14 +157,14 @@ class RHRoomBookingRoomStats(RHRoomBookingBase):
                     self._start = date(year, month, 1)
                 except ValueError:
                     raise IndicoError(u'Invalid year or month specified')
-                self._end = self._start + relativedelta(months=1)
+                self._end = self._start + relativedelta(months=1, days=-1)
                 self._occupancy_period = '{:d}-{:02d}'.format(year, month)
             else:
                 try:
                     self._start = date(year, 1, 1)
                 except ValueError:
                     raise IndicoError(u'Invalid year specified')
-                self._end = self._start + relativedelta(years=1)
+                self._end = self._start + relativedelta(years=1, days=-1)
                 self._occupancy_period = str(year)
 
     def _process(self):
@@ -177,3 +178,11 @@ class RHRoomBookingRoomStats(RHRoomBookingBase):
                                       last_month=last_month,
                                       occupancy=calculate_rooms_occupancy([self._room], self._start, self._end),
                                       stats=compose_rooms_stats([self._room])).display()
+
+
+class RHRoomBookingRoomStatsExport(RHRoomBookingRoomStats):
+    """Export the daily occupancy of a room as CSV"""
+
+    def _process(self):
+        headers, rows = RoomOccupancy([self._room], self._start, self._end).get_spreadsheet_data()
+        return send_csv('room-occupancy-{}-{}.csv'.format(self._room.id, self._occupancy_period), headers, rows)
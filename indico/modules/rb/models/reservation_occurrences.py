@@ -18,10 +18,13 @@ from datetime import datetime
 from math import ceil
 
 from dateutil import rrule
+from psycopg2.extras import DateTimeRange
 from sqlalchemy import Date, or_
+from sqlalchemy.dialects.postgresql import ARRAY, TSRANGE
+from sqlalchemy.ext.declarative import declared_attr
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import defaultload
-from sqlalchemy.sql import cast
+from sqlalchemy.sql import bindparam, cast, select
 
 from indico.core.db import db
 from indico.core.db.sqlalchemy.util.queries import db_dates_overlap
@@ -37,7 +40,6 @@ from indico.util.user import unify_user_args
 
 class ReservationOccurrence(db.Model, Serializer):
     __tablename__ = 'reservation_occurrences'
-    __table_args__ = {'schema': 'roombooking'}
     __api_public__ = (('start_dt', 'startDT'), ('end_dt', 'endDT'), 'is_cancelled', 'is_rejected')
 
     #: A relationship loading strategy that will avoid loading the
@@ -47,6 +49,12 @@ class ReservationOccurrence(db.Model, Serializer):
     NO_RESERVATION_USER_STRATEGY.lazyload('created_by_user')
     NO_RESERVATION_USER_STRATEGY.noload('booked_for_user')
 
+    @declared_attr
+    def __table_args__(cls):
+        return (db.Index('ix_reservation_occurrences_time_range', db.func.tsrange(cls.start_dt, cls.end_dt),
+                         postgresql_using='gist'),
+                {'schema': 'roombooking'})
+
     reservation_id = db.Column(
         db.Integer,
         db.ForeignKey('roombooking.reservations.id'),
@@ -102,6 +110,14 @@ class ReservationOccurrence(db.Model, Serializer):
     def is_valid(self):
         return ~self.is_rejected & ~self.is_cancelled
 
+    @hybrid_property
+    def time_range(self):
+        return DateTimeRange(self.start_dt, self.end_dt)
+
+    @time_range.expression
+    def time_range(self):
+        return db.func.tsrange(self.start_dt, self.end_dt)
+
     @return_ascii
     def __repr__(self):
         return u'<ReservationOccurrence({0}, {1}, {2}, {3}, {4}, {5})>'.format(
@@ -168,6 +184,19 @@ class ReservationOccurrence(db.Model, Serializer):
         return or_(db_dates_overlap(ReservationOccurrence, 'start_dt', occ.start_dt, 'end_dt', occ.end_dt)
                    for occ in occurrences)
 
+    @staticmethod
+    def series_time_ranges(occurrences):
+        """Get a subquery containing the time ranges of the given occurrences.
+
+        The ranges are sent as a single array parameter, so the query does
+        not grow with the number of occurrences.  Joining it against
+        :attr:`time_range` using the ``&&`` operator uses the GiST index on
+        the occurrence times for each range.
+        """
+        ranges = bindparam('series_time_ranges', [DateTimeRange(occ.start_dt, occ.end_dt) for occ in occurrences],
+                           type_=ARRAY(TSRANGE), unique=True)
+        return select([db.func.unnest(ranges).label('time_range')]).alias('series_time_ranges')
+
     @classmethod
     def find_overlapping_with(cls, room, occurrences, skip_reservation_id=None):
         from indico.modules.rb.models.reservations import Reservation
@@ -18,9 +18,9 @@ import ast
 import json
 from datetime import date
 
-from sqlalchemy import and_, cast, func, or_
+from sqlalchemy import and_, cast, func, or_, select
 from sqlalchemy.ext.hybrid import hybrid_property
-from sqlalchemy.orm import contains_eager
+from sqlalchemy.orm import contains_eager, join
 
 from indico.core.db.sqlalchemy import db
 from indico.core.db.sqlalchemy.custom import static_array
@@ -539,15 +539,18 @@ class Room(versioned_cache(_cache, 'id'), db.Model, Serializer):
     @staticmethod
     def filter_available(start_dt, end_dt, repetition, include_pre_bookings=True, include_pending_blockings=True):
         """Returns a SQLAlchemy filter criterion ensuring that the room is available during the given time."""
-        # Check availability against reservation occurrences
+        # Check availability against reservation occurrences.  Instead of checking each room for an overlap
+        # with any of the occurrences, we get the rooms with an overlapping occurrence in a single query
         dummy_occurrences = ReservationOccurrence.create_series(start_dt, end_dt, repetition)
-        overlap_criteria = ReservationOccurrence.filter_overlap(dummy_occurrences)
-        reservation_criteria = [Reservation.room_id == Room.id,
-                                ReservationOccurrence.is_valid,
-                                overlap_criteria]
+        series = ReservationOccurrence.series_time_ranges(dummy_occurrences)
+        reservation_criteria = [ReservationOccurrence.is_valid]
         if not include_pre_bookings:
             reservation_criteria.append(Reservation.is_accepted)
-        occurrences_filter = Reservation.occurrences.any(and_(*reservation_criteria))
+        occupied_room_ids = (select([Reservation.room_id])
+                             .select_from(join(Reservation, ReservationOccurrence, Reservation.occurrences)
+                                          .join(series, ReservationOccurrence.time_range.op('&&')(series.c.time_range)))
+                             .where(and_(*reservation_criteria)))
+        occurrences_filter = Room.id.in_(occupied_room_ids)
         # Check availability against blockings
         if include_pending_blockings:
             valid_states = (BlockedRoom.State.accepted, BlockedRoom.State.pending)
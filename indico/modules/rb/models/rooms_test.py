@@ -417,6 +417,22 @@ def test_filter_available(dummy_room, create_reservation, create_blocking,
     assert set(Room.find_all(availabilty_filter)) == (set() if filtered else {dummy_room})
 
 
+@pytest.mark.parametrize(('booking_day', 'booking_hour', 'available'), (
+    (0, 9, False),
+    (3, 9, False),
+    (1, 11, True),
+    (5, 9, True),
+))
+def test_filter_available_series(dummy_room, create_reservation, booking_day, booking_hour, available):
+    day = date.today() + timedelta(days=booking_day)
+    create_reservation(start_dt=datetime.combine(day, time(booking_hour)),
+                       end_dt=datetime.combine(day, time(booking_hour + 1)))
+    availabilty_filter = Room.filter_available(datetime.combine(date.today(), time(8, 30)),
+                                               datetime.combine(date.today() + timedelta(days=4), time(10)),
+                                               (RepeatFrequency.DAY, 1))
+    assert set(Room.find_all(availabilty_filter)) == ({dummy_room} if available else set())
+
+
 def test_find_with_filters(db, dummy_room, create_room, dummy_user, create_equipment_type, create_room_attribute,
                            dummy_reservation):
     # Simple testcase that ensures we find the room when many filters are used
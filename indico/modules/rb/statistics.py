@@ -1,6 +1,7 @@
 from __future__ import division
 
-from datetime import date, datetime
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
 
 from dateutil.relativedelta import relativedelta
 
@@ -9,66 +10,164 @@ from indico.modules.rb.models.locations import Location
 from indico.modules.rb.models.reservation_occurrences import ReservationOccurrence
 from indico.modules.rb.models.reservations import Reservation
 from indico.util.date_time import iterdays
+from indico.util.string import natural_sort_key
 
 
-def calculate_rooms_bookable_time(rooms, start_date=None, end_date=None):
+def _get_period(start_date, end_date):
     if end_date is None:
         end_date = date.today() - relativedelta(days=1)
     if start_date is None:
         start_date = end_date - relativedelta(days=29)
-    working_time_per_day = sum((datetime.combine(date.today(), end) - datetime.combine(date.today(), start)).seconds
-                               for start, end in Location.working_time_periods)
-    working_days = sum(1 for __ in iterdays(start_date, end_date, skip_weekends=True))
-    return working_days * working_time_per_day * len(rooms)
+    return start_date, end_date
 
 
-def calculate_rooms_booked_time(rooms, start_date=None, end_date=None):
-    if end_date is None:
-        end_date = date.today() - relativedelta(days=1)
-    if start_date is None:
-        start_date = end_date - relativedelta(days=29)
-    # Reservations on working days
-    reservations = Reservation.find(Reservation.room_id.in_(r.id for r in rooms),
-                                    db.extract('dow', ReservationOccurrence.start_dt).between(1, 5),
-                                    ReservationOccurrence.start_dt >= start_date,
-                                    ReservationOccurrence.end_dt <= end_date,
-                                    ReservationOccurrence.is_valid,
-                                    _join=ReservationOccurrence)
+def _merge_intervals(intervals):
+    """Merge overlapping ``(start, end)`` intervals."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+class RoomOccupancy(object):
+    """Booked and bookable time of rooms on each working day of a period.
+
+    Only time during :attr:`.Location.working_time_periods` on weekdays
+    is taken into account.  The occurrences of all rooms are loaded using
+    a single query and the overlaps with the working time are computed in
+    Python, with overlapping occurrences (e.g. a booking and a pre-booking)
+    counted only once.
+
+    :param rooms: The rooms to get the occupancy for.
+    :param start_date: The first day of the period (defaults to 30
+                       days before `end_date`).
+    :param end_date: The last day of the period (defaults to yesterday).
+    """
+
+    def __init__(self, rooms, start_date=None, end_date=None):
+        self.rooms = rooms
+        self.start_date, self.end_date = _get_period(start_date, end_date)
+        #: The working days of the period
+        self.days = [dt.date() for dt in iterdays(self.start_date, self.end_date, skip_weekends=True)]
+        #: The bookable time of a room on a single day, in seconds
+        self.bookable_time_per_day = sum((datetime.combine(date.today(), end) -
+                                          datetime.combine(date.today(), start)).seconds
+                                         for start, end in Location.working_time_periods)
+        self._booked_time = self._calculate_booked_time()
+
+    def _query_occurrences(self):
+        if not self.rooms or not self.days:
+            return []
+        return (db.session.query(Reservation.room_id, ReservationOccurrence.start_dt, ReservationOccurrence.end_dt)
+                .join(ReservationOccurrence, Reservation.occurrences)
+                .filter(Reservation.room_id.in_(r.id for r in self.rooms),
+                        ReservationOccurrence.is_valid,
+                        ReservationOccurrence.start_dt >= self.days[0],
+                        ReservationOccurrence.start_dt < self.days[-1] + timedelta(days=1),
+                        db.extract('dow', ReservationOccurrence.start_dt).between(1, 5))
+                .all())
+
+    def _calculate_booked_time(self):
+        intervals = defaultdict(list)
+        for room_id, start_dt, end_dt in self._query_occurrences():
+            day = start_dt.date()
+            # occurrences spanning midnight only count on the day they start
+            end_dt = min(end_dt, datetime.combine(day + timedelta(days=1), time()))
+            intervals[room_id, day].append((start_dt, end_dt))
+        day_indexes = {day: i for i, day in enumerate(self.days)}
+        booked_time = {room.id: [0] * len(self.days) for room in self.rooms}
+        for (room_id, day), room_intervals in intervals.iteritems():
+            if day not in day_indexes:
+                continue
+            periods = [(datetime.combine(day, start), datetime.combine(day, end))
+                       for start, end in Location.working_time_periods]
+            booked_time[room_id][day_indexes[day]] = sum(max(0, (min(end_dt, period_end) -
+                                                                 max(start_dt, period_start)).total_seconds())
+                                                         for start_dt, end_dt in _merge_intervals(room_intervals)
+                                                         for period_start, period_end in periods)
+        return booked_time
 
-    rsv_start = db.cast(ReservationOccurrence.start_dt, db.TIME)
-    rsv_end = db.cast(ReservationOccurrence.end_dt, db.TIME)
-    slots = ((db.cast(start, db.TIME), db.cast(end, db.TIME)) for start, end in Location.working_time_periods)
+    def get_booked_time(self, room=None):
+        """Get the booked time during working hours in seconds.
 
-    # this basically handles all possible ways an occurrence overlaps with each one of the working time slots
-    overlaps = sum(db.case([
-                ((rsv_start < start) & (rsv_end > end), db.extract('epoch', end - start)),
-                ((rsv_start < start) & (rsv_end > start) & (rsv_end <= end), db.extract('epoch', rsv_end - start)),
-                ((rsv_start >= start) & (rsv_start < end) & (rsv_end > end), db.extract('epoch', end - rsv_start)),
-                ((rsv_start >= start) & (rsv_end <= end), db.extract('epoch', rsv_end - rsv_start))
-            ], else_=0) for start, end in slots)
+        :param room: A room to get the booked time for instead of the
+                     booked time of all rooms.
+        """
+        if room is not None:
+            return sum(self._booked_time[room.id])
+        return sum(sum(times) for times in self._booked_time.itervalues())
 
-    return reservations.with_entities(db.func.sum(overlaps)).scalar() or 0
+    def get_bookable_time(self, room=None):
+        """Get the bookable time during working hours in seconds.
+
+        :param room: A room to get the bookable time for instead of the
+                     bookable time of all rooms.
+        """
+        num_rooms = 1 if room is not None else len(self.rooms)
+        return len(self.days) * self.bookable_time_per_day * num_rooms
+
+    def get_occupancy(self, room=None):
+        """Get the ratio between booked and bookable time.
+
+        :param room: A room to get the occupancy for instead of the
+                     average occupancy of all rooms.
+        """
+        bookable_time = self.get_bookable_time(room)
+        return self.get_booked_time(room) / bookable_time if bookable_time else 0
+
+    def get_matrix(self):
+        """Get the booked time of each room on each day.
+
+        :return: A dict mapping room ids to lists containing the booked
+                 time in seconds for each day in :attr:`days`.
+        """
+        return {room_id: list(times) for room_id, times in self._booked_time.iteritems()}
+
+    def get_spreadsheet_data(self):
+        """Get the headers and rows for a spreadsheet export."""
+        headers = ['Room', 'Date', 'Booked hours', 'Bookable hours', 'Occupancy (%)']
+        rows = []
+        bookable_hours = round(self.bookable_time_per_day / 3600, 2)
+        for room in sorted(self.rooms, key=lambda r: natural_sort_key(r.full_name)):
+            for day, booked_time in zip(self.days, self._booked_time[room.id]):
+                rows.append({'Room': room.full_name,
+                             'Date': day.isoformat(),
+                             'Booked hours': round(booked_time / 3600, 2),
+                             'Bookable hours': bookable_hours,
+                             'Occupancy (%)': round(booked_time / self.bookable_time_per_day * 100, 2)})
+        return headers, rows
+
+
+def calculate_rooms_bookable_time(rooms, start_date=None, end_date=None):
+    return RoomOccupancy(rooms, start_date, end_date).get_bookable_time()
+
+
+def calculate_rooms_booked_time(rooms, start_date=None, end_date=None):
+    return RoomOccupancy(rooms, start_date, end_date).get_booked_time()
 
 
 def calculate_rooms_occupancy(rooms, start=None, end=None):
-    bookable_time = calculate_rooms_bookable_time(rooms, start, end)
-    booked_time = calculate_rooms_booked_time(rooms, start, end)
-    return booked_time / bookable_time if bookable_time else 0
+    return RoomOccupancy(rooms, start, end).get_occupancy()
 
 
 def compose_rooms_stats(rooms):
-    reservations = Reservation.find(Reservation.room_id.in_(r.id for r in rooms))
-    return {
-        'active': {
-            'valid': reservations.filter(Reservation.is_valid, ~Reservation.is_archived).count(),
-            'pending': reservations.filter(Reservation.is_pending, ~Reservation.is_archived).count(),
-            'cancelled': reservations.filter(Reservation.is_cancelled, ~Reservation.is_archived).count(),
-            'rejected': reservations.filter(Reservation.is_rejected, ~Reservation.is_archived).count(),
-        },
-        'archived': {
-            'valid': reservations.filter(Reservation.is_valid, Reservation.is_archived).count(),
-            'pending': reservations.filter(Reservation.is_pending, Reservation.is_archived).count(),
-            'cancelled': reservations.filter(Reservation.is_cancelled, Reservation.is_archived).count(),
-            'rejected': reservations.filter(Reservation.is_rejected, Reservation.is_archived).count()
-        }
-    }
+    stats = {key: {'valid': 0, 'pending': 0, 'cancelled': 0, 'rejected': 0} for key in ('active', 'archived')}
+    if not rooms:
+        return stats
+    is_archived = Reservation.is_archived.label('is_archived')
+    query = (db.session.query(is_archived, Reservation.is_accepted, Reservation.is_cancelled, Reservation.is_rejected,
+                              db.func.count())
+             .filter(Reservation.room_id.in_(r.id for r in rooms))
+             .group_by(is_archived, Reservation.is_accepted, Reservation.is_cancelled, Reservation.is_rejected))
+    for is_archived, is_accepted, is_cancelled, is_rejected, count in query:
+        group = stats['archived' if is_archived else 'active']
+        if is_cancelled:
+            group['cancelled'] += count
+        if is_rejected:
+            group['rejected'] += count
+        if not (is_cancelled or is_rejected):
+            group['valid' if is_accepted else 'pending'] += count
+    return stats
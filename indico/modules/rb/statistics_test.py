@@ -0,0 +1,65 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+from collections import namedtuple
+from datetime import date, datetime
+
+import pytest
+
+from indico.modules.rb.statistics import RoomOccupancy, _merge_intervals
+
+
+_Room = namedtuple('_Room', ('id', 'full_name'))
+
+
+@pytest.mark.parametrize(('intervals', 'expected'), (
+    ([], []),
+    ([(1, 2), (3, 4)], [[1, 2], [3, 4]]),
+    ([(3, 5), (1, 4)], [[1, 5]]),
+    ([(1, 2), (2, 3)], [[1, 3]]),
+    ([(1, 10), (2, 3), (4, 5)], [[1, 10]]),
+))
+def test_merge_intervals(intervals, expected):
+    assert _merge_intervals(intervals) == expected
+
+
+def test_room_occupancy(mocker):
+    rooms = [_Room(1, 'Room 1'), _Room(2, 'Room 2')]
+    occurrences = [
+        # 8:00-10:00 with 1.5h of working time
+        (1, datetime(2018, 6, 4, 8), datetime(2018, 6, 4, 10)),
+        # 9:00-11:00 overlaps with the previous one; 1h of additional working time
+        (1, datetime(2018, 6, 4, 9), datetime(2018, 6, 4, 11)),
+        # 12:00-14:00 with 1h of working time
+        (2, datetime(2018, 6, 5, 12), datetime(2018, 6, 5, 14)),
+        # until midnight with 4h of working time
+        (2, datetime(2018, 6, 8, 13), datetime(2018, 6, 9, 10)),
+    ]
+    mocker.patch.object(RoomOccupancy, '_query_occurrences', return_value=occurrences)
+    occupancy = RoomOccupancy(rooms, date(2018, 6, 4), date(2018, 6, 10))
+    assert occupancy.days == [date(2018, 6, d) for d in xrange(4, 9)]
+    assert occupancy.bookable_time_per_day == 8 * 3600
+    assert occupancy.get_matrix() == {1: [2.5 * 3600, 0, 0, 0, 0],
+                                      2: [0, 3600, 0, 0, 4 * 3600]}
+    assert occupancy.get_booked_time(rooms[0]) == 2.5 * 3600
+    assert occupancy.get_booked_time() == 7.5 * 3600
+    assert occupancy.get_bookable_time(rooms[0]) == 5 * 8 * 3600
+    assert occupancy.get_bookable_time() == 2 * 5 * 8 * 3600
+    assert occupancy.get_occupancy() == 7.5 / 80
+    headers, rows = occupancy.get_spreadsheet_data()
+    assert len(rows) == 10
+    assert rows[-1] == {'Room': 'Room 2', 'Date': '2018-06-08', 'Booked hours': 4, 'Bookable hours': 8,
+                        'Occupancy (%)': 50}
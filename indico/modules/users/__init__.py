@@ -45,7 +45,8 @@ user_settings = UserSettingsProxy('users', {
     'name_format': NameFormat.first_last,
     'use_previewer_pdf': True,
     'synced_fields': None,  # None to synchronize all fields, empty set to not synchronize
-    'suggest_categories': False  # whether the user should receive category suggestions
+    'suggest_categories': False,  # whether the user should receive category suggestions
+    'suggestions_attendance': None  # checksum of the attendance data used for the current suggestions
 }, converters={
     'name_format': EnumConverter(NameFormat)
 })
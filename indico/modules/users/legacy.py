@@ -325,7 +325,7 @@ class AvatarProvisionalWrapper(Fossilizable):
             **self.data.to_dict())
 
 
-def search_avatars(criteria, exact=False, search_externals=False):
+def search_avatars(criteria, exact=False, search_externals=False, prefix=False, limit=None):
     from indico.modules.users.util import search_users
 
     if not any(criteria.viewvalues()):
@@ -338,7 +338,7 @@ def search_avatars(criteria, exact=False, search_externals=False):
         else:
             return obj.as_avatar
 
-    results = search_users(exact=exact, external=search_externals,
+    results = search_users(exact=exact, external=search_externals, prefix=prefix, limit=limit,
                            **{AVATAR_FIELD_MAP[k]: v for (k, v) in criteria.iteritems() if v})
 
     return [_process_identities(obj) for obj in results]
@@ -53,4 +53,4 @@ class UserAffiliation(db.Model):
         return '<UserAffiliation({}, {}, {})>'.format(self.id, self.name, self.user)
 
 
-define_unaccented_lowercase_index(UserAffiliation.name)
+define_unaccented_lowercase_index(UserAffiliation.name, prefix=True)
@@ -68,4 +68,4 @@ class UserEmail(db.Model):
         return '<UserEmail({}, {}, {})>'.format(self.id, self.email, self.is_primary)
 
 
-define_unaccented_lowercase_index(UserEmail.email)
+define_unaccented_lowercase_index(UserEmail.email, prefix=True)
@@ -34,6 +34,8 @@ class UserSetting(JSONSettingsBase, db.Model):
                       db.CheckConstraint('name = lower(name)', 'lowercase_name'),
                       {'schema': 'users'})
 
+    cache_across_requests = False
+
     user_id = db.Column(
         db.Integer,
         db.ForeignKey('users.users.id'),
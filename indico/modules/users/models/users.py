@@ -618,7 +618,7 @@ def _user_deleted(target, value, *unused):
         email.is_user_deleted = value
 
 
-define_unaccented_lowercase_index(User.first_name)
-define_unaccented_lowercase_index(User.last_name)
+define_unaccented_lowercase_index(User.first_name, prefix=True)
+define_unaccented_lowercase_index(User.last_name, prefix=True)
 define_unaccented_lowercase_index(User.phone)
 define_unaccented_lowercase_index(User.address)
@@ -17,6 +17,7 @@
 from __future__ import unicode_literals
 
 from collections import OrderedDict
+from itertools import islice
 from operator import itemgetter
 
 from sqlalchemy.orm import contains_eager, joinedload, load_only, undefer
@@ -24,7 +25,7 @@ from sqlalchemy.orm import contains_eager, joinedload, load_only, undefer
 from indico.core import signals
 from indico.core.auth import multipass
 from indico.core.db import db
-from indico.core.db.sqlalchemy.custom.unaccent import unaccent_match
+from indico.core.db.sqlalchemy.custom.unaccent import unaccent_match, unaccent_similarity
 from indico.core.db.sqlalchemy.principals import PrincipalType
 from indico.modules.categories import Category
 from indico.modules.categories.models.principals import CategoryPrincipal
@@ -173,7 +174,7 @@ def serialize_user(user):
 
 
 def search_users(exact=False, include_deleted=False, include_pending=False, external=False, allow_system_user=False,
-                 **criteria):
+                 prefix=False, limit=None, **criteria):
     """Searches for users.
 
     :param exact: Indicates if only exact matches should be returned.
@@ -187,6 +188,13 @@ def search_users(exact=False, include_deleted=False, include_pending=False, exte
                      for matching users.
     :param allow_system_user: Whether the system user may be returned
                               in the search results.
+    :param prefix: Indicates if a non-exact search only needs to match
+                   the beginning of the values, e.g. to autocomplete
+                   names.  This is faster than a substring search.
+    :param limit: The maximum number of Indico users to return.  If
+                  more users match, the ones most similar to the
+                  search criteria are returned.  The same limit is
+                  applied to the external users.
     :param criteria: A dict containing any of the following keys:
                      first_name, last_name, email, affiliation, phone,
                      address
@@ -196,9 +204,7 @@ def search_users(exact=False, include_deleted=False, include_pending=False, exte
              objects for existing users.
     """
     unspecified = object()
-    query = User.query.options(db.joinedload(User.identities),
-                               db.joinedload(User._all_emails),
-                               db.joinedload(User.merged_into_user))
+    query = db.session.query(User.id)
     criteria = {key: value.strip() for key, value in criteria.iteritems() if value.strip()}
     original_criteria = dict(criteria)
 
@@ -210,23 +216,37 @@ def search_users(exact=False, include_deleted=False, include_pending=False, exte
     if not include_deleted:
         query = query.filter(~User.is_deleted)
 
+    columns = []
     affiliation = criteria.pop('affiliation', unspecified)
     if affiliation is not unspecified:
-        query = query.join(UserAffiliation).filter(unaccent_match(UserAffiliation.name, affiliation, exact))
+        query = query.join(UserAffiliation)
+        columns.append((UserAffiliation.name, affiliation))
 
     email = criteria.pop('email', unspecified)
     if email is not unspecified:
-        query = query.join(UserEmail).filter(unaccent_match(UserEmail.email, email, exact))
+        query = query.join(UserEmail)
+        columns.append((UserEmail.email, email))
 
-    for k, v in criteria.iteritems():
-        query = query.filter(unaccent_match(getattr(User, k), v, exact))
+    columns += [(getattr(User, k), v) for k, v in criteria.iteritems()]
+    query = query.filter(*(unaccent_match(column, value, exact, prefix) for column, value in columns))
+
+    if limit is not None:
+        # a user may match with more than one email address
+        rank = db.func.max(sum(unaccent_similarity(column, value) for column, value in columns))
+        query = query.group_by(User.id).order_by(rank.desc(), User.id).limit(limit)
+
+    options = [db.joinedload(User._all_emails), db.joinedload(User.merged_into_user)]
+    if external:
+        options.append(db.joinedload(User.identities))
+    users = User.query.filter(User.id.in_(query.subquery())).options(*options)
 
     found_emails = {}
     found_identities = {}
     system_user = set()
-    for user in query:
-        for identity in user.identities:
-            found_identities[(identity.provider, identity.identifier)] = user
+    for user in users:
+        if external:
+            for identity in user.identities:
+                found_identities[(identity.provider, identity.identifier)] = user
         for email in user.all_emails:
             found_emails[email] = user
         if user.is_system and not user.all_emails and allow_system_user:
@@ -235,6 +255,8 @@ def search_users(exact=False, include_deleted=False, include_pending=False, exte
     # external user providers
     if external:
         identities = multipass.search_identities(exact=exact, **original_criteria)
+        if limit is not None:
+            identities = islice(identities, limit)
 
         for ident in identities:
             if not ident.data.get('email'):
@@ -0,0 +1,49 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+
+import pytest
+
+from indico.modules.users.util import search_users
+
+
+@pytest.fixture
+def users(create_user):
+    return [create_user(1, first_name=u'Jean', last_name=u'Valjean', email=u'jean@example.com'),
+            create_user(2, first_name=u'Jeanne', last_name=u'D\xe9sir\xe9e', email=u'jeanne@example.com'),
+            create_user(3, first_name=u'Marie', last_name=u'Dujean', email=u'marie@example.com')]
+
+
+@pytest.mark.usefixtures('users')
+@pytest.mark.parametrize(('exact', 'prefix', 'criteria', 'expected'), (
+    (True, False, {'first_name': u'jean'}, {1}),
+    (False, False, {'first_name': u'jean'}, {1, 2}),
+    (False, False, {'last_name': u'jean'}, {1, 3}),
+    (False, True, {'last_name': u'jean'}, set()),
+    (False, True, {'last_name': u'd'}, {2, 3}),
+    (False, True, {'last_name': u'desi'}, {2}),
+    (False, True, {'email': u'jean'}, {1, 2}),
+    (True, True, {'email': u'jean'}, set()),
+))
+def test_search_users(exact, prefix, criteria, expected):
+    assert {u.id for u in search_users(exact=exact, prefix=prefix, **criteria)} == expected
+
+
+@pytest.mark.usefixtures('users')
+def test_search_users_limit():
+    assert {u.id for u in search_users(first_name=u'jean', limit=1)} == {1}
+    assert {u.id for u in search_users(last_name=u'jean', limit=1)} == {3}
+    assert {u.id for u in search_users(email=u'example.com', limit=2)} == {1, 3}
@@ -0,0 +1,85 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+
+import cPickle as pickle
+from collections import OrderedDict
+
+import pytest
+
+from indico.core.settings import cache as settings_cache
+from indico.legacy.common.cache import CacheClient, GenericCache
+from indico.modules.categories import serialize as category_serialize
+from indico.modules.categories import tree as category_tree
+from indico.modules.events import modifications
+
+
+class MemoryCacheClient(CacheClient):
+    """A cache client keeping everything in memory.
+
+    Unlike the ``null`` backend used by the test app it actually caches
+    data, so the code using the cache can be tested.
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    def set(self, key, val, ttl=0):
+        self.data[key] = pickle.dumps(val)
+
+    def get(self, key):
+        val = self.data.get(key)
+        return pickle.loads(val) if val is not None else None
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def incr(self, key, delta=1):
+        val = (self.get(key) or 0) + delta
+        self.set(key, val)
+        return val
+
+
+class _MemoryCache(GenericCache):
+    def __init__(self, namespace, client):
+        super(_MemoryCache, self).__init__(namespace)
+        self._memory_client = client
+
+    def _connect(self):
+        self._client = self._memory_client
+
+
+@pytest.fixture(autouse=True)
+def cache_client(monkeypatch):
+    """Provides a fresh cache for the process-wide caches.
+
+    The category tree and the settings are kept in memory across
+    requests.  They are reset for each test, together with the cache
+    used to publish changes, the one containing the modification times
+    of events and categories and the one containing the iCal data of
+    events, so data from a test (which is always rolled back) cannot
+    leak into other tests.
+    """
+    client = MemoryCacheClient()
+    monkeypatch.setattr(category_tree, '_cache', _MemoryCache('category-tree', client))
+    monkeypatch.setattr(category_tree, '_tree', None)
+    monkeypatch.setattr(settings_cache, '_cache', _MemoryCache('settings', client))
+    monkeypatch.setattr(settings_cache, '_entries', OrderedDict())
+    monkeypatch.setattr(modifications, '_cache', _MemoryCache('modification-times', client))
+    monkeypatch.setattr(category_serialize, '_ical_cache', _MemoryCache('category-ical-events', client))
+    return client
@@ -30,6 +30,7 @@ from indico.core.db import db as db_
 from indico.core.db.sqlalchemy.util.management import create_all_tables, delete_all_tables
 from indico.util.process import silent_check_call
 from indico.web.flask.app import configure_db
+from indico.web.flask.stats import RepeatedQueryDetector
 
 
 @pytest.fixture(scope='session')
@@ -155,3 +156,47 @@ def count_queries():
         yield _counter
     finally:
         event.remove(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+@pytest.fixture
+def detect_repeated_queries():
+    """Provides a detector for queries executed many times.
+
+    Usage::
+
+        with detect_repeated_queries(threshold) as detector:
+            do_stuff()
+        assert not detector.repeated_queries
+    """
+    @contextmanager
+    def _detect(threshold):
+        detector = RepeatedQueryDetector(threshold)
+
+        def _after_cursor_execute(conn, cursor, statement, *args):
+            detector.add(statement)
+
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        try:
+            yield detector
+        finally:
+            event.remove(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    return _detect
+
+
+@pytest.fixture(autouse=True)
+def _fail_on_repeated_queries(request, detect_repeated_queries):
+    """Fails tests which execute the same query too often.
+
+    This is only active when the `--repeated-query-threshold` option
+    is used, and tests can opt out using the `allow_repeated_queries`
+    marker.
+    """
+    threshold = request.config.getoption('repeated_query_threshold')
+    if not threshold or request.node.get_marker('allow_repeated_queries'):
+        yield
+        return
+    with detect_repeated_queries(threshold) as detector:
+        yield
+    if detector.repeated_queries:
+        pytest.fail('Repeated queries detected:\n{}'.format(detector.format_report()), pytrace=False)
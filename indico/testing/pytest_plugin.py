@@ -33,7 +33,7 @@ pytest_plugins = ('indico.testing.fixtures.app', 'indico.testing.fixtures.catego
                   'indico.testing.fixtures.contribution', 'indico.testing.fixtures.database',
                   'indico.testing.fixtures.disallow', 'indico.testing.fixtures.person', 'indico.testing.fixtures.user',
                   'indico.testing.fixtures.event', 'indico.testing.fixtures.smtp', 'indico.testing.fixtures.storage',
-                  'indico.testing.fixtures.util')
+                  'indico.testing.fixtures.util', 'indico.testing.fixtures.cache')
 
 
 def pytest_configure(config):
@@ -54,3 +54,6 @@ def pytest_unconfigure(config):
 
 def pytest_addoption(parser):
     parser.addini('indico_plugins', 'List of indico plugins to load')
+    parser.addoption('--repeated-query-threshold', type=int, metavar='N',
+                     help='Fail tests executing the same SQL query at least N times, unless they are marked with '
+                          '`allow_repeated_queries`')
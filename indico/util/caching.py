@@ -77,13 +77,17 @@ def memoize_redis(ttl):
     ``clear_cached()`` of the decorated function with the same
     arguments that were used during the function call.  To check
     whether a value has been cached call ``is_cached()`` in the
-    same way.
+    same way.  Since the values are also cached in memory for up to a
+    minute, other processes may keep using the old value for that long.
+
+    To avoid many processes computing the value at the same time when
+    it expires, it may be recomputed shortly before it expires.
 
     :param ttl: How long the result should be cached.  May be a
                 timedelta or a number (seconds).
     """
     from indico.legacy.common.cache import GenericCache
-    cache = GenericCache('memoize')
+    cache = GenericCache('memoize', local_ttl=60)
 
     def decorator(f):
         def _get_key(args, kwargs):
@@ -101,12 +105,7 @@ def memoize_redis(ttl):
                 # No memoization during tests or in the shell
                 return f(*args, **kwargs)
 
-            key = _get_key(args, kwargs)
-            value = cache.get(key, _notset)
-            if value is _notset:
-                value = f(*args, **kwargs)
-                cache.set(key, value, ttl)
-            return value
+            return cache.get_or_compute(_get_key(args, kwargs), lambda: f(*args, **kwargs), ttl)
 
         memoizer.clear_cached = _clear_cached
         memoizer.is_cached = _is_cached
@@ -0,0 +1,93 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+
+"""Caching of PDF files generated using LaTeX."""
+
+from __future__ import unicode_literals
+
+import errno
+import fcntl
+import hashlib
+import os
+import re
+from contextlib import contextmanager
+from datetime import date
+
+from indico.core.config import config
+
+
+#: The directory inside the cache directory which contains the lock files.
+#: It must not be cleaned up, since deleting a lock file which is held by
+#: one process would let another one lock a new file with the same name.
+LOCK_DIR_NAME = 'latex-locks'
+#: The number of lock files; documents whose cache keys map to the same
+#: lock file cannot be compiled at the same time.
+LOCK_COUNT = 64
+
+_includegraphics_re = re.compile(br'(\\includegraphics(?:\[[^\]]*\])?\{)([^}]+)(\})')
+
+
+def get_latex_cache_key(source, has_toc=False):
+    """Get the key used to cache the PDF generated from a LaTeX source.
+
+    Images are included using the paths of temporary files, so the hash
+    of their content is used instead of the path.  Documents using
+    ``\\today`` get a new key every day.
+
+    :param source: The LaTeX source code.
+    :param has_toc: Whether the document is compiled twice to generate
+                    its table of contents.
+    """
+    def _replace_path(match):
+        try:
+            with open(match.group(2), 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+        except IOError:
+            digest = match.group(2)
+        return match.group(1) + digest + match.group(3)
+
+    if isinstance(source, unicode):
+        source = source.encode('utf-8')
+    parts = [_includegraphics_re.sub(_replace_path, source), bytes(has_toc)]
+    if br'\today' in source:
+        # the document changes every day
+        parts.append(bytes(date.today().isoformat()))
+    return hashlib.sha256(b'\0'.join(parts)).hexdigest()
+
+
+@contextmanager
+def latex_cache_lock(key):
+    """Lock the cache entry of a LaTeX document.
+
+    This ensures that a document is only compiled once even if it is
+    requested by many users (and thus worker processes) at once.
+
+    :param key: The cache key returned by :func:`get_latex_cache_key`.
+    """
+    lock_dir = os.path.join(config.CACHE_DIR, LOCK_DIR_NAME)
+    try:
+        os.mkdir(lock_dir)
+    except OSError as exc:
+        if exc.errno != errno.EEXIST:
+            raise
+    path = os.path.join(lock_dir, '{:02}.lock'.format(int(key, 16) % LOCK_COUNT))
+    with open(path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
@@ -0,0 +1,88 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import unicode_literals
+
+import os
+from datetime import datetime
+
+from mock import MagicMock
+
+from indico.util import latex
+from indico.util.latex import LOCK_DIR_NAME, get_latex_cache_key, latex_cache_lock
+from indico.util.tasks import temp_cleanup
+
+
+def _make_source(*image_paths):
+    images = '\n'.join(r'\includegraphics[width=0.9\linewidth]{%s}' % path for path in image_paths)
+    return '\\documentclass{article}\n\\begin{document}\n%s\nm\xf6p\n\\end{document}\n' % images
+
+
+def test_latex_cache_key():
+    key = get_latex_cache_key(_make_source())
+    assert key == get_latex_cache_key(_make_source().encode('utf-8'))
+    assert key != get_latex_cache_key(_make_source(), has_toc=True)
+    assert key != get_latex_cache_key(_make_source().replace('m\xf6p', 'moep'))
+
+
+def test_latex_cache_key_images(tmpdir):
+    image = tmpdir.join('image.png')
+    image.write(b'image data')
+    other_image = tmpdir.join('other.png')
+    other_image.write(b'image data')
+    key = get_latex_cache_key(_make_source(image.strpath))
+    # the images are temporary files, so only their contents matter
+    assert get_latex_cache_key(_make_source(other_image.strpath)) == key
+    other_image.write(b'other image data')
+    assert get_latex_cache_key(_make_source(other_image.strpath)) != key
+    # images which do not exist (anymore) fall back to the path
+    missing = tmpdir.join('missing.png').strpath
+    assert get_latex_cache_key(_make_source(missing)) == get_latex_cache_key(_make_source(missing))
+    assert get_latex_cache_key(_make_source(missing)) != get_latex_cache_key(_make_source(missing + '2'))
+
+
+def test_latex_cache_key_today(freeze_time):
+    source = _make_source()
+    source_today = source.replace('m\xf6p', 'm\xf6p \\today')
+    freeze_time(datetime(2018, 6, 18, 8, 0))
+    key = get_latex_cache_key(source)
+    key_today = get_latex_cache_key(source_today)
+    freeze_time(datetime(2018, 6, 18, 23, 0))
+    assert get_latex_cache_key(source_today) == key_today
+    freeze_time(datetime(2018, 6, 19, 8, 0))
+    assert get_latex_cache_key(source) == key
+    assert get_latex_cache_key(source_today) != key_today
+
+
+def test_latex_cache_lock(monkeypatch, tmpdir):
+    monkeypatch.setattr(latex, 'config', MagicMock(CACHE_DIR=tmpdir.strpath))
+    key = get_latex_cache_key(_make_source())
+    with latex_cache_lock(key):
+        pass
+    with latex_cache_lock(key):
+        pass
+    lock_files = tmpdir.join(LOCK_DIR_NAME).listdir()
+    assert len(lock_files) == 1
+    # the cache cleanup must not delete the lock files
+    tmpdir.join('old.pdf').write(b'')
+    for path in (lock_files[0], tmpdir.join('old.pdf')):
+        os.utime(path.strpath, (0, 0))
+    monkeypatch.setattr('indico.core.config.config', MagicMock(CACHE_DIR=tmpdir.strpath,
+                                                               TEMP_DIR=tmpdir.mkdir('temp').strpath))
+    temp_cleanup()
+    assert not tmpdir.join('old.pdf').exists()
+    assert lock_files[0].exists()
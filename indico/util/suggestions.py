@@ -21,6 +21,7 @@ from datetime import date, timedelta
 
 from sqlalchemy.orm import joinedload, load_only
 
+from indico.core.db import db
 from indico.modules.events import Event
 from indico.modules.events.abstracts.util import get_events_with_abstract_persons
 from indico.modules.events.contributions.util import get_events_with_linked_contributions
@@ -31,10 +32,11 @@ from indico.util.struct.iterables import window
 
 
 def _get_blocks(events, attended):
+    attended_ids = {e.id for e in attended}
     blocks = []
     block = []
     for event in events:
-        if event not in attended:
+        if event.id not in attended_ids:
             if block:
                 blocks.append(block)
             block = []
@@ -45,42 +47,73 @@ def _get_blocks(events, attended):
     return blocks
 
 
-def _query_categ_events(categ, start_dt, end_dt):
-    return (Event.query
-            .with_parent(categ)
-            .filter(Event.happens_between(start_dt, end_dt))
-            .options(load_only('id', 'start_dt', 'end_dt')))
+def _get_date_range(attended_events):
+    # We care about events in the whole timespan where the user attended some events.
+    first_event_date = attended_events[0].start_dt.replace(hour=0, minute=0)
+    last_event_date = attended_events[-1].start_dt.replace(hour=0, minute=0) + timedelta(days=1)
+    return first_event_date, last_event_date
+
+
+def _query_categ_events(date_ranges):
+    """Get the events in several categories and date ranges.
+
+    :param date_ranges: A dict mapping category ids to a
+                        ``(start_dt, end_dt)`` tuple.
+    :return: A dict mapping category ids to a list of events.
+    """
+    query = (Event.query
+             .filter(~Event.is_deleted,
+                     db.or_(*(db.and_(Event.category_id == category_id, Event.happens_between(start_dt, end_dt))
+                              for category_id, (start_dt, end_dt) in date_ranges.iteritems())))
+             .order_by(Event.start_dt, Event.id)
+             .options(load_only('id', 'category_id', 'start_dt', 'end_dt')))
+    events = defaultdict(list)
+    for event in query:
+        events[event.category_id].append(event)
+    return events
+
+
+def _query_categ_event_counts(start_dts):
+    """Count the events starting after a date in several categories.
 
+    :param start_dts: A dict mapping category ids to the date after
+                      which events are counted.
+    :return: A dict mapping category ids to the number of events.
+    """
+    query = (db.session.query(Event.category_id, db.func.count(Event.id))
+             .filter(~Event.is_deleted,
+                     db.or_(*(db.and_(Event.category_id == category_id, Event.happens_between(start_dt, None))
+                              for category_id, start_dt in start_dts.iteritems())))
+             .group_by(Event.category_id))
+    return dict(query)
 
-def _get_category_score(user, categ, attended_events, debug=False):
+
+def _get_category_score(categ, attended_events, categ_events, total_after, favorite, debug=False):
     if debug:
         print repr(categ)
-    # We care about events in the whole timespan where the user attended some events.
     # However, this might result in some missed events e.g. if the user was not working for
     # a year and then returned. So we throw away old blocks (or rather adjust the start time
     # to the start time of the newest block)
-    first_event_date = attended_events[0].start_dt.replace(hour=0, minute=0)
-    last_event_date = attended_events[-1].start_dt.replace(hour=0, minute=0) + timedelta(days=1)
-    blocks = _get_blocks(_query_categ_events(categ, first_event_date, last_event_date), attended_events)
+    first_event_date, last_event_date = _get_date_range(attended_events)
+    blocks = _get_blocks(categ_events, attended_events)
     for a, b in window(blocks):
         # More than 3 months between blocks? Ignore the old block!
         if b[0].start_dt - a[-1].start_dt > timedelta(weeks=12):
             first_event_date = b[0].start_dt.replace(hour=0, minute=0)
 
     # Favorite categories get a higher base score
-    score = int(categ in user.favorite_categories)
+    score = int(favorite)
     if debug:
         print '{0:+.3f} - initial'.format(score)
     # Attendance percentage goes to the score directly. If the attendance is high chances are good that the user
     # is either very interested in whatever goes on in the category or it's something he has to attend regularily.
-    total = _query_categ_events(categ, first_event_date, last_event_date).count()
+    total = sum(1 for e in categ_events if e.happens_between(first_event_date, last_event_date))
     if total:
         attended_block_event_count = sum(1 for e in attended_events if e.start_dt >= first_event_date)
         score += attended_block_event_count / total
     if debug:
         print '{0:+.3f} - attendance'.format(score)
     # If there are lots/few unattended events after the last attended one we also update the score with that
-    total_after = _query_categ_events(categ, last_event_date + timedelta(days=1), None).count()
     if total_after < total * 0.05:
         score += 0.25
     elif total_after > total * 0.25:
@@ -97,9 +130,7 @@ def _get_category_score(user, categ, attended_events, debug=False):
         print '{0:+.3f} - days since last event'.format(score)
     # For events in the future however we raise the score
     now_local = utc_to_server(now_utc())
-    attending_future = (_query_categ_events(categ, now_local, last_event_date)
-                        .filter(Event.id.in_(e.id for e in attended_events))
-                        .all())
+    attending_future = [e for e in attended_events if e.happens_between(now_local, last_event_date)]
     if attending_future:
         score += 0.25 * len(attending_future)
         if debug:
@@ -111,7 +142,8 @@ def _get_category_score(user, categ, attended_events, debug=False):
     return score
 
 
-def get_category_scores(user, debug=False):
+def get_attended_event_ids(user):
+    """Get the ids of the events the user is assumed to attend."""
     # XXX: check if we can add some more roles such as 'contributor' to assume attendance
     event_ids = set()
     event_ids.update(id_
@@ -122,6 +154,24 @@ def get_category_scores(user, debug=False):
                      if 'contribution_submission' in roles)
     event_ids |= get_events_registered(user)
     event_ids |= get_events_with_submitted_surveys(user)
+    return event_ids
+
+
+def get_category_scores(user, debug=False, event_ids=None):
+    """Get the suggestion scores of the categories a user attended events in.
+
+    The events of all these categories are loaded using a fixed number
+    of queries regardless of the number of categories.
+
+    :param user: A `User`
+    :param debug: Whether to print how the scores are computed.
+    :param event_ids: The ids of the attended events in case they have
+                      already been retrieved using
+                      :func:`get_attended_event_ids`.
+    :return: A dict mapping categories to their scores.
+    """
+    if event_ids is None:
+        event_ids = get_attended_event_ids(user)
     if not event_ids:
         return {}
     attended = (Event.query
@@ -129,8 +179,14 @@ def get_category_scores(user, debug=False):
                 .options(joinedload('category'))
                 .order_by(Event.start_dt, Event.id)
                 .all())
-    categ_events = defaultdict(list)
+    attended_by_categ = defaultdict(list)
     for event in attended:
-        categ_events[event.category].append(event)
-    return dict((categ, _get_category_score(user, categ, events, debug))
-                for categ, events in categ_events.iteritems())
+        attended_by_categ[event.category].append(event)
+    date_ranges = {categ.id: _get_date_range(events) for categ, events in attended_by_categ.iteritems()}
+    categ_events = _query_categ_events(date_ranges)
+    counts_after = _query_categ_event_counts({categ_id: end_dt + timedelta(days=1)
+                                              for categ_id, (start_dt, end_dt) in date_ranges.iteritems()})
+    favorite_ids = {c.id for c in user.favorite_categories}
+    return {categ: _get_category_score(categ, events, categ_events[categ.id], counts_after.get(categ.id, 0),
+                                       categ.id in favorite_ids, debug)
+            for categ, events in attended_by_categ.iteritems()}
@@ -0,0 +1,59 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+
+from datetime import datetime, timedelta
+
+import pytest
+from pytz import utc
+
+from indico.modules.events import Event
+from indico.util.suggestions import _get_blocks, _get_category_score
+
+
+def _event(id_, day, days_ago=100):
+    start_dt = utc.localize(datetime.now().replace(hour=10, minute=0, second=0, microsecond=0)
+                            - timedelta(days=days_ago - day))
+    return Event(id=id_, start_dt=start_dt, end_dt=start_dt + timedelta(hours=2))
+
+
+def test_get_blocks(app):
+    events = [_event(i, i) for i in xrange(6)]
+    attended = [events[0], events[1], events[3], events[5]]
+    assert _get_blocks(events, attended) == [[events[0], events[1]], [events[3]], [events[5]]]
+
+
+@pytest.mark.parametrize(('favorite', 'total_after', 'expected'), (
+    (False, 0, 0.6 + 0.25),
+    (True, 0, 1 + 0.6 + 0.25),
+    (False, 3, 0.6 - 0.5),
+))
+def test_get_category_score(app, favorite, total_after, expected):
+    # attended every other event of a weekly series whose last event was 100 days ago
+    events = [_event(i, i * 7, days_ago=128) for i in xrange(5)]
+    attended = events[::2]
+    score = _get_category_score(None, attended, events, total_after, favorite)
+    # the last attended event is more than 40 days in the past
+    assert score == pytest.approx(expected - 0.025 * 99)
+
+
+def test_get_category_score_old_block(app):
+    # the first attended event is ignored since it is much older than the others
+    events = [_event(1, 0, days_ago=300), _event(2, 10, days_ago=300), _event(3, 200, days_ago=300),
+              _event(4, 250, days_ago=300)]
+    attended = [events[0], events[3]]
+    score = _get_category_score(None, attended, events, 0, False)
+    assert score == pytest.approx(1 + 0.25 - 0.025 * 49)
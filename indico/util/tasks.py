@@ -30,6 +30,7 @@ from celery.schedules import crontab
 
 from indico.core.celery import celery
 from indico.util.fs import cleanup_dir
+from indico.util.latex import LOCK_DIR_NAME as LATEX_LOCK_DIR_NAME
 
 
 def _log_deleted(logger, msg, files):
@@ -44,7 +45,7 @@ def temp_cleanup():
     from indico.core.logger import Logger
     logger = Logger.get()
     deleted = cleanup_dir(config.CACHE_DIR, timedelta(days=1),
-                          exclude=lambda x: x.startswith('webassets-'))
+                          exclude=lambda x: x.startswith('webassets-') or x == LATEX_LOCK_DIR_NAME)
     _log_deleted(logger, 'Deleted from cache: %s', deleted)
     deleted = cleanup_dir(config.TEMP_DIR, timedelta(days=1))
     _log_deleted(logger, 'Deleted from temp: %s', deleted)
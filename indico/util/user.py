@@ -17,7 +17,7 @@
 from functools import wraps
 
 from indico.core.db import db
-from indico.core.db.sqlalchemy.principals import EmailPrincipal
+from indico.core.db.sqlalchemy.principals import EmailPrincipal, PrincipalType
 from indico.legacy.common.cache import GenericCache
 
 
@@ -37,6 +37,27 @@ def iter_acl(acl):
                                       not getattr(getattr(x, 'principal', x), 'is_local', None)))
 
 
+def user_in_acl(user, acl):
+    """Checks if a user is in an ACL.
+
+    This is equivalent to ``any(user in x for x in iter_acl(acl))``,
+    but the memberships in all multipass groups of the ACL are checked
+    at once (and only if the user is not in the ACL otherwise).
+
+    :param user: A :class:`.User` or ``None``
+    :param acl: any iterable containing users/groups or objects which
+                contain users/groups in a `principal` attribute
+    """
+    from indico.modules.groups.core import get_group_memberships
+    multipass_groups = []
+    for principal in (getattr(x, 'principal', x) for x in iter_acl(acl)):
+        if principal.principal_type == PrincipalType.multipass_group:
+            multipass_groups.append(principal)
+        elif user in principal:
+            return True
+    return any(get_group_memberships(user, multipass_groups).itervalues())
+
+
 def principal_from_fossil(fossil, allow_pending=False, allow_groups=True, allow_missing_groups=False,
                           allow_emails=False, allow_networks=False, existing_data=None, event=None):
     from indico.modules.networks.models.networks import IPNetworkGroup
@@ -0,0 +1,252 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+"""Streaming generation of ZIP archives.
+
+Unlike :class:`zipfile.ZipFile`, the writer in this module never seeks,
+so archives can be sent to the client while they are being generated
+instead of being written to a temporary file first.  Since the checksum
+and size of a file are only known after it has been written, they are
+stored in a data descriptor following the file data.
+"""
+
+from __future__ import absolute_import, unicode_literals
+
+import os
+import struct
+import zlib
+from datetime import datetime
+
+
+#: Extensions of file types which are already compressed and are thus
+#: stored without compressing them again
+COMPRESSED_EXTENSIONS = frozenset({
+    '.7z', '.avi', '.bz2', '.docx', '.epub', '.flac', '.gif', '.gz', '.jpeg', '.jpg', '.key', '.m4a', '.m4v',
+    '.mkv', '.mov', '.mp3', '.mp4', '.mpeg', '.mpg', '.odp', '.ods', '.odt', '.ogg', '.ogv', '.pages', '.png',
+    '.pptx', '.rar', '.tgz', '.webm', '.webp', '.xlsx', '.xz', '.zip'
+})
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+
+# files which may be bigger than this use ZIP64 extensions.  it leaves
+# plenty of room for deflated data which is bigger than the original one
+_ZIP64_FILE_LIMIT = (1 << 31) - 1
+_ZIP32_MAX = 0xffffffff
+_ZIP16_MAX = 0xffff
+_CHUNK_SIZE = 256 * 1024
+
+_FLAG_DATA_DESCRIPTOR = 0x08
+_FLAG_UTF8 = 0x800
+
+
+def is_compressed_file(filename):
+    """Check whether a file is already compressed based on its name."""
+    return os.path.splitext(filename)[1].lower() in COMPRESSED_EXTENSIONS
+
+
+def _dos_date_time(dt):
+    dt = max(dt, datetime(1980, 1, 1))
+    return (((dt.year - 1980) << 9 | dt.month << 5 | dt.day),
+            (dt.hour << 11 | dt.minute << 5 | dt.second // 2))
+
+
+class _ZipEntry(object):
+    def __init__(self, name, compress_type, dt, offset, zip64):
+        self.name = name.encode('utf-8')
+        self.compress_type = compress_type
+        self.date, self.time = _dos_date_time(dt)
+        self.offset = offset
+        self.zip64 = zip64
+        self.crc = 0
+        self.file_size = 0
+        self.compress_size = 0
+
+    @property
+    def version(self):
+        return 45 if self.zip64 else 20
+
+    def local_header(self):
+        extra = struct.pack(b'<HHQQ', 1, 16, 0, 0) if self.zip64 else b''
+        size = _ZIP32_MAX if self.zip64 else 0
+        return struct.pack(b'<IHHHHHIIIHH', 0x04034b50, self.version, _FLAG_DATA_DESCRIPTOR | _FLAG_UTF8,
+                           self.compress_type, self.time, self.date, 0, size, size, len(self.name),
+                           len(extra)) + self.name + extra
+
+    def data_descriptor(self):
+        if self.zip64:
+            return struct.pack(b'<IIQQ', 0x08074b50, self.crc, self.compress_size, self.file_size)
+        elif self.compress_size > _ZIP32_MAX or self.file_size > _ZIP32_MAX:
+            raise ValueError('File {} is too big for a ZIP file without ZIP64 extensions'.format(self.name))
+        return struct.pack(b'<IIII', 0x08074b50, self.crc, self.compress_size, self.file_size)
+
+    def central_directory_header(self):
+        zip64_fields = []
+        file_size = self.file_size
+        compress_size = self.compress_size
+        offset = self.offset
+        if file_size > _ZIP32_MAX:
+            zip64_fields.append(file_size)
+            file_size = _ZIP32_MAX
+        if compress_size > _ZIP32_MAX:
+            zip64_fields.append(compress_size)
+            compress_size = _ZIP32_MAX
+        if offset > _ZIP32_MAX:
+            zip64_fields.append(offset)
+            offset = _ZIP32_MAX
+        extra = b''
+        if zip64_fields:
+            extra = struct.pack(b'<HH{}Q'.format(len(zip64_fields)), 1, 8 * len(zip64_fields), *zip64_fields)
+        version = 45 if zip64_fields else self.version
+        # made by unix (3), files are readable by everyone
+        return struct.pack(b'<IHHHHHHIIIHHHHHII', 0x02014b50, 3 << 8 | version, version,
+                           _FLAG_DATA_DESCRIPTOR | _FLAG_UTF8, self.compress_type, self.time, self.date, self.crc,
+                           compress_size, file_size, len(self.name), len(extra), 0, 0, 0, 0o100644 << 16,
+                           offset) + self.name + extra
+
+
+class ZipStreamWriter(object):
+    """Generate a ZIP archive without writing it to a seekable file.
+
+    Each method returns an iterator yielding the data of the archive
+    as byte strings; they must be consumed in the order in which the
+    methods are called.  Use :func:`generate_zip` unless you need to
+    add files in a more complex way.
+
+    :param compress_level: The compression level used for files which
+                           are not compressed already.
+    """
+
+    def __init__(self, compress_level=6):
+        self.compress_level = compress_level
+        self._entries = []
+        self._offset = 0
+        self._closed = False
+
+    def _output(self, data):
+        self._offset += len(data)
+        return data
+
+    def iter_file(self, name, fileobj, size=None, compress=None, dt=None):
+        """Add a file to the archive.
+
+        :param name: The path of the file inside the archive.
+        :param fileobj: A file-like object to read the file from.
+        :param size: The size of the file, if known.  Files whose size
+                     is not known always use ZIP64 extensions.
+        :param compress: Whether to compress the file.  By default only
+                         files which are not compressed already based
+                         on their extension are compressed.
+        :param dt: The modification time of the file (defaults to now).
+        """
+        if self._closed:
+            raise ValueError('The ZIP archive has already been closed')
+        if compress is None:
+            compress = not is_compressed_file(name)
+        entry = _ZipEntry(name, ZIP_DEFLATED if compress else ZIP_STORED, dt or datetime.now(), self._offset,
+                          zip64=(size is None or size > _ZIP64_FILE_LIMIT))
+        yield self._output(entry.local_header())
+        compressor = zlib.compressobj(self.compress_level, zlib.DEFLATED, -15) if compress else None
+        crc = 0
+        while True:
+            data = fileobj.read(_CHUNK_SIZE)
+            if not data:
+                break
+            crc = zlib.crc32(data, crc)
+            entry.file_size += len(data)
+            if compressor is not None:
+                data = compressor.compress(data)
+                if not data:
+                    continue
+            entry.compress_size += len(data)
+            yield self._output(data)
+        if compressor is not None:
+            data = compressor.flush()
+            entry.compress_size += len(data)
+            yield self._output(data)
+        entry.crc = crc & 0xffffffff
+        yield self._output(entry.data_descriptor())
+        self._entries.append(entry)
+
+    def iter_close(self):
+        """Write the central directory which finishes the archive."""
+        self._closed = True
+        cd_offset = self._offset
+        for entry in self._entries:
+            yield self._output(entry.central_directory_header())
+        cd_size = self._offset - cd_offset
+        count = len(self._entries)
+        if count > _ZIP16_MAX or cd_size > _ZIP32_MAX or cd_offset > _ZIP32_MAX:
+            zip64_offset = self._offset
+            yield self._output(struct.pack(b'<IQHHIIQQQQ', 0x06064b50, 44, 3 << 8 | 45, 45, 0, 0, count, count,
+                                           cd_size, cd_offset))
+            yield self._output(struct.pack(b'<IIQI', 0x07064b50, 0, zip64_offset, 1))
+        yield self._output(struct.pack(b'<IHHHHIIH', 0x06054b50, 0, 0, min(count, _ZIP16_MAX),
+                                       min(count, _ZIP16_MAX), min(cd_size, _ZIP32_MAX),
+                                       min(cd_offset, _ZIP32_MAX), 0))
+
+
+def generate_zip(files, compress_level=6):
+    """Generate a ZIP archive.
+
+    :param files: An iterable of ``(name, open_file, size, dt)`` tuples.
+                  `open_file` is a callable returning a file-like object
+                  which is only called when the file is added to the
+                  archive, and closed afterwards.  `size` and `dt` are
+                  optional and may be ``None``.
+    :param compress_level: The compression level used for files which
+                           are not compressed already.
+    :return: An iterator yielding the data of the archive.
+    """
+    writer = ZipStreamWriter(compress_level)
+    for name, open_file, size, dt in files:
+        fileobj = open_file()
+        try:
+            for data in writer.iter_file(name, fileobj, size=size, dt=dt):
+                yield data
+        finally:
+            fileobj.close()
+    for data in writer.iter_close():
+        yield data
+
+
+class ZipFileReader(object):
+    """A read-only file-like object containing a ZIP archive.
+
+    The archive is generated while it is being read, so it can be
+    passed to code expecting a file, such as :meth:`.Storage.save`,
+    without writing it to a temporary file first.
+
+    :param files: The files in the archive; see :func:`generate_zip`.
+    :param compress_level: The compression level used for files which
+                           are not compressed already.
+    """
+
+    def __init__(self, files, compress_level=6):
+        self._iterator = generate_zip(files, compress_level)
+        self._buffer = b''
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._iterator)
+            except StopIteration:
+                break
+        if size < 0:
+            size = len(self._buffer)
+        data = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return data
@@ -0,0 +1,94 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+import os
+from datetime import datetime
+from io import BytesIO
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+
+import pytest
+
+from indico.util import zip as zip_module
+from indico.util.zip import ZipFileReader, generate_zip, is_compressed_file
+
+
+def _make_zip(files):
+    return ZipFile(BytesIO(b''.join(generate_zip(files))))
+
+
+@pytest.mark.parametrize(('filename', 'expected'), (
+    ('foo.txt', False),
+    ('foo.pdf', False),
+    ('foo.JPG', True),
+    ('foo.tar.gz', True),
+    ('foo', False),
+))
+def test_is_compressed_file(filename, expected):
+    assert is_compressed_file(filename) == expected
+
+
+@pytest.mark.parametrize('size_known', (True, False))
+def test_generate_zip(size_known):
+    text = b'hello world\n' * 10000
+    image = os.urandom(100000)
+    files = [(u'text/\xe4.txt', lambda: BytesIO(text), len(text) if size_known else None, datetime(2018, 6, 1, 12, 30)),
+             (u'image.png', lambda: BytesIO(image), len(image) if size_known else None, None),
+             (u'empty.txt', lambda: BytesIO(b''), 0 if size_known else None, None)]
+    zf = _make_zip(files)
+    assert zf.testzip() is None
+    infos = zf.infolist()
+    assert [info.filename for info in infos] == [u'text/\xe4.txt', u'image.png', u'empty.txt']
+    assert [info.compress_type for info in infos] == [ZIP_DEFLATED, ZIP_STORED, ZIP_DEFLATED]
+    assert infos[0].compress_size < len(text)
+    assert infos[0].date_time == (2018, 6, 1, 12, 30, 0)
+    assert zf.read(u'text/\xe4.txt') == text
+    assert zf.read(u'image.png') == image
+    assert zf.read(u'empty.txt') == b''
+
+
+def test_generate_zip_many_files(monkeypatch):
+    # pretend the limit for files without ZIP64 extensions is much lower
+    monkeypatch.setattr(zip_module, '_ZIP16_MAX', 2)
+    zf = _make_zip([('{}.txt'.format(i), lambda: BytesIO(b'test'), 4, None) for i in xrange(5)])
+    assert zf.testzip() is None
+    assert len(zf.infolist()) == 5
+
+
+def test_generate_zip_closes_files():
+    files = []
+
+    def _open():
+        files.append(BytesIO(b'test'))
+        return files[-1]
+
+    assert _make_zip([('a.txt', _open, 4, None), ('b.txt', _open, 4, None)]).testzip() is None
+    assert len(files) == 2
+    assert all(f.closed for f in files)
+
+
+def test_zip_file_reader():
+    files = [('{}.txt'.format(i), lambda: BytesIO(os.urandom(1000)), 1000, None) for i in xrange(10)]
+    reader = ZipFileReader(files)
+    chunks = []
+    while True:
+        chunk = reader.read(999)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    assert all(len(chunk) == 999 for chunk in chunks[:-1])
+    zf = ZipFile(BytesIO(b''.join(chunks)))
+    assert zf.testzip() is None
+    assert len(zf.infolist()) == 10
@@ -19,6 +19,7 @@ from __future__ import absolute_import, unicode_literals
 import cPickle
 import uuid
 from datetime import datetime, timedelta
+from functools import partial
 
 from flask import flash, request
 from flask.sessions import SessionInterface, SessionMixin
@@ -35,13 +36,40 @@ from indico.util.i18n import _, set_best_lang
 
 
 class BaseSession(CallbackDict, SessionMixin):
-    def __init__(self, initial=None, sid=None, new=False):
+    """A session whose data may be loaded lazily.
+
+    When a `loader` is specified, the session data is only loaded the
+    first time the session is accessed.  It needs to return a tuple
+    containing the sid, the session data and whether the session is new
+    (e.g. in case it expired).
+    """
+
+    def __init__(self, initial=None, sid=None, new=False, loader=None):
         def on_update(self):
             self.modified = True
+        self._loader = loader
         CallbackDict.__init__(self, initial, on_update)
         self.sid = sid
         self.new = new
         self.modified = False
+        if loader is None:
+            self._set_defaults()
+
+    @property
+    def loaded(self):
+        return self._loader is None
+
+    def load(self):
+        """Load the session data if this did not happen yet."""
+        if self._loader is None:
+            return
+        loader = self._loader
+        self._loader = None
+        self.sid, data, self.new = loader()
+        dict.update(self, data)
+        self._set_defaults()
+
+    def _set_defaults(self):
         defaults = self._get_defaults()
         if defaults:
             self.update(defaults)
@@ -51,6 +79,24 @@ class BaseSession(CallbackDict, SessionMixin):
         return None
 
 
+def _lazy_dict_method(name):
+    method = getattr(CallbackDict, name)
+
+    def wrapper(self, *args, **kwargs):
+        self.load()
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = str(name)
+    return wrapper
+
+
+for _name in ('__contains__', '__delitem__', '__eq__', '__getitem__', '__iter__', '__len__', '__ne__', '__repr__',
+              '__setitem__', 'clear', 'copy', 'get', 'has_key', 'items', 'iteritems', 'iterkeys', 'itervalues', 'keys',
+              'pop', 'popitem', 'setdefault', 'update', 'values', 'viewitems', 'viewkeys', 'viewvalues'):
+    setattr(BaseSession, _name, _lazy_dict_method(_name))
+del _name
+
+
 # Hey, if you intend on adding a custom property to this class:
 # - Only do it if you need logic behind it. Otherwise use the dict API!
 # - Even if you do need logic, keep it to core stuff. Otherwise it probably does not belong here!
@@ -131,9 +177,58 @@ class IndicoSession(BaseSession):
         return get_display_tz(as_timezone=True)
 
 
+class SessionSerializer(object):
+    """Serialize session data in a compact binary format.
+
+    The keys in :attr:`known_keys` are present in almost every session,
+    so they are stored by their position instead of their name, and the
+    expiry date is stored as a timestamp.  Any other data is pickled
+    as-is.  Sessions stored as pickled dicts by older Indico versions
+    can still be loaded.
+    """
+
+    version = 1
+    #: Keys stored without their name.  New keys may only be appended,
+    #: otherwise existing sessions would be loaded incorrectly.
+    known_keys = ('_user_id', '_csrf_token', '_expires', '_secure', '_permanent', '_lang', '_timezone')
+    _epoch = datetime(1970, 1, 1)
+
+    @classmethod
+    def dumps(cls, data):
+        data = dict(data)
+        mask = 0
+        values = []
+        for i, key in enumerate(cls.known_keys):
+            if key in data:
+                mask |= 1 << i
+                value = data.pop(key)
+                if key == '_expires':
+                    value = int((value - cls._epoch).total_seconds())
+                values.append(value)
+        return cPickle.dumps((cls.version, mask, tuple(values), data), cPickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def loads(cls, string):
+        obj = cPickle.loads(string)
+        if isinstance(obj, dict):
+            # session stored by an older version
+            return obj
+        version, mask, values, data = obj
+        if version != cls.version:
+            raise ValueError('unsupported session format: {}'.format(version))
+        values = iter(values)
+        for i, key in enumerate(cls.known_keys):
+            if mask & (1 << i):
+                value = next(values)
+                if key == '_expires':
+                    value = cls._epoch + timedelta(seconds=value)
+                data[key] = value
+        return data
+
+
 class IndicoSessionInterface(SessionInterface):
     pickle_based = True
-    serializer = cPickle
+    serializer = SessionSerializer
     session_class = IndicoSession
     temporary_session_lifetime = timedelta(days=7)
 
@@ -172,12 +267,23 @@ class IndicoSessionInterface(SessionInterface):
         sid = request.cookies.get(app.session_cookie_name)
         if not sid:
             return self.session_class(sid=self.generate_sid(), new=True)
+        # many requests (e.g. for static files) never use the session,
+        # so we only load it from the storage once it is accessed
+        return self.session_class(sid=sid, loader=partial(self._load_session, sid))
+
+    def _load_session(self, sid):
         data = self.storage.get(sid)
         if data is not None:
-            return self.session_class(self.serializer.loads(data), sid=sid)
-        return self.session_class(sid=self.generate_sid(), new=True)
+            return sid, self.serializer.loads(data), False
+        return self.generate_sid(), {}, True
 
     def save_session(self, app, session, response):
+        if not session.loaded and not session.modified:
+            # the session has not been used during this request, so there
+            # is nothing to save (its expiry is refreshed on the next
+            # request which uses it)
+            return
+        session.load()
         domain = self.get_cookie_domain(app)
         secure = self.get_cookie_secure(app)
         refresh_sid = self.should_refresh_sid(app, session)
@@ -0,0 +1,75 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+import cPickle
+from datetime import datetime
+
+import pytest
+
+from indico.web.flask.session import BaseSession, SessionSerializer
+
+
+@pytest.fixture
+def session_data():
+    return {'_user_id': 1337, '_csrf_token': '3cdf7bd3-0d4f-4b2e-8d39-bd1a7c3e2b8c',
+            '_expires': datetime(2018, 6, 18, 13, 37, 12), '_secure': True, '_lang': 'en_GB',
+            'login_identity': 'ldap:jdoe'}
+
+
+def test_serializer(session_data):
+    data = SessionSerializer.dumps(session_data)
+    assert SessionSerializer.loads(data) == session_data
+    assert len(data) < len(cPickle.dumps(session_data, cPickle.HIGHEST_PROTOCOL)) < len(cPickle.dumps(session_data))
+
+
+def test_serializer_legacy(session_data):
+    assert SessionSerializer.loads(cPickle.dumps(session_data)) == session_data
+
+
+def test_serializer_empty():
+    assert SessionSerializer.loads(SessionSerializer.dumps({})) == {}
+
+
+def test_lazy_session(mocker):
+    loader = mocker.Mock(return_value=('new-sid', {'foo': 'bar'}, True))
+    session = BaseSession(sid='sid', loader=loader)
+    assert not session.loaded
+    assert session.sid == 'sid'
+    assert not loader.called
+    assert session['foo'] == 'bar'
+    assert session.loaded
+    assert session.sid == 'new-sid'
+    assert session.new
+    assert not session.modified
+    assert dict(session) == {'foo': 'bar'}
+    session['hello'] = 'world'
+    assert session.modified
+    assert loader.call_count == 1
+
+
+@pytest.mark.parametrize('access', (
+    lambda s: s.get('foo'),
+    lambda s: 'foo' in s,
+    lambda s: bool(s),
+    lambda s: list(s),
+    lambda s: s.pop('foo', None),
+    lambda s: s.update(foo='bar'),
+    lambda s: s.permanent,
+))
+def test_lazy_session_access(mocker, access):
+    session = BaseSession(sid='sid', loader=mocker.Mock(return_value=('sid', {'foo': 'bar'}, False)))
+    access(session)
+    assert session.loaded
@@ -16,12 +16,110 @@
 
 from __future__ import unicode_literals
 
+import os
+import re
 import time
+import traceback
+from collections import Counter, namedtuple
 
-from flask import g, request_started
+from flask import current_app, g, has_app_context, request, request_started, request_tearing_down
 from sqlalchemy.engine import Engine
 from sqlalchemy.event import listens_for
 
+from indico.core.config import config
+
+
+_string_literal_re = re.compile(r"'(?:[^']|'')*'")
+_numbered_param_re = re.compile(r'%\((\w+?)_\d+\)s')
+_param_list_re = re.compile(r'\((?:%\(\w+\)s, )+%\(\w+\)s\)')
+_number_re = re.compile(r'\b\d+(?:\.\d+)?\b')
+_whitespace_re = re.compile(r'\s+')
+
+_module_path = os.path.splitext(__file__)[0]
+
+RepeatedQuery = namedtuple('RepeatedQuery', ('fingerprint', 'count', 'source'))
+
+
+def _interesting_tb_item(item, paths):
+    return ((item[0].endswith('.tpl.py') or any(item[0].startswith(p) for p in paths)) and
+            'sqlalchemy' not in item[0] and os.path.splitext(item[0])[0] != _module_path)
+
+
+def get_sql_line():
+    """Get the code which caused the current SQL query to be executed.
+
+    :return: A dict containing the ``file``, ``line`` and ``function``
+             of the innermost frame from Indico or a plugin and the
+             ``items`` of up to 5 frames starting with it, or ``None``
+             if there is no such frame.
+    """
+    from indico.core.plugins import plugin_engine
+    paths = [current_app.root_path] + [p.root_path for p in plugin_engine.get_active_plugins().itervalues()]
+    stack = [item for item in reversed(traceback.extract_stack()) if _interesting_tb_item(item, paths)]
+    for i, item in enumerate(stack):
+        return {'file': item[0],
+                'line': item[1],
+                'function': item[2],
+                'items': stack[i:i+5]}
+
+
+def get_query_fingerprint(statement):
+    """Get a normalized version of an SQL statement.
+
+    Statements which only differ in their parameters, including the
+    number of parameters used in an ``IN`` clause, have the same
+    fingerprint.
+    """
+    fingerprint = _string_literal_re.sub('?', statement)
+    fingerprint = _numbered_param_re.sub(r'%(\1)s', fingerprint)
+    fingerprint = _param_list_re.sub('(...)', fingerprint)
+    fingerprint = _number_re.sub('?', fingerprint)
+    return _whitespace_re.sub(' ', fingerprint).strip()
+
+
+class RepeatedQueryDetector(object):
+    """Detect queries which are executed many times.
+
+    This usually happens when a relationship is lazy-loaded for many
+    objects (the "N+1 queries" problem), which should be avoided by
+    eager-loading it.
+
+    :param threshold: The number of times a query needs to be
+                      executed to be considered repeated.
+    """
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.counts = Counter()
+        self.sources = {}
+
+    def add(self, statement):
+        """Record the execution of an SQL statement."""
+        fingerprint = get_query_fingerprint(statement)
+        self.counts[fingerprint] += 1
+        if self.counts[fingerprint] == self.threshold:
+            # getting the source is expensive, so we only do it once we know that we need it
+            self.sources[fingerprint] = get_sql_line() if has_app_context() else None
+
+    @property
+    def repeated_queries(self):
+        """The queries which have been executed too often.
+
+        :return: A list of `RepeatedQuery` tuples, the most frequent
+                 one first.
+        """
+        return [RepeatedQuery(fingerprint, count, self.sources.get(fingerprint))
+                for fingerprint, count in self.counts.most_common()
+                if count >= self.threshold]
+
+    def format_report(self):
+        lines = []
+        for query in self.repeated_queries:
+            source = query.source
+            location = '{0[file]}:{0[line]} {0[function]}'.format(source) if source else 'unknown source'
+            lines.append('{}x from {}:\n    {}'.format(query.count, location, query.fingerprint))
+        return '\n'.join(lines)
+
 
 def request_stats_request_started():
     if g.get('request_stats_initialized'):
@@ -30,6 +128,8 @@ def request_stats_request_started():
     g.query_count = 0
     g.query_duration = 0
     g.req_start_ts = time.time()
+    threshold = config.DB_REPEATED_QUERY_THRESHOLD
+    g.repeated_query_detector = RepeatedQueryDetector(threshold) if threshold else None
 
 
 def setup_request_stats(app):
@@ -37,6 +137,15 @@ def setup_request_stats(app):
     def _request_started(sender, **kwargs):
         request_stats_request_started()
 
+    @request_tearing_down.connect_via(app)
+    def _request_tearing_down(sender, **kwargs):
+        detector = g.get('repeated_query_detector')
+        if detector is None or not detector.repeated_queries:
+            return
+        from indico.core.logger import Logger
+        Logger.get('db').warning('Repeated queries in %s %s:\n%s', request.method, request.relative_url,
+                                 detector.format_report())
+
     @listens_for(Engine, 'before_cursor_execute', named=True)
     def before_cursor_execute(context, **unused):
         if not g.get('request_stats_initialized'):
@@ -44,12 +153,15 @@ def setup_request_stats(app):
         context._query_start_time = time.time()
 
     @listens_for(Engine, 'after_cursor_execute', named=True)
-    def after_cursor_execute(context, **unused):
+    def after_cursor_execute(context, statement, **unused):
         if not g.get('request_stats_initialized'):
             return
         total = time.time() - context._query_start_time
         g.query_count += 1
         g.query_duration += total
+        detector = g.get('repeated_query_detector')
+        if detector is not None:
+            detector.add(statement)
 
 
 def get_request_stats():
@@ -0,0 +1,51 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+
+import pytest
+
+from indico.web.flask.stats import RepeatedQueryDetector, get_query_fingerprint
+
+
+@pytest.mark.parametrize(('statement', 'expected'), (
+    ('SELECT a FROM t WHERE id = %(id_1)s', 'SELECT a FROM t WHERE id = %(id)s'),
+    ('SELECT a FROM t WHERE id IN (%(id_1)s, %(id_2)s, %(id_3)s)', 'SELECT a FROM t WHERE id IN (...)'),
+    ('SELECT a FROM t WHERE id IN (%(id_1)s)', 'SELECT a FROM t WHERE id IN (%(id)s)'),
+    ("SELECT a\n  FROM t_1 WHERE b = 'foo''s' AND c > 10 LIMIT 5", 'SELECT a FROM t_1 WHERE b = ? AND c > ? LIMIT ?'),
+))
+def test_get_query_fingerprint(statement, expected):
+    assert get_query_fingerprint(statement) == expected
+
+
+def test_repeated_query_detector():
+    detector = RepeatedQueryDetector(3)
+    for i in xrange(5):
+        detector.add('SELECT a FROM t WHERE id = {}'.format(i))
+    detector.add('SELECT b FROM t WHERE id IN (%(id_1)s, %(id_2)s)')
+    detector.add('SELECT b FROM t WHERE id IN (%(id_1)s, %(id_2)s, %(id_3)s)')
+    detector.add('SELECT b FROM t WHERE id IN (%(id_1)s, %(id_2)s, %(id_3)s, %(id_4)s)')
+    detector.add('SELECT c FROM t')
+    detector.add('SELECT c FROM t')
+    assert [(q.fingerprint, q.count) for q in detector.repeated_queries] == [
+        ('SELECT a FROM t WHERE id = ?', 5),
+        ('SELECT b FROM t WHERE id IN (...)', 3)
+    ]
+    source = detector.repeated_queries[0].source
+    assert source['file'] == __file__.replace('.pyc', '.py')
+    assert source['function'] == 'test_repeated_query_detector'
+    report = detector.format_report().splitlines()
+    assert report[0] == '5x from {0[file]}:{0[line]} {0[function]}:'.format(source)
+    assert report[1] == '    SELECT a FROM t WHERE id = ?'
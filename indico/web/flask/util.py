@@ -27,8 +27,10 @@ from flask import Blueprint, current_app, g, redirect, request
 from flask.helpers import get_root_path
 from werkzeug.datastructures import FileStorage, Headers
 from werkzeug.exceptions import NotFound
+from werkzeug.http import is_resource_modified
 from werkzeug.routing import BaseConverter, BuildError, UnicodeConverter
 from werkzeug.wrappers import Response as WerkzeugResponse
+from werkzeug.wsgi import wrap_file
 
 from indico.util.caching import memoize
 from indico.util.fs import secure_filename
@@ -319,6 +321,36 @@ def send_file(name, path_or_fd, mimetype, last_modified=None, no_cache=True, inl
     return rv
 
 
+def send_file_ranges(name, fileobj, mimetype, size, etag=None, last_modified=None):
+    """Sends a file-like object of a known size to the user as a download.
+
+    Unlike :func:`send_file`, this supports range requests (and thus
+    resuming an interrupted download) without needing a local path to
+    the file, so it works with any storage backend.
+
+    :param name: The filename visible to the user.
+    :param fileobj: A file-like object containing the file.  It does not
+                    need to be seekable, but seeking avoids reading the
+                    data before the requested range.
+    :param mimetype: The MIME type of the file.
+    :param size: The size of the file in bytes.
+    :param etag: A strong ETag for the file.  It is used to make sure
+                 the ranges of a resumed download belong to the same
+                 file (``If-Range``).
+    :param last_modified: A datetime indicating the last modification
+                          of the file.
+    """
+    rv = current_app.response_class(wrap_file(request.environ, fileobj), mimetype=mimetype, direct_passthrough=True)
+    rv.headers.add('Content-Disposition', 'attachment', filename=secure_filename(name, 'file'))
+    rv.content_length = size
+    if etag:
+        rv.set_etag(etag)
+    if last_modified:
+        rv.last_modified = last_modified
+    rv.cache_control.private = True
+    return rv.make_conditional(request, accept_ranges=True, complete_length=size)
+
+
 # Note: When adding custom converters please do not forget to add them to converter_functions in routing.js
 # if they need any custom processing (i.e. not just encodeURIComponent) in JavaScript.
 class ListConverter(BaseConverter):
@@ -349,14 +381,35 @@ class ResponseUtil(object):
         self.headers = Headers()
         self.status = 200
         self.content_type = None
+        self.etag = None
+        self.weak_etag = False
+        self.last_modified = None
 
     @property
     def modified(self):
-        return bool(self.headers) or self.status != 200 or self.content_type
+        return (bool(self.headers) or self.status != 200 or self.content_type or self.etag is not None or
+                self.last_modified is not None)
+
+    @property
+    def not_modified(self):
+        """Whether the client already has the current version of the response.
+
+        This checks the conditional request headers against the `etag`
+        and `last_modified` validators which have been set.
+        """
+        if self.etag is None and self.last_modified is None:
+            return False
+        return not is_resource_modified(request.environ, etag=self.etag, last_modified=self.last_modified)
 
     def make_empty(self):
         return self.make_response('')
 
+    def make_not_modified(self):
+        """Create a ``304 Not Modified`` response with the validators."""
+        res = current_app.response_class(status=304, headers=self.headers)
+        self.apply_validators(res)
+        return res
+
     def make_response(self, res):
         if isinstance(res, (current_app.response_class, WerkzeugResponse, tuple)):
             if self.modified:
@@ -372,8 +425,16 @@ class ResponseUtil(object):
         res = current_app.make_response((res, self.status, self.headers))
         if self.content_type:
             res.content_type = self.content_type
+        self.apply_validators(res)
         return res
 
+    def apply_validators(self, res):
+        """Set the validators on an existing response object."""
+        if self.etag is not None:
+            res.set_etag(self.etag, weak=self.weak_etag)
+        if self.last_modified is not None:
+            res.last_modified = self.last_modified
+
 
 class XAccelMiddleware(object):
     """A WSGI Middleware that converts X-Sendfile headers to X-Accel-Redirect
@@ -0,0 +1,72 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+from datetime import datetime
+from io import BytesIO
+
+import pytest
+
+from indico.web.flask.util import ResponseUtil, send_file_ranges
+
+
+@pytest.mark.parametrize(('headers', 'weak', 'not_modified'), (
+    ({}, False, False),
+    ({'If-None-Match': '"foo"'}, False, True),
+    ({'If-None-Match': '"bar", "foo"'}, False, True),
+    ({'If-None-Match': '"bar"'}, False, False),
+    ({'If-None-Match': 'W/"foo"'}, True, True),
+    ({'If-None-Match': '"foo"'}, True, True),
+    ({'If-Modified-Since': 'Mon, 04 Jun 2018 12:00:00 GMT'}, False, True),
+    ({'If-Modified-Since': 'Mon, 04 Jun 2018 11:59:59 GMT'}, False, False),
+    # If-None-Match takes precedence over If-Modified-Since
+    ({'If-None-Match': '"bar"', 'If-Modified-Since': 'Mon, 04 Jun 2018 12:00:00 GMT'}, False, False),
+))
+def test_response_util_conditional(app, headers, weak, not_modified):
+    with app.test_request_context(headers=headers):
+        response = ResponseUtil()
+        response.etag = 'foo'
+        response.weak_etag = weak
+        response.last_modified = datetime(2018, 6, 4, 12, 0, 0)
+        assert response.not_modified == not_modified
+        rv = response.make_not_modified() if not_modified else response.make_response('test')
+        assert rv.status_code == (304 if not_modified else 200)
+        assert rv.get_etag() == ('foo', weak)
+        assert rv.last_modified == datetime(2018, 6, 4, 12, 0, 0)
+
+
+def test_response_util_no_validators(app):
+    with app.test_request_context(headers={'If-Modified-Since': 'Mon, 04 Jun 2018 12:00:00 GMT'}):
+        response = ResponseUtil()
+        assert not response.not_modified
+        assert response.make_response('test').get_etag() == (None, None)
+
+
+@pytest.mark.parametrize(('headers', 'status', 'data'), (
+    ({}, 200, b'0123456789'),
+    ({'Range': 'bytes=3-'}, 206, b'3456789'),
+    ({'Range': 'bytes=2-4'}, 206, b'234'),
+    ({'Range': 'bytes=3-', 'If-Range': '"foo"'}, 206, b'3456789'),
+    ({'Range': 'bytes=3-', 'If-Range': '"bar"'}, 200, b'0123456789'),
+    ({'If-None-Match': '"foo"'}, 304, None),
+))
+def test_send_file_ranges(app, headers, status, data):
+    with app.test_request_context(headers=headers):
+        rv = send_file_ranges('test.zip', BytesIO(b'0123456789'), 'application/zip', 10, etag='foo')
+        rv.direct_passthrough = False
+        assert rv.status_code == status
+        assert rv.headers['Accept-Ranges'] == 'bytes'
+        if data is not None:
+            assert rv.get_data() == data
@@ -24,10 +24,11 @@ import posixpath
 import re
 import time
 import urllib
+from datetime import datetime
 from urlparse import parse_qs
 from uuid import UUID
 
-from flask import current_app, g, request, session
+from flask import current_app, g, request, session, stream_with_context
 from werkzeug.exceptions import BadRequest, NotFound
 
 from indico.core.db import db
@@ -41,9 +42,9 @@ from indico.modules.oauth.provider import load_token
 from indico.util.string import to_unicode
 from indico.web.flask.util import ResponseUtil
 from indico.web.http_api import HTTPAPIHook
-from indico.web.http_api.fossils import IHTTPAPIExportResultFossil
+from indico.web.http_api.fossils import IHTTPAPIExportResultFossil, IHTTPAPIResultFossil
 from indico.web.http_api.metadata.serializer import Serializer
-from indico.web.http_api.responses import HTTPAPIError, HTTPAPIResult
+from indico.web.http_api.responses import HTTPAPIError, HTTPAPIResult, HTTPAPIResultStream
 from indico.web.http_api.util import get_query_parameter
 
 
@@ -111,6 +112,24 @@ def checkAK(apiKey, signature, timestamp, path, query):
     return ak, onlyPublic
 
 
+def _stream_response(serializer, response_util, result, path, query, ts):
+    """Create a response which serializes the results while sending them."""
+    fossil = fossilize(HTTPAPIResult([], path, query, ts), IHTTPAPIResultFossil)
+    del fossil['_fossil']
+    fossil['results'] = result
+
+    def _iter_data():
+        try:
+            for chunk in serializer.stream(fossil):
+                yield chunk
+        except Exception:
+            Logger.get('httpapi').exception('Serialization error in streamed request %s?%s', path, query)
+            raise
+
+    serializer.set_headers(response_util)
+    return response_util.make_response(stream_with_context(_iter_data()))
+
+
 def handler(prefix, path):
     path = posixpath.join('/', prefix, path)
     clearCache()  # init fossil cache
@@ -137,6 +156,7 @@ def handler(prefix, path):
     pretty = get_query_parameter(queryParams, ['p', 'pretty'], 'no') == 'yes'
     onlyPublic = get_query_parameter(queryParams, ['op', 'onlypublic'], 'no') == 'yes'
     onlyAuthed = get_query_parameter(queryParams, ['oa', 'onlyauthed'], 'no') == 'yes'
+    stream = get_query_parameter(queryParams, ['stream'], 'no') == 'yes'
     scope = 'read:legacy_api' if request.method == 'GET' else 'write:legacy_api'
     try:
         oauth_valid, oauth_request = oauth.verify_request([scope])
@@ -158,9 +178,13 @@ def handler(prefix, path):
     # Disable caching if we are not just retrieving data (or the hook requires it)
     if request.method == 'POST' or hook.NO_CACHE:
         noCache = True
+    # Streaming only makes sense if the results can be serialized incrementally
+    if not Serializer.can_stream(dformat):
+        stream = False
 
     ak = error = result = None
     ts = int(time.time())
+    notModified = False
     typeMap = {}
     responseUtil = ResponseUtil()
     is_response = False
@@ -186,10 +210,11 @@ def handler(prefix, path):
             if ak and user is None:
                 cacheKey = normalizeQuery(path, query,
                                           remove=('_', 'ak', 'apiKey', 'signature', 'timestamp', 'nc', 'nocache',
-                                                  'oa', 'onlyauthed'))
+                                                  'oa', 'onlyauthed', 'stream'))
             else:
                 cacheKey = normalizeQuery(path, query,
-                                          remove=('_', 'signature', 'timestamp', 'nc', 'nocache', 'oa', 'onlyauthed'))
+                                          remove=('_', 'signature', 'timestamp', 'nc', 'nocache', 'oa', 'onlyauthed',
+                                                  'stream'))
                 if signature:
                     # in case the request was signed, store the result under a different key
                     cacheKey = 'signed_' + cacheKey
@@ -202,7 +227,7 @@ def handler(prefix, path):
             userPrefix = 'user-{}_'.format(used_session.user.id)
             cacheKey = userPrefix + normalizeQuery(path, query,
                                                    remove=('_', 'nc', 'nocache', 'ca', 'cookieauth', 'oa', 'onlyauthed',
-                                                           'csrftoken'))
+                                                           'csrftoken', 'stream'))
 
         # Bail out if the user requires authentication but is not authenticated
         if onlyAuthed and not user:
@@ -211,21 +236,32 @@ def handler(prefix, path):
         addToCache = not hook.NO_CACHE
         cache = GenericCache('HTTPAPI')
         cacheKey = RE_REMOVE_EXTENSION.sub('', cacheKey)
-        if not noCache:
+        content_version = hook.get_content_version(user)
+        if content_version is not None:
+            version, last_modified = content_version
+            # cached results of older versions must not be used anymore
+            cacheKey = '{}_{}'.format(cacheKey, version)
+            responseUtil.etag = hashlib.md5('{}.{}'.format(cacheKey, dformat)).hexdigest()
+            responseUtil.last_modified = datetime.utcfromtimestamp(int(last_modified))
+            notModified = responseUtil.not_modified
+        if not noCache and not notModified:
             obj = cache.get(cacheKey)
             if obj is not None:
                 result, extra, ts, complete, typeMap = obj
                 addToCache = False
-        if result is None:
+        if result is None and not notModified:
             g.current_api_user = user
             # Perform the actual exporting
-            res = hook(user)
+            res = hook(user, stream=stream)
             if isinstance(res, current_app.response_class):
                 addToCache = False
                 is_response = True
                 result, extra, complete, typeMap = res, {}, True, {}
             elif isinstance(res, tuple) and len(res) == 4:
                 result, extra, complete, typeMap = res
+                if isinstance(result, HTTPAPIResultStream):
+                    # results which are only produced while sending them cannot be cached
+                    addToCache = False
             else:
                 result, extra, complete, typeMap = res, {}, True, {}
         if result is not None and addToCache:
@@ -234,12 +270,13 @@ def handler(prefix, path):
                 cache.set(cacheKey, (result, extra, ts, complete, typeMap), ttl)
     except HTTPAPIError, e:
         error = e
+        responseUtil.etag = responseUtil.last_modified = None
         if e.getCode():
             responseUtil.status = e.getCode()
             if responseUtil.status == 405:
                 responseUtil.headers['Allow'] = 'GET' if request.method == 'POST' else 'POST'
 
-    if result is None and error is None:
+    if result is None and error is None and not notModified:
         # TODO: usage page
         raise NotFound
     else:
@@ -257,7 +294,11 @@ def handler(prefix, path):
         # Log successful POST api requests
         if error is None and request.method == 'POST':
             logger.info('API request: %s?%s', path, query)
+        if notModified and error is None:
+            return responseUtil.make_not_modified()
         if is_response:
+            if error is None and result.status_code == 200:
+                responseUtil.apply_validators(result)
             return result
         serializer = Serializer.create(dformat, query_params=queryParams, pretty=pretty, typeMap=typeMap,
                                        **hook.serializer_args)
@@ -268,10 +309,11 @@ def handler(prefix, path):
                 serializer = Serializer.create('json')
 
             result = fossilize(error)
-        else:
-            if serializer.encapsulate:
-                result = fossilize(HTTPAPIResult(result, path, query, ts, complete, extra), IHTTPAPIExportResultFossil)
-                del result['_fossil']
+        elif isinstance(result, HTTPAPIResultStream):
+            return _stream_response(serializer, responseUtil, result, path, query, ts)
+        elif serializer.encapsulate:
+            result = fossilize(HTTPAPIResult(result, path, query, ts, complete, extra), IHTTPAPIExportResultFossil)
+            del result['_fossil']
 
         try:
             data = serializer(result)
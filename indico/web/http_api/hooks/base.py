@@ -21,6 +21,7 @@ Base export interface
 import re
 import urllib
 from datetime import datetime, time, timedelta
+from functools import partial
 from types import GeneratorType
 
 import pytz
@@ -37,7 +38,7 @@ from indico.web.http_api.metadata.atom import AtomSerializer
 from indico.web.http_api.metadata.html import HTML4Serializer
 from indico.web.http_api.metadata.ical import ICalSerializer
 from indico.web.http_api.metadata.jsonp import JSONPSerializer
-from indico.web.http_api.responses import HTTPAPIError
+from indico.web.http_api.responses import HTTPAPIError, HTTPAPIResultStream
 from indico.web.http_api.util import get_query_parameter
 
 
@@ -59,6 +60,7 @@ class HTTPAPIHook(object):
     COMMIT = False  # commit database changes
     HTTP_POST = False  # require (and allow) HTTP POST
     NO_CACHE = False
+    STREAM_EXTRA_FIELDS = None  # result fields used by the `_extra` method. None = no streaming if it exists
 
     @classmethod
     def parseRequest(cls, path, queryParams):
@@ -139,6 +141,41 @@ class HTTPAPIHook(object):
     def _has_access(self, user):
         return True
 
+    def _get_last_modified(self, user):
+        """Get the time when the exported data was last modified.
+
+        Hooks which can determine this without retrieving the data
+        should override this method to support conditional requests.
+
+        :return: A UTC timestamp or ``None`` if it is not known.
+        """
+        return None
+
+    def get_content_version(self, user):
+        """Get the version of the data exported by the hook.
+
+        The version changes whenever the exported data is modified, so
+        it can be used to answer conditional requests without running
+        the hook.
+
+        :param user: the user performing the request
+        :return: A ``(version, last_modified)`` tuple, where
+                 `last_modified` is a UTC timestamp, or ``None`` if
+                 the hook cannot tell when its data changes.
+        """
+        if request.method != 'GET' or self.HTTP_POST or self.COMMIT or (not self.GUEST_ALLOWED and not user):
+            return None
+        self._getParams()
+        if not self._has_access(user):
+            return None
+        last_modified = self._get_last_modified(user)
+        if last_modified is None:
+            return None
+        # relative dates such as `today` are part of the query, so the
+        # actual dates need to be included as well
+        version = '{!r}_{}_{}_{}'.format(last_modified, user.id if user else '', self._fromDT, self._toDT)
+        return version, last_modified
+
     @property
     def serializer_args(self):
         return {}
@@ -148,12 +185,18 @@ class HTTPAPIHook(object):
             return self.METHOD_NAME
         return self.PREFIX + '_' + self._type.replace('-', '_')
 
-    def _performCall(self, func, user):
+    def _can_stream(self, extra_func):
+        return not self.COMMIT and (extra_func is None or self.STREAM_EXTRA_FIELDS is not None)
+
+    def _performCall(self, func, user, stream=False):
         resultList = []
         complete = True
         try:
             res = func(user)
-            if isinstance(res, GeneratorType):
+            if stream and isinstance(res, GeneratorType):
+                # the generator is consumed while sending the response
+                return res, complete
+            elif isinstance(res, GeneratorType):
                 for obj in res:
                     resultList.append(obj)
             else:
@@ -162,18 +205,31 @@ class HTTPAPIHook(object):
             complete = (self._limit == self._userLimit)
         return resultList, complete
 
-    def _perform(self, user, func, extra_func):
+    def _perform(self, user, func, extra_func, stream=False):
         self._getParams()
         if not self._has_access(user):
             raise HTTPAPIError('Access to this resource is restricted.', 403)
-        resultList, complete = self._performCall(func, user)
+        stream = stream and self._can_stream(extra_func)
+        resultList, complete = self._performCall(func, user, stream)
         if isinstance(resultList, current_app.response_class):
             return True, resultList, None, None
+        elif isinstance(resultList, GeneratorType):
+            resultList = HTTPAPIResultStream(resultList, partial(extra_func, user) if extra_func else None,
+                                             self.STREAM_EXTRA_FIELDS)
+            return False, resultList, complete, None
         extra = extra_func(user, resultList) if extra_func else None
         return False, resultList, complete, extra
 
-    def __call__(self, user):
-        """Perform the actual exporting"""
+    def __call__(self, user, stream=False):
+        """Perform the actual exporting
+
+        :param user: the user performing the request
+        :param stream: whether to return the results as a
+                       :class:`HTTPAPIResultStream` which produces them
+                       only while the response is being sent.  Only
+                       possible if the export function returns a
+                       generator.
+        """
         if self.HTTP_POST != (request.method == 'POST'):
             raise HTTPAPIError('This action requires %s' % ('POST' if self.HTTP_POST else 'GET'), 405)
         if not self.GUEST_ALLOWED and not user:
@@ -186,7 +242,7 @@ class HTTPAPIHook(object):
             raise NotImplementedError(method_name)
 
         if not self.COMMIT:
-            is_response, resultList, complete, extra = self._perform(user, func, extra_func)
+            is_response, resultList, complete, extra = self._perform(user, func, extra_func, stream)
             db.session.rollback()
         else:
             try:
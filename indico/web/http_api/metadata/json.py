@@ -25,9 +25,26 @@ class JSONSerializer(Serializer):
     """
 
     _mime = 'application/json'
+    streamable = True
 
     def _execute(self, fossil):
         return json.dumps(fossil, pretty=self.pretty)
 
+    def _stream(self, fossil):
+        results = fossil['results']
+        yield '{'
+        for key, value in fossil.iteritems():
+            if key != 'results':
+                yield '{}: {}, '.format(json.dumps(key), json.dumps(value, pretty=self.pretty))
+        yield '"results": ['
+        for i, result in enumerate(results):
+            if i:
+                yield ', '
+            yield json.dumps(result, pretty=self.pretty)
+        yield ']'
+        for key, value in results.get_summary().iteritems():
+            yield ', {}: {}'.format(json.dumps(key), json.dumps(value, pretty=self.pretty))
+        yield '}'
+
 
 Serializer.register('json', JSONSerializer)
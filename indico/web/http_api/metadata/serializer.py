@@ -15,11 +15,12 @@
 # along with Indico; if not, see <http://www.gnu.org/licenses/>.
 
 
-
 class Serializer(object):
 
     schemaless = True
     encapsulate = True
+    streamable = False
+    stream_buffer_size = 64 * 1024
 
     registry = {}
 
@@ -53,6 +54,11 @@ class Serializer(object):
         else:
             raise Exception("Serializer for '%s' does not exist!" % dformat)
 
+    @classmethod
+    def can_stream(cls, dformat):
+        serializer = cls.registry.get(dformat)
+        return serializer is not None and serializer.streamable
+
     def getMIMEType(self):
         return self._mime
 
@@ -64,6 +70,29 @@ class Serializer(object):
         self._data = self._execute(obj, *args, **kwargs)
         return self._data
 
+    def stream(self, obj):
+        """Serialize an export result incrementally.
+
+        `obj['results']` is a :class:`HTTPAPIResultStream` which is
+        consumed while serializing.  The returned generator yields the
+        serialized data in chunks of roughly `stream_buffer_size` bytes.
+        """
+        self._obj = obj
+        buf = []
+        size = 0
+        for chunk in self._stream(obj):
+            buf.append(chunk)
+            size += len(chunk)
+            if size >= self.stream_buffer_size:
+                yield ''.join(buf)
+                buf = []
+                size = 0
+        if buf:
+            yield ''.join(buf)
+
+    def _stream(self, obj):
+        raise NotImplementedError
+
 
 from indico.web.http_api.metadata.json import JSONSerializer
 from indico.web.http_api.metadata.xml import XMLSerializer
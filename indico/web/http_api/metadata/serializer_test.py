@@ -0,0 +1,101 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+from lxml import etree
+
+from indico.util import json
+from indico.web.http_api.exceptions import LimitExceededException
+from indico.web.http_api.metadata.jsonp import JSONPSerializer
+from indico.web.http_api.metadata.serializer import Serializer
+from indico.web.http_api.responses import HTTPAPIResultStream
+
+
+def _make_results():
+    return [{'_type': 'Conference', '_fossil': 'conferenceMetadata', 'id': unicode(i), 'title': u'Event {}'.format(i),
+             'categoryId': i % 3}
+            for i in xrange(10)]
+
+
+def _extra_func(results):
+    return {'categories': sorted({r['categoryId'] for r in results})}
+
+
+def _make_fossils(stream):
+    extra_func = _extra_func
+    results = _make_results()
+    if stream:
+        results = HTTPAPIResultStream(iter(results), extra_func, ('categoryId',))
+        extra = None
+    else:
+        extra = extra_func(results)
+    fossil = {'_type': 'HTTPAPIResult', 'ts': 1234, 'url': 'https://indico.test/export/categ/0.json',
+              'results': results}
+    if not stream:
+        fossil.update(count=len(results), complete=True, additionalInfo=extra)
+    return fossil
+
+
+@pytest.mark.parametrize('pretty', (True, False))
+def test_stream_json(pretty):
+    expected = Serializer.create('json', pretty=pretty)(_make_fossils(False))
+    streamed = ''.join(Serializer.create('json', pretty=pretty).stream(_make_fossils(True)))
+    assert json.loads(streamed) == json.loads(expected)
+
+
+def test_stream_jsonp():
+    expected = JSONPSerializer({'jsonp': 'foo'})(_make_fossils(False))
+    streamed = ''.join(JSONPSerializer({'jsonp': 'foo'}).stream(_make_fossils(True)))
+    prefix = '// fetched from Indico\nfoo('
+    assert streamed.startswith(prefix)
+    assert streamed.endswith(');')
+    assert json.loads(streamed[len(prefix):-2]) == json.loads(expected[len(prefix):-2])
+
+
+def test_stream_xml():
+    expected = Serializer.create('xml')(_make_fossils(False))
+    streamed = ''.join(Serializer.create('xml').stream(_make_fossils(True)))
+    expected_root = etree.fromstring(expected)
+    streamed_root = etree.fromstring(streamed)
+    assert streamed_root.tag == expected_root.tag == 'httpapiresult'
+    assert ({child.tag: etree.tostring(child) for child in streamed_root} ==
+            {child.tag: etree.tostring(child) for child in expected_root})
+
+
+def test_stream_chunks():
+    serializer = Serializer.create('json')
+    serializer.stream_buffer_size = 100
+    chunks = list(serializer.stream(_make_fossils(True)))
+    assert len(chunks) > 1
+    assert all(len(chunk) >= 100 for chunk in chunks[:-1])
+
+
+def test_stream_limit_exceeded():
+    def _iter_results():
+        for result in _make_results()[:4]:
+            yield result
+        raise LimitExceededException
+
+    results = HTTPAPIResultStream(_iter_results(), _extra_func, ('categoryId',))
+    assert len(list(results)) == 4
+    assert results.get_summary() == {'count': 4, 'complete': False, 'additionalInfo': {'categories': [0, 1, 2]}}
+
+
+def test_can_stream():
+    assert Serializer.can_stream('json')
+    assert Serializer.can_stream('xml')
+    assert not Serializer.can_stream('html')
+    assert not Serializer.can_stream('invalid')
@@ -39,6 +39,7 @@ class XMLSerializer(Serializer):
     """
 
     _mime = 'text/xml'
+    streamable = True
 
     def __init__(self, query_params, pretty=False, **kwargs):
         self._typeMap = kwargs.pop('typeMap', {})
@@ -118,5 +119,20 @@ class XMLSerializer(Serializer):
         return etree.tostring(result, pretty_print=self.pretty,
                               xml_declaration=xml_declaration, encoding='utf-8')
 
+    def _stream(self, fossil):
+        results = fossil['results']
+        type_name = self._typeMap.get(fossil['_type'], fossil['_type']).lower()
+        envelope = {k: v for k, v in fossil.iteritems() if k not in {'_type', 'results'}}
+        yield "<?xml version='1.0' encoding='utf-8'?>\n<{}>".format(type_name)
+        for elem in self._xmlForFossil(envelope):
+            yield etree.tostring(elem, pretty_print=self.pretty, encoding='utf-8')
+        yield '<results>'
+        for result in results:
+            yield etree.tostring(self._xmlForFossil(result), pretty_print=self.pretty, encoding='utf-8')
+        yield '</results>'
+        for elem in self._xmlForFossil(results.get_summary()):
+            yield etree.tostring(elem, pretty_print=self.pretty, encoding='utf-8')
+        yield '</{}>'.format(type_name)
+
 
 Serializer.register('xml', XMLSerializer)
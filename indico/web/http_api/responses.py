@@ -18,6 +18,7 @@ import time
 
 from indico.core.config import config
 from indico.legacy.common.fossilize import Fossilizable, fossilizes
+from indico.web.http_api.exceptions import LimitExceededException
 from indico.web.http_api.fossils import IHTTPAPIErrorFossil, IHTTPAPIResultFossil
 
 
@@ -68,3 +69,46 @@ class HTTPAPIResult(Fossilizable):
 
     def getAdditionalInfo(self):
         return self._extra
+
+
+class HTTPAPIResultStream(object):
+    """Lazily evaluated results of an export running in streaming mode.
+
+    Iterating over it yields the results one by one while the response
+    is being sent.  Since the results are only produced once,
+    the count, whether all results were sent and any additional
+    information derived from them are only available after the stream
+    has been exhausted.
+
+    :param results: an iterable producing the results
+    :param extra_func: a function receiving a list of the (partial)
+                       results and returning the additional info
+    :param extra_fields: the result fields `extra_func` needs; only
+                         those are kept in memory
+    """
+
+    def __init__(self, results, extra_func=None, extra_fields=()):
+        self._results = results
+        self._extra_func = extra_func
+        self._extra_fields = extra_fields
+        self._extra_data = []
+        self.count = 0
+        self.complete = True
+
+    def __iter__(self):
+        try:
+            for obj in self._results:
+                self.count += 1
+                if self._extra_func:
+                    self._extra_data.append({field: obj[field] for field in self._extra_fields})
+                yield obj
+        except LimitExceededException:
+            self.complete = False
+
+    @property
+    def extra(self):
+        return self._extra_func(self._extra_data) if self._extra_func else {}
+
+    def get_summary(self):
+        """Get the result data only known after all results were sent."""
+        return {'count': self.count, 'complete': self.complete, 'additionalInfo': self.extra}
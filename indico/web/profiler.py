@@ -0,0 +1,341 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+"""Low-overhead profiling of requests in production.
+
+When :data:`PROFILE_SAMPLE_RATE` or :data:`PROFILE_SLOW_THRESHOLD` is
+set, the duration and number of SQL queries of every request are
+recorded per RH class.  For the requests selected by those settings a
+background thread additionally samples the stack of the thread
+handling the request in regular intervals.  Requests which are only
+profiled because they are slow are not sampled until they exceed
+:data:`PROFILE_SLOW_THRESHOLD`, so their stacks only cover the time
+after that.
+
+Each process aggregates the data in memory and periodically writes it
+to ``<TEMP_DIR>/profile/``.  The files are removed by the regular temp
+dir cleanup, so the ``indico profile`` command can report on up to one
+day of data.
+"""
+
+from __future__ import absolute_import, division, unicode_literals
+
+import atexit
+import cPickle
+import errno
+import math
+import os
+import random
+import socket
+import sys
+import thread
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from uuid import uuid4
+
+import click
+from flask import g
+from terminaltables import AsciiTable
+
+from indico.core.config import config
+from indico.core.logger import Logger
+from indico.util.console import cformat
+
+
+logger = Logger.get('profiler')
+
+
+#: Seconds between two samples of a request's stack
+SAMPLE_INTERVAL = 0.01
+#: Maximum number of frames kept from the innermost frame of a stack
+MAX_STACK_DEPTH = 64
+#: Maximum number of request timings per RH kept in memory; if there are
+#: more requests a random subset of them is kept
+MAX_TIMINGS = 1000
+#: Seconds after which the collected data is written to disk
+FLUSH_INTERVAL = 60
+
+
+def _get_profile_dir():
+    return os.path.join(config.TEMP_DIR, 'profile')
+
+
+def _get_stack(frame):
+    entries = []
+    while frame is not None and len(entries) < MAX_STACK_DEPTH:
+        entries.append('{}:{}'.format(frame.f_globals.get('__name__', '?'), frame.f_code.co_name))
+        frame = frame.f_back
+    return ';'.join(reversed(entries))
+
+
+class StackSampler(object):
+    """Periodically records the stacks of some threads.
+
+    The stacks are stored in the "collapsed" format used by most flame
+    graph tools: the frames from the outermost to the innermost one
+    separated by semicolons.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self._stacks = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, thread_id, delay=0):
+        """Start sampling the stack of a thread.
+
+        :param thread_id: The id of the thread to sample.
+        :param delay: The number of seconds to wait before taking the
+                      first sample.
+        """
+        with self._lock:
+            self._stacks[thread_id] = (time.time() + delay, Counter())
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='indico-stack-sampler')
+                self._thread.daemon = True
+                self._thread.start()
+
+    def stop(self, thread_id):
+        """Stop sampling the stack of a thread.
+
+        :return: A `Counter` with the number of times each stack
+                 has been seen.
+        """
+        with self._lock:
+            return self._stacks.pop(thread_id, (None, Counter()))[1]
+
+    def sample(self):
+        with self._lock:
+            now = time.time()
+            due = {thread_id: stacks for thread_id, (start_ts, stacks) in self._stacks.iteritems()
+                   if start_ts <= now}
+            if not due:
+                return
+            frames = sys._current_frames()
+            for thread_id, stacks in due.iteritems():
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    stacks[_get_stack(frame)] += 1
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.sample()
+
+
+def _new_endpoint_data():
+    return {'count': 0, 'timings': [], 'profiled': 0, 'stacks': Counter()}
+
+
+class RequestStatsRecorder(object):
+    """Aggregates request statistics and writes them to disk."""
+
+    def __init__(self, flush_interval=FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._endpoints = defaultdict(_new_endpoint_data)
+        self._start_ts = time.time()
+
+    def record(self, endpoint, duration, query_count, stacks=None):
+        """Record a request.
+
+        :param endpoint: The name of the RH that handled the request.
+        :param duration: The duration of the request in seconds.
+        :param query_count: The number of SQL queries sent.
+        :param stacks: The stack samples of the request, if any.
+        """
+        with self._lock:
+            data = self._endpoints[endpoint]
+            data['count'] += 1
+            timing = (duration, query_count)
+            if len(data['timings']) < MAX_TIMINGS:
+                data['timings'].append(timing)
+            else:
+                # reservoir sampling so every request has the same chance to be kept
+                index = random.randrange(data['count'])
+                if index < MAX_TIMINGS:
+                    data['timings'][index] = timing
+            if stacks:
+                data['profiled'] += 1
+                data['stacks'].update(stacks)
+            if time.time() - self._start_ts >= self.flush_interval:
+                self._flush()
+
+    def flush(self):
+        """Write the data collected so far to disk."""
+        with self._lock:
+            try:
+                self._flush()
+            except Exception:
+                logger.exception('Could not write profiling data')
+
+    def _flush(self):
+        endpoints = self._endpoints
+        start_ts = self._start_ts
+        self._reset()
+        if not endpoints:
+            return
+        path = _get_profile_dir()
+        try:
+            os.makedirs(path)
+        except OSError as exc:
+            if exc.errno != errno.EEXIST:
+                raise
+        filename = '{:.0f}-{}-{}-{}.pickle'.format(time.time(), socket.gethostname(), os.getpid(), uuid4().hex[:8])
+        tmp_filename = os.path.join(path, '.{}'.format(filename))
+        with open(tmp_filename, 'wb') as f:
+            cPickle.dump({'start_ts': start_ts, 'end_ts': time.time(), 'endpoints': dict(endpoints)}, f,
+                         cPickle.HIGHEST_PROTOCOL)
+        os.rename(tmp_filename, os.path.join(path, filename))
+
+
+_sampler = StackSampler()
+_recorder = RequestStatsRecorder()
+atexit.register(_recorder.flush)
+
+
+def is_profiler_enabled():
+    return bool(config.PROFILE_SAMPLE_RATE or config.PROFILE_SLOW_THRESHOLD is not None)
+
+
+@contextmanager
+def profile_request(endpoint):
+    """Collect performance statistics for the current request.
+
+    :param endpoint: The name under which the request is recorded.
+    """
+    if not is_profiler_enabled():
+        yield
+        return
+    rate = config.PROFILE_SAMPLE_RATE
+    threshold = config.PROFILE_SLOW_THRESHOLD
+    selected = bool(rate) and random.randrange(rate) == 0
+    # we cannot know in advance whether a request will be slow, so we
+    # only start sampling it once it exceeded the threshold
+    sample = selected or threshold is not None
+    thread_id = thread.get_ident()
+    if sample:
+        _sampler.start(thread_id, delay=(0 if selected else threshold))
+    start_ts = time.time()
+    try:
+        yield
+    finally:
+        duration = time.time() - start_ts
+        stacks = _sampler.stop(thread_id) if sample else None
+        if not selected and (threshold is None or duration < threshold):
+            stacks = None
+        try:
+            _recorder.record(endpoint, duration, g.get('query_count', 0), stacks)
+        except Exception:
+            # profiling must never break a request
+            logger.exception('Could not record profiling data')
+
+
+def _percentile(values, percent):
+    """Get a percentile using the nearest-rank method."""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(0, int(math.ceil(percent / 100 * len(values))) - 1)]
+
+
+def load_profile_data(since=None):
+    """Load and merge the data written by all processes.
+
+    :param since: A timestamp; older data is ignored.
+    :return: A dict mapping RH names to dicts containing the number of
+             requests (``count``), a list of ``(duration, query_count)``
+             tuples (``timings``), the number of requests whose stacks
+             were sampled (``profiled``) and a `Counter` of the sampled
+             stacks (``stacks``).
+    """
+    path = _get_profile_dir()
+    endpoints = defaultdict(_new_endpoint_data)
+    if not os.path.exists(path):
+        return endpoints
+    for filename in os.listdir(path):
+        if filename.startswith('.') or not filename.endswith('.pickle'):
+            continue
+        try:
+            with open(os.path.join(path, filename), 'rb') as f:
+                data = cPickle.load(f)
+        except (IOError, EOFError, cPickle.UnpicklingError):
+            continue
+        if since is not None and data['end_ts'] < since:
+            continue
+        for endpoint, endpoint_data in data['endpoints'].iteritems():
+            merged = endpoints[endpoint]
+            merged['count'] += endpoint_data['count']
+            merged['timings'] += endpoint_data['timings']
+            merged['profiled'] += endpoint_data['profiled']
+            merged['stacks'].update(endpoint_data['stacks'])
+    return endpoints
+
+
+def get_endpoint_summary(data):
+    """Summarize the statistics of an endpoint.
+
+    :param data: The data of an endpoint as returned by
+                 :func:`load_profile_data`.
+    """
+    durations = [duration for duration, query_count in data['timings']]
+    query_counts = [query_count for duration, query_count in data['timings']]
+    return {'count': data['count'],
+            'p50': _percentile(durations, 50),
+            'p95': _percentile(durations, 95),
+            'queries_p50': _percentile(query_counts, 50),
+            'queries_p95': _percentile(query_counts, 95),
+            'total': sum(durations) / len(durations) * data['count'] if durations else 0}
+
+
+def profile_report_cmd(hours, endpoint, limit, stacks):
+    data = load_profile_data(time.time() - hours * 3600)
+    if endpoint:
+        data = {name: endpoint_data for name, endpoint_data in data.iteritems() if endpoint in name}
+    if not data:
+        click.echo(cformat('%{yellow}No profiling data found'))
+        return
+    summaries = sorted(((name, get_endpoint_summary(endpoint_data)) for name, endpoint_data in data.iteritems()),
+                       key=lambda x: x[1]['total'], reverse=True)[:limit]
+    table_data = [['RH', 'Requests', 'p50 (ms)', 'p95 (ms)', 'Queries p50', 'Queries p95']]
+    for name, summary in summaries:
+        table_data.append([name, unicode(summary['count']),
+                           '{:.0f}'.format(summary['p50'] * 1000), '{:.0f}'.format(summary['p95'] * 1000),
+                           unicode(summary['queries_p50']), unicode(summary['queries_p95'])])
+    table = AsciiTable(table_data, cformat('%{white!}Slowest endpoints (by total time)%{reset}'))
+    for column in xrange(1, 6):
+        table.justify_columns[column] = 'right'
+    click.echo(table.table)
+    if not stacks:
+        return
+    for name, summary in summaries:
+        endpoint_data = data[name]
+        if not endpoint_data['stacks']:
+            continue
+        total_samples = sum(endpoint_data['stacks'].itervalues())
+        click.echo()
+        click.echo(cformat('%{white!}{}%{reset} ({} profiled requests)').format(name, endpoint_data['profiled']))
+        for stack, samples in endpoint_data['stacks'].most_common(stacks):
+            frames = stack.split(';')
+            click.echo(cformat('  %{green}{:5.1f}%%{reset}  {}').format(100 * samples / total_samples, frames[-1]))
+            for frame in reversed(frames[-6:-1]):
+                click.echo('          {}'.format(frame))
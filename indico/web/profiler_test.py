@@ -0,0 +1,125 @@
+# This file is part of Indico.
+# Copyright (C) 2002 - 2018 European Organization for Nuclear Research (CERN).
+#
+# Indico is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# Indico is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Indico; if not, see <http://www.gnu.org/licenses/>.
+
+
+import thread
+import threading
+import time
+
+import pytest
+from mock import MagicMock
+
+from indico.web import profiler
+from indico.web.profiler import (RequestStatsRecorder, StackSampler, _percentile, get_endpoint_summary,
+                                 load_profile_data, profile_request)
+
+
+@pytest.fixture
+def profile_dir(monkeypatch, tmpdir):
+    monkeypatch.setattr(profiler, '_get_profile_dir', lambda: tmpdir.strpath)
+    return tmpdir
+
+
+@pytest.mark.parametrize(('percent', 'expected'), (
+    (50, 5),
+    (95, 10),
+    (100, 10),
+    (1, 1),
+))
+def test_percentile(percent, expected):
+    assert _percentile(range(10, 0, -1), percent) == expected
+
+
+def test_percentile_empty():
+    assert _percentile([], 50) is None
+
+
+def _busy_function(event):
+    event.wait()
+
+
+def test_stack_sampler():
+    sampler = StackSampler()
+    event = threading.Event()
+    result = {}
+
+    def _run():
+        sampler.start(thread.get_ident())
+        _busy_function(event)
+        result['stacks'] = sampler.stop(thread.get_ident())
+
+    t = threading.Thread(target=_run)
+    t.start()
+    time.sleep(0.1)
+    sampler.sample()
+    sampler.sample()
+    event.set()
+    t.join()
+    stack, count = result['stacks'].most_common(1)[0]
+    assert count >= 2
+    frames = stack.split(';')
+    assert 'indico.web.profiler_test:_busy_function' in frames
+    assert frames[-1] == 'threading:wait'
+
+
+def test_stack_sampler_delay():
+    sampler = StackSampler()
+    sampler.start(thread.get_ident(), delay=60)
+    sampler.sample()
+    assert not sampler.stop(thread.get_ident())
+
+
+def test_recorder(profile_dir):
+    recorder = RequestStatsRecorder()
+    for i in xrange(1, 11):
+        recorder.record('RHFoo', i / 10.0, i)
+    recorder.record('RHFoo', 2, 50, {'a;b': 3, 'a;c': 1})
+    recorder.record('RHBar', 0.5, 1, {'a;b': 1})
+    assert not profile_dir.listdir()
+    recorder.flush()
+    assert len(profile_dir.listdir()) == 1
+    recorder.record('RHFoo', 0.1, 1, {'a;b': 1})
+    recorder.flush()
+    assert len(profile_dir.listdir()) == 2
+    data = load_profile_data()
+    assert set(data) == {'RHFoo', 'RHBar'}
+    assert data['RHFoo']['count'] == 12
+    assert data['RHFoo']['profiled'] == 2
+    assert data['RHFoo']['stacks'] == {'a;b': 4, 'a;c': 1}
+    summary = get_endpoint_summary(data['RHFoo'])
+    assert summary['count'] == 12
+    assert summary['p50'] == 0.5
+    assert summary['p95'] == 2
+    assert summary['queries_p50'] == 5
+    assert summary['queries_p95'] == 50
+    assert not load_profile_data(time.time() + 1)
+
+
+def test_recorder_auto_flush(profile_dir):
+    recorder = RequestStatsRecorder(flush_interval=0)
+    recorder.record('RHFoo', 1, 1)
+    assert len(profile_dir.listdir()) == 1
+
+
+@pytest.mark.usefixtures('app_context')
+def test_profile_request_record_error(monkeypatch):
+    monkeypatch.setattr(profiler, 'config', MagicMock(PROFILE_SAMPLE_RATE=0, PROFILE_SLOW_THRESHOLD=60))
+    monkeypatch.setattr(profiler._recorder, 'record', MagicMock(side_effect=IOError))
+    logger = MagicMock()
+    monkeypatch.setattr(profiler, 'logger', logger)
+    with profile_request('RHFoo'):
+        pass
+    assert logger.exception.called
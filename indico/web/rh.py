@@ -43,6 +43,7 @@ from indico.util.i18n import _
 from indico.util.locators import get_locator
 from indico.util.signals import values_from_signal
 from indico.web.flask.util import ResponseUtil, create_flat_args, url_for
+from indico.web.profiler import profile_request
 
 
 HTTP_VERBS = {'GET', 'PATCH', 'POST', 'PUT', 'DELETE'}
@@ -286,14 +287,15 @@ class RH(object):
             fossilize.clearCache()
             init_email_queue()
             self._check_csrf()
-            res = self._do_process()
-            signals.after_process.send()
-
-            if self.commit:
-                db.session.commit()
-                flush_email_queue()
-            else:
-                db.session.rollback()
+            with profile_request('{}.{}'.format(type(self).__module__, type(self).__name__)):
+                res = self._do_process()
+                signals.after_process.send()
+
+                if self.commit:
+                    db.session.commit()
+                    flush_email_queue()
+                else:
+                    db.session.rollback()
         except DatabaseError:
             db.session.rollback()
             handle_sqlalchemy_database_error()  # this will re-raise an exception